@@ -6,12 +6,25 @@ This script provides a command-line interface to run different operations:
 - fetch: Fetch today's trending repositories
 - analyze: Analyze data and generate webpage
 - full: Run both fetch and analyze operations
+- compact: Pack closed months of trending data into segment files
+- recategorize: Recompute and store the category of every repository
+- reparse: Re-extract day files from the stored raw HTML snapshots
+- variants: Fetch per-language, per-period and spoken-language trending pages
+- index: Sync the SQLite trending index with the data files
+- query: Look up a repository's appearances or a month's top repositories
+- migrate: Backfill integer star and fork counts into existing day files
 """
 
 import sys
 import argparse
-from src.core.fetcher import fetch_trending_repos
-from src.core.analyzer import analyze_and_generate
+from src.core.fetcher import fetch_trending_repos, fetch_trending_variants
+from src.core.analyzer import analyze_and_generate, get_all_data_files
+from src.core.segments import compact_archive
+from src.core.category_store import recategorize
+from src.core.pipeline import run_full_pipeline
+from src.core.snapshots import reparse
+from src.core.database import connect, month_range, repo_appearances, sync_database, top_ranked
+from src.core.migrations import backfill_counts
 
 def main():
     """Main entry point."""
@@ -23,15 +36,85 @@ Examples:
   python main.py fetch          # Fetch today's trending data
   python main.py analyze        # Generate webpage from existing data
   python main.py full           # Fetch data and generate webpage
+  python main.py analyze --rebuild  # Regenerate, ignoring the analyzer state
+  python main.py compact        # Pack closed months into segment files
+  python main.py recategorize   # Store categories after editing TECH_CATEGORIES
+  python main.py variants       # Fetch the configured trending variants
+  python main.py reparse --start 2026-08-01  # Re-extract days from raw snapshots
+  python main.py query --repo owner/name      # When was a repository trending?
+  python main.py query --month 2026-03        # Which repositories ranked #1 in March?
+  python main.py migrate        # Add integer star/fork counts to older day files
         """
     )
     
     parser.add_argument(
         'operation',
-        choices=['fetch', 'analyze', 'full'],
+        choices=['fetch', 'analyze', 'full', 'compact', 'recategorize', 'variants', 'reparse',
+                 'index', 'query', 'migrate'],
         help='Operation to perform'
     )
     
+    parser.add_argument(
+        '--rebuild',
+        action='store_true',
+        help='Rebuild the analyzer state from every data file'
+    )
+    
+    parser.add_argument(
+        '--site-mode',
+        choices=['sharded', 'inline'],
+        default='sharded',
+        help='Write per-date data shards (default) or inline every date into index.html'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of parallel day file workers (default: CPU count), or concurrent requests for variants'
+    )
+    
+    parser.add_argument(
+        '--offline',
+        action='store_true',
+        default=None,
+        help='Replay cached trending pages instead of requesting them'
+    )
+    
+    parser.add_argument(
+        '--capture',
+        action='store_true',
+        default=None,
+        help='Keep this fetch as an intra-day capture (see TRENDING_CAPTURES)'
+    )
+    
+    parser.add_argument(
+        '--start',
+        help='First date (YYYY-MM-DD) to reparse'
+    )
+    
+    parser.add_argument(
+        '--end',
+        help='Last date (YYYY-MM-DD) to reparse'
+    )
+    
+    parser.add_argument(
+        '--repo',
+        help='Repository (owner/name) to query'
+    )
+    
+    parser.add_argument(
+        '--month',
+        help='Month (YYYY-MM) to query the top repositories of'
+    )
+    
+    parser.add_argument(
+        '--rank',
+        type=int,
+        default=1,
+        help='Lowest rank counted by a month query (default: 1)'
+    )
+    
     parser.add_argument(
         '--verbose', '-v',
         action='store_true',
@@ -43,7 +126,7 @@ Examples:
     try:
         if args.operation == 'fetch':
             print("Fetching trending repositories...")
-            repos = fetch_trending_repos()
+            repos = fetch_trending_repos(offline=args.offline, capture=args.capture)
             if repos:
                 print(f"Successfully fetched {len(repos)} repositories")
             else:
@@ -51,20 +134,65 @@ Examples:
                 
         elif args.operation == 'analyze':
             print("Analyzing data and generating webpage...")
-            analyze_and_generate()
+            analyze_and_generate(rebuild=args.rebuild, workers=args.workers, site_mode=args.site_mode)
             print("Analysis complete")
             
         elif args.operation == 'full':
             print("Running full pipeline...")
-            print("1. Fetching trending repositories...")
-            repos = fetch_trending_repos()
+            repos = run_full_pipeline(rebuild=args.rebuild, workers=args.workers, site_mode=args.site_mode,
+                                      offline=args.offline, capture=args.capture)
             if repos:
-                print(f"Successfully fetched {len(repos)} repositories")
-                print("2. Analyzing data and generating webpage...")
-                analyze_and_generate()
                 print("Full pipeline complete")
-            else:
-                print("Failed to fetch repositories, skipping analysis")
+        
+        elif args.operation == 'compact':
+            print("Compacting closed months...")
+            compacted = compact_archive()
+            print(f"Compacted {len(compacted)} month(s)")
+
+        elif args.operation == 'recategorize':
+            print("Recategorizing repositories...")
+            moved = recategorize(get_all_data_files(), workers=args.workers)
+            print(f"Recategorization complete, {len(moved)} repositories moved")
+
+        elif args.operation == 'variants':
+            print("Fetching trending variants...")
+            results = fetch_trending_variants(workers=args.workers, offline=args.offline)
+            if not results:
+                print("No variants fetched")
+
+        elif args.operation == 'reparse':
+            print("Reparsing raw HTML snapshots...")
+            changed = reparse(start=args.start, end=args.end, workers=args.workers)
+            print(f"Reparse complete, {len(changed)} day(s) rewritten")
+
+        elif args.operation == 'index':
+            print("Syncing trending index...")
+            imported, removed = sync_database()
+            print(f"Index up to date ({imported} imported, {removed} removed)")
+
+        elif args.operation == 'query':
+            if not args.repo and not args.month:
+                parser.error('query needs --repo or --month')
+            sync_database()
+            conn = connect()
+            try:
+                if args.repo:
+                    appearances = repo_appearances(conn, args.repo)
+                    print(f"{args.repo}: {len(appearances)} day(s) on trending")
+                    for day, rank, stars, forks in appearances:
+                        print(f"  {day}  #{rank:<3} {stars} stars, {forks} forks")
+                if args.month:
+                    start, end = month_range(args.month)
+                    print(f"Repositories ranked #{args.rank} or better in {args.month}:")
+                    for name, days, best, first in top_ranked(conn, start, end, args.rank):
+                        print(f"  {name}: {days} day(s), best #{best}, first on {first}")
+            finally:
+                conn.close()
+
+        elif args.operation == 'migrate':
+            print("Backfilling star and fork counts...")
+            changed = backfill_counts(workers=args.workers)
+            print(f"Migration complete, {len(changed)} day(s) rewritten")
                 
     except KeyboardInterrupt:
         print("\nOperation cancelled by user")
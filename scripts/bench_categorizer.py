@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Categorizer micro-benchmark
+Compares the compiled keyword matcher and the categorization cache
+against the original per-keyword substring loop on every repository in
+the trending archive
+"""
+
+import os
+import sys
+import timeit
+import argparse
+
+# Add src directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from core.categorizer import TECH_CATEGORIES, LANGUAGE_CATEGORIES, categorize_repo, categorize_repos, get_matcher
+from core.loader import discover_day_files, read_day
+
+def legacy_categorize_repo(repo):
+    """Original implementation: one substring search per keyword"""
+    description = repo.get('description', '').lower()
+    language = repo.get('language', '').lower()
+    for category, keywords in TECH_CATEGORIES.items():
+        for keyword in keywords:
+            if keyword in description or keyword in language:
+                return category
+    return LANGUAGE_CATEGORIES.get(language, 'Other')
+
+def load_repos(data_dir):
+    """Every repository entry of the archive"""
+    return [repo for _, source in discover_day_files(data_dir) for repo in read_day(source)]
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the repository categorizer')
+    parser.add_argument('--data-dir', default='data/trending_data', help='Trending archive to categorize')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    repos = load_repos(args.data_dir)
+    if not repos:
+        print(f"No repositories found in {args.data_dir}")
+        return 1
+    print(f"📊 Categorizing {len(repos)} repository entries with the {get_matcher(False).engine} engine, "
+          f"best of {args.repeat}")
+
+    legacy = [legacy_categorize_repo(repo) for repo in repos]
+    compiled = categorize_repos(repos, word_boundaries=False)
+    mismatches = sum(a != b for a, b in zip(legacy, compiled))
+    print(f"{'✅' if not mismatches else '❌'} Substring mode matches the legacy loop ({mismatches} mismatches)")
+
+    matcher = get_matcher(False)
+    boundary_matcher = get_matcher(True)
+    cases = [
+        ('legacy loop', lambda: [legacy_categorize_repo(repo) for repo in repos]),
+        ('compiled matcher', lambda: [matcher.categorize(repo) for repo in repos]),
+        ('compiled matcher (word boundaries)', lambda: [boundary_matcher.categorize(repo) for repo in repos]),
+        ('categorize_repo (cached)', lambda: [categorize_repo(repo, word_boundaries=False) for repo in repos]),
+        ('categorize_repos (cached batch)', lambda: categorize_repos(repos, word_boundaries=False)),
+    ]
+    baseline = None
+    for label, run in cases:
+        best = min(timeit.repeat(run, number=1, repeat=args.repeat))
+        baseline = baseline or best
+        print(f"  {label:<36} {best * 1000:8.1f} ms  {best / len(repos) * 1e6:6.2f} µs/repo  "
+              f"{baseline / best:5.2f}x")
+
+    moved = sum(a != b for a, b in zip(compiled, categorize_repos(repos, word_boundaries=True)))
+    print(f"Word boundaries change the category of {moved} entries")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
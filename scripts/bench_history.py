@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+History pipeline memory benchmark
+Generates a synthetic multi-year trending archive, runs the analyzer's
+history, categories, statistics and site data stages over it with
+per-stage tracemalloc peaks, and compares the streaming history build
+with materializing every day at once
+"""
+
+import os
+import sys
+import json
+import random
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+from datetime import date, timedelta
+
+# Add src directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from core.analyzer import memory_repo_stats
+from core.category_store import repo_categories
+from core.history import load_history
+from core.loader import discover_day_files, load_days
+from core.site_data import write_site_data
+from core.site_writer import SiteWriter
+from core.stages import StageTimer
+from core.categorizer import TECH_CATEGORIES
+
+WORDS = ('fast', 'agent', 'framework', 'llm', 'rust', 'web', 'database', 'tool', 'open', 'source',
+         'library', 'kubernetes', 'game', 'engine', 'security', 'scanner', 'model', 'api', 'cli', 'ui')
+LANGUAGES = ('Python', 'TypeScript', 'Rust', 'Go', 'JavaScript', 'C++', 'Java', '')
+
+def generate_archive(data_dir, years, per_day, seed=0):
+    """
+    Write a synthetic archive of daily files: most of each day's
+    repositories stay on, the rest are replaced by new or returning ones.
+
+    Returns:
+        int: Number of days written
+    """
+    rng = random.Random(seed)
+    start = date(2026 - years, 1, 1)
+    days = (date(2026, 1, 1) - start).days
+    next_id = 0
+    today = []
+    stars = {}
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        kept = [name for name in today if rng.random() < 0.7]
+        while len(kept) < per_day:
+            if stars and rng.random() < 0.2:
+                name = rng.choice(list(stars))
+            else:
+                name = f"owner{next_id % 5000}/repo{next_id}"
+                next_id += 1
+            if name not in kept:
+                kept.append(name)
+        rng.shuffle(kept)
+        today = kept
+        repos = []
+        for rank, name in enumerate(today, 1):
+            stars[name] = stars.get(name, rng.randint(100, 5000)) + rng.randint(10, 900)
+            repos.append({
+                'rank': rank,
+                'name': name,
+                'link': f"https://github.com/{name}",
+                'description': ' '.join(rng.choice(WORDS) for _ in range(12)),
+                'language': LANGUAGES[sum(map(ord, name)) % len(LANGUAGES)],
+                'stars': f"{stars[name]:,}",
+                'forks': f"{stars[name] // 10:,}"
+            })
+        month_dir = os.path.join(data_dir, str(day.year), f"{day.month:02d}")
+        os.makedirs(month_dir, exist_ok=True)
+        with open(os.path.join(month_dir, f"{day.day:02d}.json"), 'w', encoding='utf-8') as f:
+            json.dump(repos, f, ensure_ascii=False, indent=2)
+    return days
+
+def materialized_peak(data_files, workers):
+    """Peak traced memory of holding every decoded day at once, as the index used to"""
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    days = list(load_days(data_files, workers))
+    peak = tracemalloc.get_traced_memory()[1] - base
+    del days
+    return peak
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the streaming history pipeline on a synthetic archive')
+    parser.add_argument('--years', type=int, default=10, help='Archive length in years')
+    parser.add_argument('--per-day', type=int, default=25, help='Repositories per day')
+    parser.add_argument('--workers', type=int, default=None, help='Day file decoders (default: CPU count)')
+    parser.add_argument('--keep', action='store_true', help='Keep the temporary archive and output')
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='bench_history_')
+    data_dir = os.path.join(root, 'trending_data')
+    try:
+        days = generate_archive(data_dir, args.years, args.per_day)
+        data_files = discover_day_files(data_dir)
+        print(f"📊 Synthetic archive: {days} days x {args.per_day} repositories in {data_dir}")
+
+        timer = StageTimer(trace_memory=True)
+        history = timer.run('history', load_history, data_files, os.path.join(root, 'state.json'),
+                            os.path.join(root, 'history.bin'), True, args.workers)
+        with timer.stage('categories'):
+            history.categories, history.labels = repo_categories(history, os.path.join(root, 'categories.json'))
+        repo_stats = timer.run('statistics', memory_repo_stats, history)
+        writer = SiteWriter(os.path.join(root, 'docs'), os.path.join(root, 'site_manifest.json'))
+        categories = list(TECH_CATEGORIES.keys()) + ['Other']
+        timer.run('site data', write_site_data, history, history.dates, categories, writer)
+        # A later run with an unchanged archive only re-checks the month keys
+        rerun = SiteWriter(os.path.join(root, 'docs'), os.path.join(root, 'site_manifest.json'))
+        rerun.manifest = writer.manifest
+        timer.run('site data rerun', write_site_data, history, history.dates, categories, rerun)
+        print(f"📊 {len(repo_stats)} repositories, {history.store.entry_count} appearances")
+        timer.report()
+
+        materialized = materialized_peak(data_files, args.workers)
+        streamed = timer.peaks['history']
+        print(f"  {'materialized days':<20} peak {materialized / 2**20:8.1f} MiB")
+        bounded = streamed < materialized
+        print(f"{'✅' if bounded else '❌'} Streaming history build peaks at "
+              f"{streamed / materialized:.0%} of the materialized archive")
+        return 0 if bounded else 1
+    finally:
+        if args.keep:
+            print(f"Kept {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Trending page parser micro-benchmark
+Checks every installed parser backend against the original full-page
+BeautifulSoup parse on saved trending pages and reports their timings
+"""
+
+import os
+import sys
+import glob
+import timeit
+import argparse
+
+from bs4 import BeautifulSoup
+
+# Add src directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from core.parser import add_counts, available_backends, parse_trending_html
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'trending_*.html')
+
+def legacy_parse(html):
+    """Original implementation: full html.parser tree, one find() per field"""
+    soup = BeautifulSoup(html, 'html.parser')
+    repos = []
+    for i, article in enumerate(soup.find_all('article', class_='Box-row'), 1):
+        try:
+            repo_link = article.find('h2', class_='h3 lh-condensed').find('a')
+            repo_name = repo_link.get('href').strip('/')
+            description_elem = article.find('p', class_='col-9 color-fg-muted my-1 pr-4')
+            language_elem = article.find('span', {'itemprop': 'programmingLanguage'})
+            stars_elem = article.find('a', href=lambda x: x and 'stargazers' in x)
+            forks_elem = article.find('a', href=lambda x: x and 'forks' in x)
+            repos.append({
+                'rank': i,
+                'name': repo_name,
+                'description': description_elem.get_text(strip=True) if description_elem else '',
+                'language': language_elem.get_text(strip=True) if language_elem else '',
+                'stars': stars_elem.get_text(strip=True) if stars_elem else '0',
+                'forks': forks_elem.get_text(strip=True) if forks_elem else '0',
+                'link': f'https://github.com/{repo_name}'
+            })
+        except Exception as e:
+            print(f"Error parsing repository {i}: {e}")
+    return repos
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the trending page parser')
+    parser.add_argument('pages', nargs='*', help='Saved trending pages (defaults to the bundled fixtures)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions (best is reported)')
+    parser.add_argument('--number', type=int, default=20, help='Parses per repetition')
+    args = parser.parse_args()
+
+    paths = args.pages or sorted(glob.glob(FIXTURES))
+    if not paths:
+        print("No trending pages to parse")
+        return 1
+    pages = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            pages.append(f.read())
+    backends = available_backends()
+    print(f"📊 Parsing {len(pages)} page(s) ({sum(map(len, pages)) // 1024} KB) with "
+          f"{', '.join(backends)}, best of {args.repeat}")
+
+    failures = 0
+    for path, html in zip(paths, pages):
+        # The integer counts were added after the legacy parser
+        expected = [add_counts(repo) for repo in legacy_parse(html)]
+        for backend in backends:
+            if parse_trending_html(html, backend) != expected:
+                failures += 1
+                print(f"❌ {backend} differs from the legacy parse on {os.path.basename(path)}")
+    if not failures:
+        print(f"✅ All backends match the legacy parse")
+
+    cases = [('legacy full-page soup', legacy_parse)]
+    cases += [(backend, lambda html, backend=backend: parse_trending_html(html, backend))
+              for backend in backends]
+    baseline = None
+    for label, parse in cases:
+        best = min(timeit.repeat(lambda: [parse(html) for html in pages],
+                                 number=args.number, repeat=args.repeat)) / args.number
+        baseline = baseline or best
+        print(f"  {label:<24} {best * 1000:8.2f} ms/run  {baseline / best:6.2f}x")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Repository record benchmark
+Enriches every repo-day of the trending archive (streak, longest streak,
+category and labels, as the analyzer does for a day's repositories) once
+as dict copies and once as Repo records, and compares time, traced
+allocations and resident memory of holding the results
+"""
+
+import os
+import sys
+import time
+import resource
+import argparse
+import tracemalloc
+import multiprocessing
+
+# Add src directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from core.loader import discover_day_files, load_days
+from core.repo import Repo
+
+CATEGORIES = ('AI/ML', 'Web Development', 'DevOps', 'Other')
+
+def enrich_dicts(days):
+    """Original shape: a dict copy per repo-day with the added fields"""
+    return [[dict(repo, streak=1, longest_streak=1, category=CATEGORIES[repo['rank'] % 4],
+                  labels=[CATEGORIES[repo['rank'] % 4]])
+             for repo in repos] for repos in days]
+
+def enrich_records(days):
+    """Repo records with the added fields"""
+    return [[Repo.from_dict(repo, streak=1, longest_streak=1, category=CATEGORIES[repo['rank'] % 4],
+                            labels=[CATEGORIES[repo['rank'] % 4]])
+             for repo in repos] for repos in days]
+
+def measure(enrich, days, queue):
+    """Enrich in a forked child; report seconds, traced bytes and blocks, and RSS growth"""
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    enrich(days)
+    seconds = time.perf_counter() - start
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = enrich(days)
+    after = tracemalloc.take_snapshot()
+    stats = after.compare_to(before, 'filename')
+    queue.put((seconds, sum(s.size_diff for s in stats), sum(s.count_diff for s in stats), rss * 1024))
+    del result
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Repo records against repository dicts')
+    parser.add_argument('--data-dir', default='data/trending_data', help='Trending archive to enrich')
+    parser.add_argument('--copies', type=int, default=10, help='Times the archive is enriched over')
+    args = parser.parse_args()
+
+    days = [repos for _, repos in load_days(discover_day_files(args.data_dir))] * args.copies
+    repo_days = sum(len(repos) for repos in days)
+    if not repo_days:
+        print(f"No repositories found in {args.data_dir}")
+        return 1
+    print(f"📊 Enriching {repo_days} repo-days ({args.copies}x the archive)")
+
+    context = multiprocessing.get_context('fork')
+    results = {}
+    for label, enrich in (('dict copies', enrich_dicts), ('Repo records', enrich_records)):
+        queue = context.Queue()
+        child = context.Process(target=measure, args=(enrich, days, queue))
+        child.start()
+        results[label] = queue.get()
+        child.join()
+        seconds, size, blocks, rss = results[label]
+        print(f"  {label:<14} {seconds * 1000:8.1f} ms  {size / 2**20:7.1f} MiB traced  "
+              f"{blocks:9d} blocks  {rss / 2**20:7.1f} MiB RSS")
+
+    dicts, records = results['dict copies'], results['Repo records']
+    same = enrich_records(days[:1])[0] == enrich_dicts(days[:1])[0]
+    print(f"{'✅' if same else '❌'} Records compare equal to the dicts they replace")
+    smaller = records[1] < dicts[1] and records[2] < dicts[2]
+    print(f"{'✅' if smaller else '❌'} Records use {records[1] / dicts[1]:.0%} of the traced memory and "
+          f"{records[2] / dicts[2]:.0%} of the allocations of dict copies")
+    return 0 if same and smaller else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
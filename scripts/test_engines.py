@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Engine parity tests
+Checks that every optional accelerated engine gives the same results as
+its fallback on the trending archive: the Aho-Corasick and regex keyword
+matchers, and the NumPy and pure Python category scoring, streaks and
+star velocity
+"""
+
+import os
+import sys
+import math
+import argparse
+
+# Add src directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from core.categorizer import CategoryMatcher, ahocorasick
+from core.history import RepoHistory
+from core.loader import discover_day_files, load_days
+from core.scoring import np, score_repos
+from core.streaks import compute_streaks
+from core.velocity import UNKNOWN_STARS, compute_velocity
+
+# Texts that exercise keywords nested in one another and word boundaries
+EDGE_TEXTS = [
+    'a react native app',
+    'react-native reanimated',
+    'data analytics notebook for deep learning models',
+    'email api gateway',
+    'os',
+    'kernel driver for the operating system',
+    'ci/cd deployment on aws',
+    ''
+]
+
+# Columns of repositories with gaps, single days and unknown star counts:
+# (ordinals, stars, offsets)
+EDGE_COLUMNS = [
+    ([], [], [0]),
+    ([5], [10], [0, 1]),
+    ([1, 2, 3, 5, 6, 1, 2], [10, 12, UNKNOWN_STARS, 20, 25, 7, 7], [0, 5, 5, 7]),
+    ([3, 4, 5, 6], [1, 2, 3, 4], [0, 2, 4]),
+]
+
+def check(ok, message, failure):
+    """Print a check result; return whether it passed"""
+    print(f"✅ {message}" if ok else f"❌ {failure}")
+    return ok
+
+def archive_repos(data_dir):
+    """Distinct (description, language) repositories of the archive"""
+    unique = {}
+    for _, repos in load_days(discover_day_files(data_dir)):
+        for repo in repos:
+            key = (repo.get('description') or '', repo.get('language') or '')
+            unique.setdefault(key, {'description': key[0], 'language': key[1]})
+    return list(unique.values())
+
+def test_matcher_engines(repos):
+    """Test that the regex matcher finds the same keywords as the automaton"""
+    print("🧪 Testing keyword matcher engines...")
+    if ahocorasick is None:
+        print("⚠️ pyahocorasick is not installed, skipped")
+        return True
+    texts = EDGE_TEXTS + [repo['description'].lower() for repo in repos] + \
+        [repo['language'].lower() for repo in repos]
+    ok = True
+    for word_boundaries in (False, True):
+        automaton = CategoryMatcher(word_boundaries=word_boundaries, engine='ahocorasick')
+        regex = CategoryMatcher(word_boundaries=word_boundaries, engine='re')
+        hits = [text for text in texts if automaton.keyword_hits(text) != regex.keyword_hits(text)]
+        primaries = [repo for repo in repos
+                     if automaton.classify(repo['description'].lower(), repo['language'].lower())
+                     != regex.classify(repo['description'].lower(), repo['language'].lower())]
+        mode = 'whole-word' if word_boundaries else 'substring'
+        ok &= check(not hits, f"Same {mode} keyword hits for {len(texts)} texts",
+                    f"{len(hits)} {mode} texts differ, e.g. {hits[:3]}")
+        ok &= check(not primaries, f"Same {mode} categories for {len(repos)} repositories",
+                    f"{len(primaries)} {mode} categories differ, e.g. {primaries[:3]}")
+    return ok
+
+def test_scoring_engines(repos):
+    """Test that NumPy scoring matches the pure Python scores"""
+    print("🧪 Testing category scoring engines...")
+    if np is None:
+        print("⚠️ NumPy is not installed, skipped")
+        return True
+    vectorized = score_repos(repos, use_numpy=True)
+    python = score_repos(repos, use_numpy=False)
+    differ = [i for i in range(len(repos)) if vectorized.confidences(i) != python.confidences(i)]
+    return check(not differ, f"Same confidences for {len(repos)} repositories",
+                 f"{len(differ)} repositories score differently, e.g. {[repos[i] for i in differ[:3]]}")
+
+def archive_columns(data_dir):
+    """Store columns of the archive plus EDGE_COLUMNS"""
+    store = RepoHistory.build(discover_day_files(data_dir)).store
+    return EDGE_COLUMNS + [(store.ordinals, store.stars, store.offsets)]
+
+def as_ints(column):
+    """Plain list of ints of an array or NumPy column"""
+    return [int(value) for value in column]
+
+def test_streak_engines(columns):
+    """Test that NumPy streaks match the pure Python streaks"""
+    print("🧪 Testing streak engines...")
+    if np is None:
+        print("⚠️ NumPy is not installed, skipped")
+        return True
+    fields = ['entry_streaks', 'current', 'longest', 'run_offsets', 'run_starts', 'run_lengths']
+    differ = []
+    for ordinals, _, offsets in columns:
+        vectorized = compute_streaks(ordinals, offsets, use_numpy=True)
+        python = compute_streaks(ordinals, offsets, use_numpy=False)
+        differ += [field for field in fields
+                   if as_ints(getattr(vectorized, field)) != as_ints(getattr(python, field))]
+    return check(not differ, f"Same streaks for {len(columns)} stores",
+                 f"Streak columns differ: {sorted(set(differ))}")
+
+def test_velocity_engines(columns):
+    """Test that NumPy star velocity matches the pure Python velocity"""
+    print("🧪 Testing star velocity engines...")
+    if np is None:
+        print("⚠️ NumPy is not installed, skipped")
+        return True
+    differ = 0
+    for ordinals, stars, offsets in columns:
+        vectorized = compute_velocity(ordinals, stars, offsets, use_numpy=True)
+        python = compute_velocity(ordinals, stars, offsets, use_numpy=False)
+        differ += len(vectorized) != len(python) or sum(
+            not (a == b or (math.isnan(a) and math.isnan(b))) for a, b in zip(vectorized, python))
+    return check(not differ, f"Same star velocity for {len(columns)} stores",
+                 f"{differ} appearances have a different velocity")
+
+def main():
+    parser = argparse.ArgumentParser(description='Check optional engines against their fallbacks')
+    parser.add_argument('--data-dir', default='data/trending_data', help='Trending archive to check on')
+    args = parser.parse_args()
+
+    print("🚀 Starting Engine Parity Tests\n")
+    repos = archive_repos(args.data_dir)
+    columns = archive_columns(args.data_dir)
+    results = [
+        test_matcher_engines(repos),
+        test_scoring_engines(repos),
+        test_streak_engines(columns),
+        test_velocity_engines(columns),
+    ]
+
+    print(f"\n📊 {sum(results)}/{len(results)} tests passed")
+    return 0 if all(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Test script for the trending fetcher
+Serves the fixture pages from a local stand-in for github.com/trending,
+with injected failures and slow responses, and fetches them through the
+regular and the concurrent variant fetcher, with and without the HTTP
+cache; then reparses raw snapshots into a scratch archive
+"""
+
+import os
+import sys
+import json
+import hashlib
+import time
+import tempfile
+import random
+import threading
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+# Fast retries and a short timeout for the stand-in server
+os.environ.setdefault('TRENDING_FETCH_BACKOFF', '0.01')
+os.environ.setdefault('TRENDING_FETCH_TIMEOUT', '0.5')
+
+# Add src directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from core.fetcher import fetch_trending_repos, fetch_trending_variants, trending_variants, variant_name
+from core.parser import parse_trending_html
+from core.captures import append_capture, capture_path, iter_captures, read_capture
+from core.loader import discover_day_files, read_day
+from core.segments import compact_archive
+from core.snapshots import discover_snapshots, read_snapshot, reparse, save_snapshot
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+class TrendingStandIn(BaseHTTPRequestHandler):
+    """Serves a fixture page for any /trending URL; pages can fail or stall once, and carry an ETag"""
+
+    pages = {}
+    requests = []
+    etags = True
+    not_modified = 0
+    fail_once = set()
+    stall_once = set()
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        with self.lock:
+            self.requests.append(self.path)
+            TrendingStandIn.in_flight += 1
+            TrendingStandIn.max_in_flight = max(self.max_in_flight, self.in_flight)
+            fail = url.path in self.fail_once
+            stall = url.path in self.stall_once
+            self.fail_once.discard(url.path)
+            self.stall_once.discard(url.path)
+        try:
+            time.sleep(0.05)
+            if stall:
+                time.sleep(1.0)
+            if fail:
+                self.send_response(503)
+                self.end_headers()
+                return
+            since = parse_qs(url.query).get('since', ['daily'])[0]
+            body = self.pages['monthly' if since == 'monthly' else 'daily'].encode('utf-8')
+            etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+            if self.etags and self.headers.get('If-None-Match') == etag:
+                TrendingStandIn.not_modified += 1
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            if self.etags:
+                self.send_header('ETag', etag)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with self.lock:
+                TrendingStandIn.in_flight -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server():
+    """Start the stand-in server on a free local port"""
+    for name, filename in (('daily', 'trending_daily.html'), ('monthly', 'trending_2025-11-03.html')):
+        with open(os.path.join(FIXTURES_DIR, filename), encoding='utf-8') as f:
+            TrendingStandIn.pages[name] = f.read()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), TrendingStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/trending'
+
+def read_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def test_fetch_trending_repos(base_url, data_dir, raw_dir):
+    """Test the daily fetch, retrying a failed response and keeping a snapshot"""
+    print("🧪 Testing fetch_trending_repos...")
+    TrendingStandIn.fail_once.add('/trending')
+    repos = fetch_trending_repos(base_url=base_url, data_dir=data_dir, raw_dir=raw_dir, cache_dir=None)
+    expected = parse_trending_html(TrendingStandIn.pages['daily'])
+
+    saved = [os.path.join(root, name) for root, _, files in os.walk(data_dir) for name in files]
+    if repos == expected and len(saved) == 1 and read_json(saved[0]) == expected:
+        print(f"✅ Fetched and saved {len(repos)} repositories after a 503")
+    else:
+        print("❌ Daily fetch did not return or save the fixture repositories")
+        return False
+
+    snapshots = discover_snapshots(raw_dir)
+    if len(snapshots) == 1 and read_snapshot(snapshots[0][1]) == TrendingStandIn.pages['daily']:
+        print(f"✅ Raw page kept as {os.path.relpath(snapshots[0][1], raw_dir)}")
+        return True
+    print("❌ Raw page snapshot missing or different")
+    return False
+
+def test_fetch_trending_variants(base_url, data_dir):
+    """Test concurrent variant fetching with retries, timeouts and bounded concurrency"""
+    print("🧪 Testing fetch_trending_variants...")
+    variants = trending_variants(['', 'python', 'c++'], ['daily', 'weekly', 'monthly'], ['', 'zh'])
+    TrendingStandIn.fail_once.add('/trending/python')
+    TrendingStandIn.stall_once.add('/trending/c%2B%2B')
+    TrendingStandIn.max_in_flight = 0
+    del TrendingStandIn.requests[:]
+
+    results = fetch_trending_variants(variants, base_url=base_url, data_dir=data_dir, workers=3, cache_dir=None)
+    ok = True
+
+    if len(results) == len(variants) == 18:
+        print(f"✅ Fetched all {len(variants)} variants")
+    else:
+        print(f"❌ Fetched {len(results)} of {len(variants)} variants")
+        ok = False
+
+    namespaces = sorted(os.listdir(data_dir))
+    if namespaces == sorted(variant_name(variant) for variant in variants) and 'c++-monthly-zh' in namespaces:
+        print(f"✅ Saved one namespace per variant ({namespaces[0]}, ..., {namespaces[-1]})")
+    else:
+        print(f"❌ Unexpected namespaces: {namespaces}")
+        ok = False
+
+    monthly = parse_trending_html(TrendingStandIn.pages['monthly'])
+    if results.get('python-monthly-zh') == monthly and results.get('all-daily') != monthly:
+        print("✅ Variant pages parsed from their own responses")
+    else:
+        print("❌ Variant results do not match the served pages")
+        ok = False
+
+    if '/trending/python?since=weekly&spoken_language_code=zh' in TrendingStandIn.requests:
+        print("✅ Language, period and spoken language sent in the request")
+    else:
+        print("❌ Variant request URLs are wrong")
+        ok = False
+
+    retried = len(TrendingStandIn.requests) - len(variants)
+    if retried == 2:
+        print("✅ Retried the failed and the timed out request")
+    else:
+        print(f"❌ Expected 2 retried requests, got {retried}")
+        ok = False
+
+    if 1 < TrendingStandIn.max_in_flight <= 3:
+        print(f"✅ Ran up to {TrendingStandIn.max_in_flight} requests concurrently (limit 3)")
+    else:
+        print(f"❌ {TrendingStandIn.max_in_flight} concurrent requests with a limit of 3")
+        ok = False
+    return ok
+
+def test_http_cache(base_url, tmp):
+    """Test conditional requests, the content hash short-circuit and offline replay"""
+    print("🧪 Testing the HTTP cache...")
+    data_dir, raw_dir, cache_dir = (os.path.join(tmp, name) for name in ('data', 'raw', 'http'))
+    fetch = lambda **kwargs: fetch_trending_repos(base_url=base_url, data_dir=data_dir, raw_dir=raw_dir,
+                                                  cache_dir=cache_dir, **kwargs)
+    expected = parse_trending_html(TrendingStandIn.pages['daily'])
+    ok = True
+
+    if fetch() != expected:
+        print("❌ First fetch through the cache failed")
+        return False
+    day_file = [os.path.join(root, name) for root, _, files in os.walk(data_dir) for name in files][0]
+    mtime = os.stat(day_file).st_mtime_ns
+
+    if fetch() == expected and TrendingStandIn.not_modified == 1 and os.stat(day_file).st_mtime_ns == mtime:
+        print("✅ 304 response reused the saved day without rewriting it")
+    else:
+        print("❌ Conditional request did not short-circuit")
+        ok = False
+
+    TrendingStandIn.etags = False
+    try:
+        if fetch() == expected and os.stat(day_file).st_mtime_ns == mtime:
+            print("✅ Unchanged page without validators detected by its content hash")
+        else:
+            print("❌ Unchanged page was parsed and saved again")
+            ok = False
+    finally:
+        TrendingStandIn.etags = True
+
+    os.remove(day_file)
+    requested = len(TrendingStandIn.requests)
+    if fetch(offline=True) == expected and len(TrendingStandIn.requests) == requested and os.path.exists(day_file):
+        print("✅ Offline mode replayed the cached page without a request")
+    else:
+        print("❌ Offline replay failed")
+        ok = False
+
+    if fetch_trending_repos(base_url=base_url + '/rust', data_dir=data_dir, cache_dir=cache_dir, offline=True) == []:
+        print("✅ Offline mode fails for pages that are not cached")
+    else:
+        print("❌ Offline mode returned an uncached page")
+        ok = False
+    return ok
+
+def hourly_captures(repos, hours=24, seed=7):
+    """Synthetic captures of a day: ranks shuffle, counts grow, repositories come and go"""
+    rng = random.Random(seed)
+    pool = [dict(repo, name=f"{repo['name']}-next", link=f"{repo['link']}-next") for repo in repos]
+    captures = []
+    current = [dict(repo) for repo in repos]
+    for hour in range(hours):
+        if hour:
+            current = [dict(repo) for repo in current]
+            for repo in rng.sample(current, len(current) // 3):
+                repo['stars'] = f"{int(repo['stars'].replace(',', '')) + rng.randint(1, 40):,}"
+            if hour % 6 == 0 and pool:
+                current[rng.randrange(len(current))] = pool.pop()
+            rng.shuffle(current)
+            for rank, repo in enumerate(current, 1):
+                repo['rank'] = rank
+        captures.append((datetime(2026, 6, 1, hour), current))
+    return captures
+
+def test_captures(base_url, tmp):
+    """Test delta-encoded intra-day captures and the daily view derived from them"""
+    print("🧪 Testing intra-day captures...")
+    captures_dir = os.path.join(tmp, 'captures')
+    captures = hourly_captures(parse_trending_html(TrendingStandIn.pages['daily']))
+    for day, repos in captures:
+        append_capture(repos, day, captures_dir)
+    path = capture_path('2026-06-01', captures_dir)
+    ok = True
+
+    replayed = list(iter_captures(path))
+    if [repos for _, repos in replayed] == [repos for _, repos in captures] and \
+            read_capture(path, 5) == replayed[5] and read_capture(path, -2) == replayed[-2]:
+        print(f"✅ All {len(captures)} captures reconstructed exactly")
+    else:
+        print("❌ Reconstructed captures differ")
+        ok = False
+
+    full_size = sum(len(json.dumps(repos, ensure_ascii=False, separators=(',', ':'))) for _, repos in captures)
+    size = os.path.getsize(path)
+    if size < full_size / 2:
+        print(f"✅ Deltas take {size // 1024} KB instead of {full_size // 1024} KB of full copies")
+    else:
+        print(f"❌ Captures take {size} bytes, full copies {full_size}")
+        ok = False
+
+    data_dir = os.path.join(tmp, 'data')
+    for _ in range(2):
+        fetch_trending_repos(base_url=base_url, data_dir=data_dir, raw_dir=None,
+                             cache_dir=os.path.join(tmp, 'http'), capture=True, captures_dir=captures_dir)
+    today = [os.path.join(root, name) for root, _, files in os.walk(data_dir) for name in files][0]
+    path = capture_path(datetime.now(), captures_dir)
+    times = [time for time, _ in iter_captures(path)]
+    if len(times) == 2 and read_capture(path)[1] == read_json(today):
+        print("✅ Each fetch appended a capture; the day file is the last capture")
+    else:
+        print(f"❌ {len(times)} captures, day file matches last: {read_capture(path)[1] == read_json(today)}")
+        ok = False
+    return ok
+
+def test_reparse(data_dir, raw_dir):
+    """Test reparsing snapshots into loose and packed days, rewriting only changed ones"""
+    print("🧪 Testing reparse...")
+    page = TrendingStandIn.pages['monthly']
+    repos = parse_trending_html(page)
+    broken = [dict(repo, description='') for repo in repos]
+    days = {'2026-05-30': repos, '2026-05-31': broken, '2026-06-01': repos, '2026-06-02': broken}
+    for date_str, day_repos in days.items():
+        path = os.path.join(data_dir, *date_str.split('-')) + '.json'
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(day_repos, f, ensure_ascii=False, indent=2)
+        save_snapshot(page, datetime.strptime(date_str, '%Y-%m-%d'), raw_dir)
+    save_snapshot(page, datetime(2026, 6, 3), raw_dir)
+    compact_archive(data_dir, before='2026-06')
+    ok = True
+
+    changed = reparse(start='2026-05-31', workers=1, raw_dir=raw_dir, data_dir=data_dir)
+    if changed == ['2026-05-31', '2026-06-02', '2026-06-03']:
+        print("✅ Rewrote the broken and the missing days only")
+    else:
+        print(f"❌ Unexpected rewritten days: {changed}")
+        ok = False
+
+    sources = dict(discover_day_files(data_dir))
+    if all(read_day(source) == repos for source in sources.values()) and len(sources) == 5:
+        print("✅ Every day matches the current parser")
+    else:
+        print("❌ Reparsed days differ from the snapshots")
+        ok = False
+
+    if sources['2026-05-31'].endswith('#31') and not os.path.exists(os.path.join(data_dir, '2026', '05')):
+        print("✅ Packed month repacked with the reparsed day")
+    else:
+        print(f"❌ Packed day left as {sources['2026-05-31']}")
+        ok = False
+
+    if reparse(raw_dir=raw_dir, data_dir=data_dir, workers=1) == []:
+        print("✅ Second reparse rewrites nothing")
+    else:
+        print("❌ Second reparse rewrote days")
+        ok = False
+    return ok
+
+def main():
+    """Run all fetcher tests"""
+    print("🚀 Starting Fetcher Tests\n")
+    server, base_url = start_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            results = [
+                test_fetch_trending_repos(base_url, os.path.join(tmp, 'trending_data'), os.path.join(tmp, 'raw_html')),
+                test_fetch_trending_variants(base_url, os.path.join(tmp, 'trending_variants')),
+                test_http_cache(base_url, os.path.join(tmp, 'cached')),
+                test_captures(base_url, os.path.join(tmp, 'captured')),
+                test_reparse(os.path.join(tmp, 'reparse_data'), os.path.join(tmp, 'reparse_raw')),
+            ]
+    finally:
+        server.shutdown()
+
+    print(f"\n📊 {sum(results)}/{len(results)} tests passed")
+    return 0 if all(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
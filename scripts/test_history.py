@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Incremental history tests
+Checks on a copy of the trending archive that the incremental analyzer
+state matches a full rebuild, survives a checkout resetting mtimes and
+the compaction of a month, and that segments round-trip every day and
+reject a damaged index
+"""
+
+import io
+import os
+import sys
+import json
+import math
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+# Add src directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from core.history import RepoHistory, load_history
+from core.loader import discover_day_files, read_day
+from core.segments import SEGMENT_SUFFIX, compact_month, read_index, write_segment
+
+# Days left out of the first build, then ingested incrementally
+NEW_DAYS = 30
+
+def check(ok, message, failure):
+    """Print a check result; return whether it passed"""
+    print(f"✅ {message}" if ok else f"❌ {failure}")
+    return ok
+
+def quiet(func, *args):
+    """Call func without its progress output; return (result, output)"""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = func(*args)
+    return result, output.getvalue()
+
+def snapshot(history):
+    """Everything the analyzer reads from a history index, as plain values"""
+    store = history.store
+    table = store.streak_table
+    columns = [store.offsets, store.ordinals, store.ranks, store.stars, table.current, table.longest,
+               table.run_starts, table.run_lengths]
+    return {
+        'dates': list(history.dates),
+        'names': list(store.names),
+        'columns': [[int(value) for value in column] for column in columns],
+        'velocity': [None if math.isnan(value) else value for value in store.velocity],
+        'info': {name: info.to_dict() for name, info in history.info.items()},
+        'files': {date_str: (fp['size'], fp['sha1']) for date_str, fp in history._fingerprints.items()}
+    }
+
+class Archive:
+    """Copy of the trending archive with its own analyzer state"""
+
+    def __init__(self, data_dir, root):
+        self.data_dir = os.path.join(root, 'trending_data')
+        self.state_file = os.path.join(root, 'cache', 'analyzer_state.json')
+        self.store_file = os.path.join(root, 'cache', 'history.bin')
+        shutil.copytree(data_dir, self.data_dir)
+
+    def load(self, data_files=None, rebuild=False):
+        """Load the history; return (history, whether the state was kept)"""
+        data_files = data_files or discover_day_files(self.data_dir)
+        history, output = quiet(load_history, data_files, self.state_file, self.store_file, rebuild, 1)
+        return history, 'Loaded analyzer state' in output
+
+def test_incremental(archive, expected):
+    """Test that ingesting new days gives the same index as a rebuild"""
+    print("🧪 Testing incremental ingest...")
+    data_files = discover_day_files(archive.data_dir)
+    archive.load(data_files[:-NEW_DAYS], rebuild=True)
+    history, kept = archive.load(data_files)
+    ok = check(kept, f"Kept the state to ingest {NEW_DAYS} new days", "Rebuilt instead of ingesting new days")
+    ok &= check(snapshot(history) == expected, "Incremental index matches a rebuild",
+                "Incremental index differs from a rebuild")
+    return ok
+
+def test_checkout(archive, expected):
+    """Test that new mtimes on unchanged files keep the state"""
+    print("🧪 Testing a checkout that resets mtimes...")
+    for date_str, source in discover_day_files(archive.data_dir):
+        os.utime(source.partition('#')[0], (0, 0))
+    history, kept = archive.load()
+    ok = check(kept, "Kept the state after a checkout", "Rebuilt after a checkout")
+    ok &= check(snapshot(history) == expected, "Index unchanged after a checkout",
+                "Index changed after a checkout")
+    return ok
+
+def test_compaction(archive, expected):
+    """Test that packing a month keeps its days and the state"""
+    print("🧪 Testing compaction...")
+    data_files = discover_day_files(archive.data_dir)
+    before = {date_str: read_day(source) for date_str, source in data_files}
+    month = data_files[0][0][:7]
+    quiet(compact_month, os.path.join(archive.data_dir, month[:4]), month[5:])
+
+    data_files = discover_day_files(archive.data_dir)
+    packed = [date_str for date_str, source in data_files if '#' in source]
+    ok = check(packed and all(date_str.startswith(month) for date_str in packed),
+               f"Packed {len(packed)} days of {month}", f"Packed days {packed[:3]} outside {month}")
+    ok &= check({date_str: read_day(source) for date_str, source in data_files} == before,
+                "Every day reads back unchanged", "Days changed by compaction")
+    history, kept = archive.load()
+    ok &= check(kept, "Kept the state after compaction", "Rebuilt after compaction")
+    ok &= check(snapshot(history) == expected, "Index unchanged after compaction",
+                "Index changed after compaction")
+    return ok
+
+def rejects(segment_path):
+    """Whether reading a segment's index raises ValueError"""
+    try:
+        read_index(segment_path)
+    except ValueError:
+        return True
+    return False
+
+def test_segments(root):
+    """Test segment round-trips and rejection of damaged indexes"""
+    print("🧪 Testing segment indexes...")
+    year_dir = os.path.join(root, 'segments', '2020')
+    os.makedirs(year_dir)
+    segment_path = os.path.join(year_dir, '01' + SEGMENT_SUFFIX)
+    days = {f"{day:02d}": [{'name': f"owner/repo-{day}", 'rank': day}] for day in range(1, 6)}
+    write_segment(segment_path, days)
+    read = {date_str[-2:]: read_day(source) for date_str, source in discover_day_files(os.path.dirname(year_dir))}
+    ok = check(read == days, f"Read back {len(days)} days of a segment", "Segment days differ")
+
+    with open(segment_path, 'rb') as f:
+        content = f.read()
+    footer_start = content.rindex(b'\n', 0, len(content) - 1) + 1
+    footer = json.loads(content[footer_start:])
+
+    # An index pointing into the wrong bytes must not be trusted
+    footer['days']['03'][0] += 1
+    with open(segment_path, 'wb') as f:
+        f.write(content[:footer_start] + json.dumps(footer).encode('utf-8') + b'\n')
+    ok &= check(rejects(segment_path), "Rejected a mismatched index", "Read a segment through a mismatched index")
+
+    with open(segment_path, 'wb') as f:
+        f.write(content[:footer_start])
+    ok &= check(rejects(segment_path), "Rejected a segment without its footer", "Read a segment without its footer")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the incremental analyzer state against rebuilds')
+    parser.add_argument('--data-dir', default='data/trending_data', help='Trending archive to copy')
+    args = parser.parse_args()
+
+    print("🚀 Starting Incremental History Tests\n")
+    root = tempfile.mkdtemp(prefix='test_history_')
+    try:
+        archive = Archive(args.data_dir, root)
+        expected = snapshot(RepoHistory.build(discover_day_files(archive.data_dir), 1))
+        results = [
+            test_incremental(archive, expected),
+            test_checkout(archive, expected),
+            test_compaction(archive, expected),
+            test_segments(root),
+        ]
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print(f"\n📊 {sum(results)}/{len(results)} tests passed")
+    return 0 if all(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,6 @@ Core functionality for Github Trending History.
 
 from .fetcher import fetch_trending_repos
 from .analyzer import analyze_and_generate
-from .categorizer import categorize_repo, TECH_CATEGORIES
+from .categorizer import categorize_repo, categorize_repos, TECH_CATEGORIES
 
-__all__ = ['fetch_trending_repos', 'analyze_and_generate', 'categorize_repo', 'TECH_CATEGORIES'] 
\ No newline at end of file
+__all__ = ['fetch_trending_repos', 'analyze_and_generate', 'categorize_repo', 'categorize_repos', 'TECH_CATEGORIES'] 
\ No newline at end of file
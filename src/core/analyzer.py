@@ -3,214 +3,221 @@ Data analysis and webpage generation for Github Trending History.
 """
 
 import os
-import json
-import shutil
 from collections import defaultdict, OrderedDict
-from datetime import datetime
+from datetime import datetime, date
+from concurrent.futures import ThreadPoolExecutor
 from jinja2 import Environment, FileSystemLoader
 
-from .categorizer import categorize_repo, TECH_CATEGORIES
+from .categorizer import save_category_cache, TECH_CATEGORIES
+from .category_store import repo_categories
+from .database import USE_DATABASE, connect, repo_aggregates, sync_database
+from .history import load_history
+from .loader import discover_day_files
+from .site_data import write_site_data, iter_inline_data
+from .site_writer import SiteWriter
+from .stages import StageTimer
+from .streaks import compute_streaks
 
 DATA_DIR = 'data/trending_data'
 OUTPUT_DIR = 'docs'
 TEMPLATE_DIR = 'src/web/templates'
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, 'index.html')
+STATIC_DIR = 'src/web/static'
+SITE_MODES = ('sharded', 'inline')
 
 def get_all_data_files():
     """Get all data file paths"""
-    data_files = []
-    for year in os.listdir(DATA_DIR):
-        year_path = os.path.join(DATA_DIR, year)
-        if os.path.isdir(year_path):
-            for month in os.listdir(year_path):
-                month_path = os.path.join(year_path, month)
-                if os.path.isdir(month_path):
-                    for day_file in os.listdir(month_path):
-                        if day_file.endswith('.json'):
-                            day = day_file[:-5]  # Remove .json
-                            date_str = f"{year}-{month}-{day}"
-                            file_path = os.path.join(month_path, day_file)
-                            data_files.append((date_str, file_path))
-    return sorted(data_files, key=lambda x: x[0])
+    return discover_day_files(DATA_DIR)
 
 def calc_streak(history_dates):
     """Calculate consecutive days on trending"""
     if not history_dates:
         return 0
-    streak = 1
-    for i in range(len(history_dates)-2, -1, -1):
-        d1 = datetime.strptime(history_dates[i+1], '%Y-%m-%d')
-        d0 = datetime.strptime(history_dates[i], '%Y-%m-%d')
-        if (d1 - d0).days == 1:
-            streak += 1
-        else:
-            break
-    return streak
+    ordinals = [date.fromisoformat(d).toordinal() for d in history_dates]
+    return int(compute_streaks(ordinals, [0, len(ordinals)]).current[0])
 
 def get_repos_by_date(target_date):
     """Get trending data for specific date"""
-    # First, build repo history to calculate streaks
-    data_files = get_all_data_files()
-    repo_history = defaultdict(lambda: {'info': None, 'history': []})
-    
-    for date_str, file_path in data_files:
-        with open(file_path, encoding='utf-8') as f:
-            day_repos = json.load(f)
-        for repo in day_repos:
-            name = repo['name']
-            if not repo_history[name]['info']:
-                repo_history[name]['info'] = repo
-            repo_history[name]['history'].append((date_str, repo['rank']))
-    
-    # Now get the specific date data
-    for date_str, file_path in data_files:
-        if date_str == target_date:
-            with open(file_path, encoding='utf-8') as f:
-                day_repos = json.load(f)
-            
-            # Add consecutive days and category for each repo
-            for repo in day_repos:
-                name = repo['name']
-                
-                # Calculate streak up to target date
-                if name in repo_history:
-                    history = sorted(repo_history[name]['history'], key=lambda x: x[0])
-                    # Only calculate consecutive days up to target date
-                    target_date_obj = datetime.strptime(target_date, '%Y-%m-%d')
-                    filtered_history = [(d, r) for d, r in history if datetime.strptime(d, '%Y-%m-%d') <= target_date_obj]
-                    dates_only = [d for d, _ in filtered_history]
-                    streak = calc_streak(dates_only)
-                    repo['streak'] = streak
-                else:
-                    repo['streak'] = 1  # First time on trending
-                
-                # Add category
-                repo['category'] = categorize_repo(repo)
-            
-            return day_repos
-    return []
-
-def analyze_and_generate():
+    return build_history().get_repos_by_date(target_date)
+
+def build_history(rebuild=False, workers=None, preloaded=None):
     """
-    Main function to analyze trending data and generate the webpage.
+    Build the shared repo history index from all data files.
+
+    Args:
+        rebuild (bool): Ignore the persisted analyzer state and re-read
+            every day file
+        workers (int): Number of parallel day file decoders
+        preloaded (dict): Date -> repositories of days already in memory,
+            such as the day just fetched
+
+    Returns:
+        RepoHistory: History index covering every data file, with the
+            stored category of every repository
     """
-    # 1. Read all trending data, sorted by date
-    data_files = get_all_data_files()
-    dates = [date for date, _ in data_files]
-
-    # 2. Build repo history data structure
-    repo_history = defaultdict(lambda: {'info': None, 'history': []})
-
-    for date_str, file_path in data_files:
-        with open(file_path, encoding='utf-8') as f:
-            day_repos = json.load(f)
-        for repo in day_repos:
-            name = repo['name']
-            if not repo_history[name]['info']:
-                repo_history[name]['info'] = repo
-            repo_history[name]['history'].append((date_str, repo['rank']))
-
-    # 3. Get today's data
-    today = datetime.now().strftime('%Y-%m-%d')
-    today_repos = []
-    if dates and dates[-1] == today:
-        # If we have today's data
-        today_file_path = data_files[-1][1]
-        with open(today_file_path, encoding='utf-8') as f:
-            today_repos = json.load(f)
-        
-        # Add consecutive days and category for each repo today
-        for repo in today_repos:
-            name = repo['name']
-            if name in repo_history:
-                history = sorted(repo_history[name]['history'], key=lambda x: x[0])
-                dates_only = [d for d, _ in history]
-                streak = calc_streak(dates_only)
-                repo['streak'] = streak
-            else:
-                repo['streak'] = 1  # First time on trending
-            
-            # Add category
-            repo['category'] = categorize_repo(repo)
-
-    # 4. Generate statistics for all repos (for historical view)
+    history = load_history(get_all_data_files(), rebuild=rebuild, workers=workers, preloaded=preloaded)
+    history.categories, history.labels = repo_categories(history)
+    return history
+
+def memory_repo_stats(history):
+    """Per-repository statistics from the in-memory history index, in first-seen order"""
     repo_stats = []
-    for name, data in repo_history.items():
-        history = sorted(data['history'], key=lambda x: x[0])
-        dates_only = [d for d, _ in history]
-        streak = calc_streak(dates_only)
-        repo_info = data['info'].copy()
-        repo_info['category'] = categorize_repo(repo_info)
+    for name in history.names():
+        repo_info = history.info[name]
+        repo_history = history.history_of(name)
         repo_stats.append({
             'name': name,
             'link': repo_info['link'],
             'description': repo_info['description'],
             'language': repo_info.get('language', ''),
-            'category': repo_info['category'],
-            'streak': streak,
-            'history': history,
-            'total_days': len(history)
+            'category': history.categories[name],
+            'labels': history.label_names(name, history.categories[name]),
+            'streak': history.current_streak(name),
+            'longest_streak': history.longest_streak(name),
+            'history': repo_history,
+            'total_days': len(repo_history),
+            'star_velocity': history.star_velocity(name)
         })
+    return repo_stats
 
-    # Sort by streak and latest rank
-    def latest_rank(repo):
-        return repo['history'][-1][1] if repo['history'] else 999
-    repo_stats.sort(key=lambda r: (-r['streak'], latest_rank(r)))
-
-    # 5. Generate category statistics
-    category_stats = defaultdict(lambda: {'count': 0, 'repos': []})
+def database_repo_stats(history):
+    """
+    Per-repository statistics computed in SQL by the trending index, which
+    is synced with the data files first. Categories and star velocities
+    still come from the history index.
+    """
+    sync_database(get_all_data_files())
+    conn = connect()
+    try:
+        repo_stats = repo_aggregates(conn)
+    finally:
+        conn.close()
     for repo in repo_stats:
-        category = repo['category']
-        category_stats[category]['count'] += 1
-        category_stats[category]['repos'].append(repo)
-
-    # 6. Render webpage
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-    # Copy static files to output directory
-    static_dir = 'src/web/static'
-    if os.path.exists(static_dir):
-        static_output_dir = os.path.join(OUTPUT_DIR, 'static')
-        if os.path.exists(static_output_dir):
-            shutil.rmtree(static_output_dir)
-        shutil.copytree(static_dir, static_output_dir)
-        print(f'Copied static files to {static_output_dir}')
+        del repo['latest_rank']
+        repo['category'] = history.categories[repo['name']]
+        repo['labels'] = history.label_names(repo['name'], repo['category'])
+        repo['star_velocity'] = history.star_velocity(repo['name'])
+    return repo_stats
+
+def send_subscription_emails(today_repos, category_stats):
+    """Send today's subscription emails, if the subscription module is available"""
+    try:
+        from ..subscription.manager import send_daily_subscriptions
+        send_daily_subscriptions(today_repos, category_stats)
+        print('Subscription emails sent')
+    except ImportError:
+        print('Subscription module not available, skipping email sending')
+    except Exception as e:
+        print(f'Error sending subscription emails: {e}')
+
+def analyze_and_generate(rebuild=False, workers=None, site_mode='sharded', preloaded=None, timer=None):
+    """
+    Main function to analyze trending data and generate the webpage.
+
+    The output stages (static files, data shards, main page, unsubscribe
+    page and subscription emails) are independent of each other and run
+    concurrently.
+
+    Args:
+        rebuild (bool): Rebuild the history index from scratch instead of
+            folding new day files into the persisted analyzer state
+        workers (int): Number of parallel day file decoders
+        site_mode (str): 'sharded' writes a repo table and month shards that
+            the page loads on demand; 'inline' embeds them in index.html
+        preloaded (dict): Date -> repositories of days already in memory,
+            ingested without re-reading their files
+        timer (StageTimer): Collects stage timings; by default a new one
+            is created and reported at the end
+    """
+    if site_mode not in SITE_MODES:
+        raise ValueError(f"Unknown site mode: {site_mode}")
+    report = timer is None
+    timer = timer or StageTimer()
+
+    # 1. Load the shared history index, ingesting only new day files
+    history = timer.run('history', build_history, rebuild, workers, preloaded)
+    dates = history.dates
+
+    with timer.stage('statistics'):
+        # 2. Get today's data
+        today = datetime.now().strftime('%Y-%m-%d')
+        today_repos = []
+        if dates and dates[-1] == today:
+            # If we have today's data, with consecutive days and category added
+            today_repos = history.get_repos_by_date(today)
+
+        # 3. Generate statistics for all repos (for historical view)
+        repo_stats = database_repo_stats(history) if USE_DATABASE else memory_repo_stats(history)
+
+        # Sort by streak and latest rank
+        def latest_rank(repo):
+            return repo['history'][-1][1] if repo['history'] else 999
+        repo_stats.sort(key=lambda r: (-r['streak'], latest_rank(r)))
+
+        # 4. Generate category statistics
+        category_stats = defaultdict(lambda: {'count': 0, 'repos': []})
+        for repo in repo_stats:
+            # A repository counts towards its primary and secondary categories
+            for category in repo['labels']:
+                category_stats[category]['count'] += 1
+                category_stats[category]['repos'].append(repo)
+
+    # 5. Render webpage, rewriting only outputs whose content changed
+    writer = SiteWriter(OUTPUT_DIR)
+    categories = list(TECH_CATEGORIES.keys()) + ['Other']
+    site_data = None
+    if site_mode == 'inline':
+        site_data = iter_inline_data(history, dates, categories)
+        # The page no longer loads shards from a previous sharded run
+        writer.remove_tree('data')
 
     env = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
 
     # Generate main page
-    tmpl = env.get_template('index.html.j2')
-    html = tmpl.render(
-        today_repos=today_repos,
-        all_repos=repo_stats,
-        category_stats=dict(category_stats),
-        categories=list(TECH_CATEGORIES.keys()) + ['Other'],
-        dates=dates,
-        today=today,
-        get_repos_by_date=get_repos_by_date
-    )
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        f.write(html)
-    print(f'Generated {OUTPUT_FILE}')
+    def render_index():
+        tmpl = env.get_template('index.html.j2')
+        writer.render(
+            tmpl,
+            'index.html',
+            site_mode=site_mode,
+            today_repos=[repo.to_dict() for repo in today_repos],
+            all_repos=repo_stats,
+            category_stats=dict(category_stats),
+            category_summary={category: {'count': stats['count']} for category, stats in category_stats.items()},
+            categories=categories,
+            dates=dates,
+            today=today,
+            site_data=site_data
+        )
 
     # Generate unsubscribe page
-    unsubscribe_tmpl = env.get_template('unsubscribe.html.j2')
-    unsubscribe_html = unsubscribe_tmpl.render(email='')
-    unsubscribe_file = os.path.join(OUTPUT_DIR, 'unsubscribe.html')
-    with open(unsubscribe_file, 'w', encoding='utf-8') as f:
-        f.write(unsubscribe_html)
-    print(f'Generated {unsubscribe_file}')
-
-    # 7. Send subscription emails
+    def render_unsubscribe():
+        unsubscribe_tmpl = env.get_template('unsubscribe.html.j2')
+        writer.render(unsubscribe_tmpl, 'unsubscribe.html', email='')
+
+    # The output stages touch disjoint files, so they run side by side;
+    # 6. subscription emails go out while the site renders
+    stages = [('render index', render_index), ('render unsubscribe', render_unsubscribe)]
+    if site_mode == 'sharded':
+        stages.append(('site data', lambda: write_site_data(history, dates, categories, writer)))
+    if os.path.exists(STATIC_DIR):
+        # Sync static files to the output directory
+        stages.append(('static sync', lambda: writer.sync_tree(STATIC_DIR, 'static')))
     if today_repos:
-        try:
-            from ..subscription.manager import send_daily_subscriptions
-            send_daily_subscriptions(today_repos, dict(category_stats))
-            print('Subscription emails sent')
-        except ImportError:
-            print('Subscription module not available, skipping email sending')
-        except Exception as e:
-            print(f'Error sending subscription emails: {e}')
+        stages.append(('emails', lambda: send_subscription_emails(today_repos, dict(category_stats))))
+
+    with ThreadPoolExecutor(max_workers=len(stages)) as pool:
+        futures = [pool.submit(timer.run, name, stage) for name, stage in stages]
+        for future in futures:
+            future.result()
+
+    writer.save()
+
+    # Only repositories new to the stored assignments were categorized
+    save_category_cache()
+
+    if report:
+        timer.report()
 
 if __name__ == "__main__":
     analyze_and_generate() 
\ No newline at end of file
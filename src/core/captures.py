@@ -0,0 +1,157 @@
+"""
+Intra-day trending captures for Github Trending History.
+
+In capture mode every fetch of the day is kept, not only the last one.
+Captures are appended to data/trending_captures/YYYY/MM/DD.jsonl, one
+line each: the day's first capture holds the full repository list, and
+every later one only the delta against the capture before it (entered
+repositories, exited names, and the changed fields, such as rank, stars
+and forks, of the others). A capture is reconstructed by replaying the
+day's deltas, at most one per fetch. The daily file in data/trending_data
+always holds the day's last capture.
+"""
+
+import os
+import json
+from collections import deque
+from datetime import datetime
+
+CAPTURES_DIR = 'data/trending_captures'
+CAPTURE_SUFFIX = '.jsonl'
+
+# Keep every fetch of the day (overridable via environment variable)
+CAPTURE_MODE = os.getenv('TRENDING_CAPTURES', '0') == '1'
+
+def capture_path(day, captures_dir=CAPTURES_DIR):
+    """Path of the captures file of a day (datetime or YYYY-MM-DD)"""
+    if isinstance(day, str):
+        day = datetime.strptime(day, '%Y-%m-%d')
+    return os.path.join(captures_dir, str(day.year), f"{day.month:02d}", f"{day.day:02d}{CAPTURE_SUFFIX}")
+
+def encode_delta(previous, current):
+    """
+    Delta between two captures.
+
+    Args:
+        previous (list): Earlier capture's repositories
+        current (list): Later capture's repositories
+
+    Returns:
+        dict: {'entered': [repo], 'exited': [name], 'changed': {name:
+            {field: value}}}, or None when the captures cannot be
+            delta-encoded (duplicate names or differing fields)
+    """
+    before = {repo['name']: repo for repo in previous}
+    after = {repo['name']: repo for repo in current}
+    if len(before) != len(previous) or len(after) != len(current):
+        return None
+
+    entered = []
+    changed = {}
+    for repo in current:
+        old = before.get(repo['name'])
+        if old is None:
+            entered.append(repo)
+            continue
+        if old.keys() != repo.keys():
+            return None
+        fields = {field: value for field, value in repo.items() if old[field] != value}
+        if fields:
+            changed[repo['name']] = fields
+
+    delta = {
+        'entered': entered,
+        'exited': [name for name in before if name not in after],
+        'changed': changed
+    }
+    # Captures are stored in rank order; keep a full copy if replay would not restore it
+    if apply_delta(previous, delta) != current:
+        return None
+    return delta
+
+def apply_delta(previous, delta):
+    """
+    Reconstruct a capture from the one before it.
+
+    Repositories of the earlier capture are never modified; changed ones
+    are copied.
+
+    Returns:
+        list: Repositories in rank order
+    """
+    exited = set(delta['exited'])
+    changed = delta['changed']
+    repos = [dict(repo, **changed[repo['name']]) if repo['name'] in changed else repo
+             for repo in previous if repo['name'] not in exited]
+    repos.extend(delta['entered'])
+    repos.sort(key=lambda repo: repo['rank'])
+    return repos
+
+def iter_captures(path):
+    """
+    Replay a day's captures.
+
+    Yields:
+        tuple: (time, repos) for every capture, in capture order
+    """
+    repos = []
+    try:
+        f = open(path, encoding='utf-8')
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            capture = json.loads(line)
+            repos = capture['repos'] if 'repos' in capture else apply_delta(repos, capture['delta'])
+            yield capture['time'], repos
+
+def read_capture(path, index=-1):
+    """
+    Reconstruct one capture of a day.
+
+    Args:
+        path (str): Captures file
+        index (int): Capture position; negative counts from the last
+
+    Returns:
+        tuple: (time, repos), or None if there is no such capture
+    """
+    captures = iter_captures(path)
+    if index < 0:
+        last = deque(captures, maxlen=-index)
+        return last[0] if len(last) == -index else None
+    for position, capture in enumerate(captures):
+        if position == index:
+            return capture
+    return None
+
+def append_capture(repos, day=None, captures_dir=CAPTURES_DIR):
+    """
+    Append a capture to its day's file, as a delta against the last one.
+
+    Args:
+        repos (list): Captured repositories in rank order
+        day (datetime): Capture time; defaults to now
+        captures_dir (str): Captures root
+
+    Returns:
+        int: Number of captures of the day
+    """
+    day = day or datetime.now()
+    path = capture_path(day, captures_dir)
+    count = 0
+    previous = None
+    for _, previous in iter_captures(path):
+        count += 1
+
+    capture = {'time': day.isoformat(timespec='seconds')}
+    delta = encode_delta(previous, repos) if previous is not None else None
+    if delta is None:
+        capture['repos'] = repos
+    else:
+        capture['delta'] = delta
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(capture, ensure_ascii=False, separators=(',', ':')) + '\n')
+    return count + 1
@@ -1,7 +1,26 @@
 """
 Repository categorization logic for Github Trending History.
+
+The keywords of every category are compiled into one matcher (an
+Aho-Corasick automaton when pyahocorasick is installed, otherwise a
+regular expression) that scans a repository's text once. The first category in
+TECH_CATEGORIES with a matching keyword wins, as it always has; keywords
+can optionally be required to match whole words, so 'ai' no longer
+matches 'email'.
 """
 
+import os
+import re
+import json
+import hashlib
+
+from .category_cache import CategoryCache
+
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - optional dependency
+    ahocorasick = None
+
 # Technology categories and keywords
 TECH_CATEGORIES = {
     'AI/ML': ['machine learning', 'ai', 'neural', 'tensorflow', 'pytorch', 'llm', 'gpt', 'chatgpt', 'agent', 'model', 'deep learning', 'nlp', 'computer vision'],
@@ -14,35 +33,269 @@ TECH_CATEGORIES = {
     'Learning': ['tutorial', 'course', 'guide', 'documentation', 'book', 'learning', 'education', 'example']
 }
 
-def categorize_repo(repo):
+# Default category for a language when no keyword matches
+LANGUAGE_CATEGORIES = {
+    'python': 'AI/ML',
+    'javascript': 'Web Development',
+    'typescript': 'Web Development',
+    'go': 'System/OS',
+    'rust': 'System/OS',
+    'java': 'Web Development',
+    'c++': 'System/OS',
+    'c': 'System/OS'
+}
+
+# Match keywords on word boundaries only (overridable via environment variable)
+WORD_BOUNDARIES = os.getenv('TRENDING_CATEGORY_WORD_BOUNDARIES', '').lower() in ('1', 'true', 'yes')
+
+def _fingerprint(value):
+    """Short stable hash of a JSON-serializable value"""
+    return hashlib.sha1(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+def _is_word_char(char):
+    """Whether a character is a regex word character"""
+    return char.isalnum() or char == '_'
+
+def _on_boundary(text, index):
+    """Whether a regex word boundary falls right before text[index]"""
+    before = index > 0 and _is_word_char(text[index - 1])
+    after = index < len(text) and _is_word_char(text[index])
+    return before != after
+
+class CategoryMatcher:
+    """
+    Compiled keyword matcher for a category table.
+
+    Every keyword is compiled into one automaton (pyahocorasick, when
+    installed) or one lookahead regex, so a single scan reports every
+    keyword occurrence in the text. Both engines report the same
+    occurrences: the regex finds the highest-priority keyword at each
+    position, and the keywords nested in it or around it (e.g. 'react'
+    and 'react native') are checked there as well. The lowest category index among them
+    wins, which keeps first-category-wins semantics without a scan per
+    keyword.
+    """
+
+    def __init__(self, categories=None, word_boundaries=False, language_categories=None, engine=None):
+        """
+        Args:
+            categories (dict): Category name -> keywords, in priority order;
+                defaults to TECH_CATEGORIES
+            word_boundaries (bool): Only match keywords as whole words
+            language_categories (dict): Fallback category per lowercased
+                language; defaults to LANGUAGE_CATEGORIES
+            engine (str): 'ahocorasick' or 're'; defaults to pyahocorasick
+                when it is installed
+        """
+        categories = TECH_CATEGORIES if categories is None else categories
+        self.categories = list(categories)
+        self.word_boundaries = word_boundaries
+        self.language_categories = LANGUAGE_CATEGORIES if language_categories is None else language_categories
+
+        # A result at priority k only depends on the rules of categories
+        # 0..k; fingerprint each prefix so a cached result survives edits
+        # to lower-priority categories
+        rules = [[name, list(keywords)] for name, keywords in categories.items()]
+        self.rules_fingerprint = _fingerprint([word_boundaries, rules, self.language_categories])
+        self.fingerprints = [_fingerprint([word_boundaries, rules[:depth + 1]])
+                             for depth in range(len(rules))]
+        self._fallback_fingerprints = {}
+        self.keyword_priority = {}
+        for priority, keywords in enumerate(categories.values()):
+            for keyword in keywords:
+                self.keyword_priority.setdefault(keyword.lower(), priority)
+        self.keywords = list(self.keyword_priority)
+        self.keyword_ids = {keyword: i for i, keyword in enumerate(self.keywords)}
+
+        self.automaton = None
+        self.pattern = None
+        if engine is None:
+            engine = 'ahocorasick' if ahocorasick is not None else 're'
+        if engine == 'ahocorasick' and self.keyword_priority:
+            self.engine = 'ahocorasick'
+            self.automaton = ahocorasick.Automaton()
+            for keyword, priority in self.keyword_priority.items():
+                self.automaton.add_word(keyword, (priority, len(keyword), self.keyword_ids[keyword]))
+            self.automaton.make_automaton()
+        else:
+            # Branches in priority order: at each position the first
+            # matching branch is the best keyword starting there
+            self.engine = 're'
+            branches = '|'.join(re.escape(keyword) for keyword in
+                                sorted(self.keyword_priority, key=self.keyword_priority.get))
+            if word_boundaries:
+                branches = rf'\b(?:{branches})\b'
+            self.pattern = re.compile(f'(?=({branches}))') if self.keyword_priority else None
+            # Keywords that can match at the same position as another:
+            # one is a prefix of the other
+            self.nested = {keyword: [other for other in self.keywords
+                                     if other != keyword and (other.startswith(keyword) or keyword.startswith(other))]
+                           for keyword in self.keywords}
+
+    def _occurrences(self, text):
+        """Yield (category priority, keyword id) for every keyword occurrence in text"""
+        if self.automaton is not None:
+            for end, (priority, length, keyword_id) in self.automaton.iter(text):
+                if self.word_boundaries and not (_on_boundary(text, end + 1 - length)
+                                                 and _on_boundary(text, end + 1)):
+                    continue
+                yield priority, keyword_id
+        elif self.pattern is not None:
+            for found in self.pattern.finditer(text):
+                keyword = found.group(1)
+                yield self.keyword_priority[keyword], self.keyword_ids[keyword]
+                start = found.start()
+                for other in self.nested[keyword]:
+                    # The start boundary already held for the reported keyword
+                    if text.startswith(other, start) and (not self.word_boundaries
+                                                          or _on_boundary(text, start + len(other))):
+                        yield self.keyword_priority[other], self.keyword_ids[other]
+
+    def keyword_hits(self, text):
+        """
+        Find which keywords occur in a lowercased text.
+
+        Returns:
+            set: Ids (indexes into self.keywords) of every matching keyword
+        """
+        return {keyword_id for _, keyword_id in self._occurrences(text)}
+
+    def match_priority(self, description, language):
+        """
+        Find the best keyword match of a description and language.
+
+        Args:
+            description (str): Lowercased description
+            language (str): Lowercased language
+
+        Returns:
+            int: Index of the matched category, or None if no keyword matches
+        """
+        best = None
+        # Keywords never contain a newline, so joining cannot create a match
+        for priority, _ in self._occurrences(f'{description}\n{language}'):
+            if best is None or priority < best:
+                best = priority
+                if best == 0:
+                    break
+        return best
+
+    def match(self, description, language):
+        """Category matched by keyword, or None; see match_priority()"""
+        best = self.match_priority(description, language)
+        return None if best is None else self.categories[best]
+
+    def classify(self, description, language):
+        """
+        Categorize a lowercased description and language.
+
+        Returns:
+            tuple: (category, depth) where depth is the index of the
+                matched category, or the category count when the
+                language fallback was used
+        """
+        best = self.match_priority(description, language)
+        if best is None:
+            return self.language_categories.get(language, 'Other'), len(self.categories)
+        return self.categories[best], best
+
+    def stamp(self, depth, language):
+        """
+        Fingerprint of the rules a classify() result depends on.
+
+        Args:
+            depth (int): Depth returned by classify()
+            language (str): Lowercased language
+
+        Returns:
+            str: Fingerprint of categories 0..depth, or of every category
+                plus the language's fallback for a fallback result
+        """
+        if depth < len(self.categories):
+            return self.fingerprints[depth]
+        stamp = self._fallback_fingerprints.get(language)
+        if stamp is None:
+            stamp = self._fallback_fingerprints[language] = _fingerprint(
+                [self.fingerprints[-1] if self.fingerprints else '', language,
+                 self.language_categories.get(language, 'Other')])
+        return stamp
+
+    def categorize(self, repo):
+        """Categorize one repository, see categorize_repo()"""
+        description = repo.get('description', '').lower()
+        language = repo.get('language', '').lower()
+        return self.classify(description, language)[0]
+
+_matchers = {}
+
+def get_matcher(word_boundaries=None):
+    """
+    Get the shared matcher for TECH_CATEGORIES.
+
+    Args:
+        word_boundaries (bool): Match whole words only; defaults to the
+            TRENDING_CATEGORY_WORD_BOUNDARIES setting
+
+    Returns:
+        CategoryMatcher: Matcher compiled on first use
+    """
+    if word_boundaries is None:
+        word_boundaries = WORD_BOUNDARIES
+    matcher = _matchers.get(word_boundaries)
+    if matcher is None:
+        matcher = _matchers[word_boundaries] = CategoryMatcher(TECH_CATEGORIES, word_boundaries)
+    return matcher
+
+_cache = None
+
+def get_category_cache():
+    """Get the shared categorization cache, loading it on first use"""
+    global _cache
+    if _cache is None:
+        _cache = CategoryCache().load()
+    return _cache
+
+def save_category_cache():
+    """Persist the shared categorization cache and report its use, if it was used"""
+    if _cache is None or not (_cache.hits or _cache.misses):
+        return
+    _cache.save()
+    print(f'Categorized repositories: {_cache.hits} cached, {_cache.misses} computed')
+
+def categorize_repo(repo, word_boundaries=None):
     """
     Categorize repository based on description and language.
     
     Args:
         repo (dict): Repository information containing 'description' and 'language' fields
+        word_boundaries (bool): Match keywords as whole words only; defaults
+            to the TRENDING_CATEGORY_WORD_BOUNDARIES setting
         
     Returns:
         str: Category name
     """
-    description = repo.get('description', '').lower()
-    language = repo.get('language', '').lower()
-    
-    # Check each category
-    for category, keywords in TECH_CATEGORIES.items():
-        for keyword in keywords:
-            if keyword in description or keyword in language:
-                return category
-    
-    # Default category based on language
-    language_categories = {
-        'python': 'AI/ML',
-        'javascript': 'Web Development', 
-        'typescript': 'Web Development',
-        'go': 'System/OS',
-        'rust': 'System/OS',
-        'java': 'Web Development',
-        'c++': 'System/OS',
-        'c': 'System/OS'
-    }
-    
-    return language_categories.get(language, 'Other') 
\ No newline at end of file
+    return get_category_cache().categorize(repo, get_matcher(word_boundaries))
+
+def categorize_repos(repos, word_boundaries=None):
+    """
+    Categorize a batch of repositories with one compiled matcher.
+
+    Args:
+        repos (iterable): Repository dicts, see categorize_repo()
+        word_boundaries (bool): Match keywords as whole words only
+
+    Returns:
+        list: Category name of each repository, in order
+    """
+    matcher = get_matcher(word_boundaries)
+    cache = get_category_cache()
+    # Repositories trend for many days with the same text; look it up once
+    seen = {}
+    categories = []
+    for repo in repos:
+        key = (repo.get('description', ''), repo.get('language', ''))
+        category = seen.get(key)
+        if category is None:
+            category = seen[key] = cache.categorize(repo, matcher)
+        categories.append(category)
+    return categories
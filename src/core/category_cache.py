@@ -0,0 +1,113 @@
+"""
+Persistent categorization cache for Github Trending History.
+
+Repositories trend for many days with the same description and language,
+and every run categorizes the whole archive again. Results are memoized
+in a bounded LRU keyed by a hash of the (lowercased) description and
+language. Each entry is stamped with the fingerprint of the category
+rules it depends on (see CategoryMatcher.stamp()), so editing a keyword
+list only invalidates entries that matched at or below that category.
+The cache is persisted to data/cache/categories.json between runs.
+"""
+
+import os
+import json
+import hashlib
+from collections import OrderedDict
+
+CATEGORY_CACHE_FILE = 'data/cache/categories.json'
+CATEGORY_CACHE_VERSION = 1
+
+# Most entries kept in memory and on disk (overridable via environment variable)
+CATEGORY_CACHE_SIZE = int(os.getenv('TRENDING_CATEGORY_CACHE_SIZE', '65536'))
+
+def text_key(description, language, word_boundaries=False):
+    """
+    Cache key of a lowercased description and language.
+
+    Returns:
+        str: Hex digest identifying the text and matching mode
+    """
+    text = f"{int(bool(word_boundaries))}\n{description}\n{language}"
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=12).hexdigest()
+
+class CategoryCache:
+    """
+    Bounded LRU of categorization results with an on-disk form.
+
+    Entries are [category, depth, stamp] lists: depth is the matched
+    category index (or the category count for the language fallback) and
+    stamp the matcher's fingerprint of the rules up to that depth.
+    """
+
+    def __init__(self, path=CATEGORY_CACHE_FILE, max_size=CATEGORY_CACHE_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.entries)
+
+    def load(self):
+        """Read persisted entries; a missing or foreign file leaves the cache empty"""
+        if not self.path:
+            return self
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return self
+        if data.get('version') != CATEGORY_CACHE_VERSION:
+            return self
+        # Entries are stored least recently used first
+        for key, entry in list(data.get('entries', {}).items())[-self.max_size:]:
+            self.entries[key] = entry
+        return self
+
+    def save(self):
+        """Persist the cache if it changed, replacing the file atomically"""
+        if not self.path or not self.dirty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CATEGORY_CACHE_VERSION, 'entries': self.entries},
+                      f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def categorize(self, repo, matcher):
+        """
+        Categorize a repository, reusing a cached result when its rules
+        are unchanged.
+
+        Args:
+            repo (dict): Repository with 'description' and 'language'
+            matcher (CategoryMatcher): Matcher for the current rules
+
+        Returns:
+            str: Category name
+        """
+        description = repo.get('description', '').lower()
+        language = repo.get('language', '').lower()
+        key = text_key(description, language, matcher.word_boundaries)
+
+        entry = self.entries.get(key)
+        if entry is not None and entry[2] == matcher.stamp(entry[1], language):
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        category, depth = matcher.classify(description, language)
+        self.entries[key] = [category, depth, matcher.stamp(depth, language)]
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        self.misses += 1
+        self.dirty = True
+        return category
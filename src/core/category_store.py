@@ -0,0 +1,213 @@
+"""
+Stored category assignments for Github Trending History.
+
+Every repository gets one category, computed from its first-seen
+description and language and stored in data/categories.json together with
+the fingerprint of the rules that produced it. Repositories that also
+score high for other categories get weighted labels (see scoring.py),
+stored alongside. The analyzer reads these assignments instead of
+categorizing in its hot loops, and only appends repositories it has not
+seen before. After an edit to TECH_CATEGORIES or the scoring rules,
+`python main.py recategorize` backfills the whole archive in a process
+pool, bumps the revision and reports which repositories moved between
+categories; the analyzer never relabels stored repositories itself.
+"""
+
+import os
+import json
+from datetime import datetime
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+from .categorizer import categorize_repos, get_matcher
+from .scoring import label_repos, scoring_fingerprint
+from .loader import LOAD_WORKERS, MIN_PARALLEL_FILES, read_day
+
+CATEGORIES_FILE = 'data/categories.json'
+CATEGORIES_VERSION = 1
+
+# Moved repositories listed individually in the recategorize report
+MAX_REPORTED_MOVES = 50
+
+def load_assignments(path=CATEGORIES_FILE):
+    """
+    Load stored category assignments.
+
+    Returns:
+        dict: {'version', 'revision', 'rules', 'scoring', 'word_boundaries',
+            'updated', 'repos': {name: category}, 'labels': {name: labels}},
+            or None if missing or unreadable
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            assignments = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if assignments.get('version') != CATEGORIES_VERSION:
+        return None
+    return assignments
+
+def save_assignments(assignments, path=CATEGORIES_FILE):
+    """
+    Write category assignments, replacing the file atomically.
+
+    Mappings are written one repository per line, which keeps the file
+    compact and its git diffs readable.
+    """
+    def dumps(value):
+        return json.dumps(value, ensure_ascii=False)
+
+    fields = []
+    for key, value in assignments.items():
+        if isinstance(value, dict) and value:
+            rows = ',\n'.join(f'    {dumps(name)}: {dumps(item)}' for name, item in value.items())
+            fields.append(f'  {dumps(key)}: {{\n{rows}\n  }}')
+        else:
+            fields.append(f'  {dumps(key)}: {dumps(value)}')
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write('{\n' + ',\n'.join(fields) + '\n}\n')
+    os.replace(tmp_path, path)
+
+def _new_assignments(repos, labels, matcher, revision):
+    """Assignments document for {name: category} and {name: labels} mappings"""
+    return {
+        'version': CATEGORIES_VERSION,
+        'revision': revision,
+        'rules': matcher.rules_fingerprint,
+        'scoring': scoring_fingerprint(word_boundaries=matcher.word_boundaries),
+        'word_boundaries': matcher.word_boundaries,
+        'updated': datetime.now().strftime('%Y-%m-%d'),
+        'repos': repos,
+        'labels': labels
+    }
+
+def _label(history, names, categories, word_boundaries=None):
+    """Labels of repositories from their first-seen info"""
+    return dict(zip(names, label_repos([history.info[name] for name in names],
+                                       [categories[name] for name in names], word_boundaries=word_boundaries)))
+
+def _categorize_day(source, word_boundaries=None):
+    """Categorize and label every repository of one day source (pool worker)"""
+    repos = read_day(source)
+    categories = categorize_repos(repos, word_boundaries)
+    labels = label_repos(repos, categories, word_boundaries=word_boundaries)
+    return [(repo['name'], category, repo_labels) for repo, category, repo_labels in zip(repos, categories, labels)]
+
+def recategorize(data_files, workers=None, path=CATEGORIES_FILE, word_boundaries=None):
+    """
+    Recompute and store the category of every repository in the archive.
+
+    Day files are categorized in a process pool; each repository keeps the
+    category of its first appearance, as in the analyzer's repo stats.
+
+    Args:
+        data_files (list): (date_str, source) tuples sorted by date
+        workers (int): Pool size; defaults to TRENDING_LOAD_WORKERS, then
+            the CPU count. 1 categorizes in this process
+        path (str): Assignments file
+        word_boundaries (bool): Match keywords as whole words only
+
+    Returns:
+        list: (name, old category, new category) for every repository
+            whose stored category changed
+    """
+    matcher = get_matcher(word_boundaries)
+    workers = workers or LOAD_WORKERS or os.cpu_count() or 1
+    categorize = partial(_categorize_day, word_boundaries=matcher.word_boundaries)
+    sources = [source for _, source in data_files]
+
+    if workers == 1 or len(sources) < MIN_PARALLEL_FILES:
+        results = map(categorize, sources)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(categorize, sources, chunksize=max(1, len(sources) // (workers * 4)))
+
+    repos = {}
+    labels = {}
+    try:
+        for day in results:
+            for name, category, repo_labels in day:
+                if name not in repos:
+                    repos[name] = category
+                    labels[name] = repo_labels
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    previous = load_assignments(path)
+    old_repos = previous['repos'] if previous else {}
+    moved = [(name, old_repos[name], category) for name, category in repos.items()
+             if name in old_repos and old_repos[name] != category]
+    added = sum(1 for name in repos if name not in old_repos)
+
+    assignments = _new_assignments(repos, labels, matcher, 0)
+    unchanged = (previous and not moved and not added and len(repos) == len(old_repos)
+                 and previous['rules'] == matcher.rules_fingerprint
+                 and previous.get('labels') == assignments['labels'])
+    revision = previous['revision'] if unchanged else (previous['revision'] + 1 if previous else 1)
+    assignments['revision'] = revision
+    save_assignments(assignments, path)
+
+    print(f"Recategorized {len(repos)} repositories from {len(sources)} day(s), revision {revision}")
+    print(f"{len(moved)} moved, {added} new, {len(repos) - len(moved) - added} unchanged, "
+          f"{sum(len(repo_labels) > 1 for repo_labels in labels.values())} with secondary labels")
+    for name, old, new in moved[:MAX_REPORTED_MOVES]:
+        print(f"  {name}: {old} -> {new}")
+    if len(moved) > MAX_REPORTED_MOVES:
+        print(f"  ... and {len(moved) - MAX_REPORTED_MOVES} more")
+    return moved
+
+def repo_categories(history, path=CATEGORIES_FILE, word_boundaries=None):
+    """
+    Get the category and labels of every repository in the history index.
+
+    Stored assignments are used when they were produced by the current
+    rules; repositories added since are categorized from their first-seen
+    info and appended to the file. Without a file one is created. When the
+    category or scoring rules changed, the file is left for `recategorize`
+    to update: changed categories are computed in memory, while stored
+    labels are kept and only new repositories are labelled.
+
+    Args:
+        history (RepoHistory): Shared history index
+        path (str): Assignments file
+        word_boundaries (bool): Match keywords as whole words only
+
+    Returns:
+        tuple: ({name: category}, {name: labels}) where labels are
+            [category, confidence] pairs, primary first; see
+            scoring.label_repos()
+    """
+    matcher = get_matcher(word_boundaries)
+    word_boundaries = matcher.word_boundaries
+    assignments = load_assignments(path)
+    names = history.names()
+
+    if assignments is not None and assignments['rules'] != matcher.rules_fingerprint:
+        print("Category rules changed since the stored assignments; "
+              "run 'python main.py recategorize' to update them")
+        categories = dict(zip(names, categorize_repos((history.info[name] for name in names), word_boundaries)))
+        return categories, _label(history, names, categories, word_boundaries)
+
+    categories = assignments['repos'] if assignments else {}
+    missing = [name for name in names if name not in categories]
+    categories.update(zip(missing, categorize_repos((history.info[name] for name in missing), word_boundaries)))
+    labels = assignments.get('labels', {}) if assignments else {}
+    unlabelled = [name for name in names if name not in labels]
+    labels.update(_label(history, unlabelled, categories, word_boundaries))
+
+    if assignments and assignments.get('scoring') != scoring_fingerprint(word_boundaries=word_boundaries):
+        print("Scoring rules changed since the stored labels; "
+              "run 'python main.py recategorize' to update them")
+        return categories, labels
+
+    if missing or unlabelled:
+        revision = assignments['revision'] if assignments else 1
+        save_assignments(_new_assignments(categories, labels, matcher, revision), path)
+    return categories, labels
@@ -0,0 +1,272 @@
+"""
+SQLite index of the trending archive for Github Trending History.
+
+The JSON tree in data/trending_data stays the source of truth (it is what
+git tracks); data/cache/trending.db is an index derived from it:
+
+- repos: one row per repository, with its first-seen description,
+  language and link
+- snapshots: one row per imported day, with the fingerprint of its source
+- entries: one row per repository per day (rank, stars and forks as
+  displayed and as integers, ...), indexed on (repo, date) and (date, rank)
+
+sync_database() brings the index up to date incrementally: only days whose
+source changed are re-imported. With TRENDING_DB=1 the fetcher also writes
+each new day straight into the index, and the analyzer computes its
+per-repository statistics (appearances, streaks, latest ranks) in SQL.
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+
+from .loader import discover_day_files, fingerprint_source, read_day, read_source, source_digest, source_mtime
+from .loader import DATA_DIR, _fingerprint
+from .parser import get_count
+
+DATABASE_FILE = os.getenv('TRENDING_DB_FILE', 'data/cache/trending.db')
+SCHEMA_VERSION = 2
+
+# Keep the index current on every fetch and analyze (overridable via environment variable)
+USE_DATABASE = os.getenv('TRENDING_DB', '0') == '1'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS repos (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    description TEXT NOT NULL DEFAULT '',
+    language TEXT NOT NULL DEFAULT '',
+    link TEXT NOT NULL DEFAULT '',
+    first_date TEXT,
+    first_rank INTEGER
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    date TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    mtime INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha1 TEXT NOT NULL,
+    repo_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    date TEXT NOT NULL REFERENCES snapshots(date) ON DELETE CASCADE,
+    repo_id INTEGER NOT NULL REFERENCES repos(id),
+    rank INTEGER NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    language TEXT NOT NULL DEFAULT '',
+    stars TEXT NOT NULL DEFAULT '0',
+    forks TEXT NOT NULL DEFAULT '0',
+    stars_count INTEGER,
+    forks_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS entries_repo_date ON entries (repo_id, date);
+CREATE INDEX IF NOT EXISTS entries_date_rank ON entries (date, rank);
+"""
+
+def connect(path=DATABASE_FILE):
+    """
+    Open the index, creating its schema if needed. An index written by
+    another schema version is discarded and recreated.
+
+    Returns:
+        sqlite3.Connection: Connection with foreign keys enabled
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path)
+    if conn.execute('PRAGMA user_version').fetchone()[0] not in (0, SCHEMA_VERSION):
+        conn.close()
+        # Drop the write-ahead log with the database, or it would be replayed into the new one
+        for stale in (path, path + '-wal', path + '-shm'):
+            if os.path.exists(stale):
+                os.remove(stale)
+        conn = sqlite3.connect(path)
+    conn.execute('PRAGMA foreign_keys = ON')
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.executescript(SCHEMA)
+    conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    return conn
+
+def _import_day(conn, date_str, repos, fingerprint):
+    """Replace one day's snapshot and entries (inside the caller's transaction)"""
+    conn.execute('DELETE FROM snapshots WHERE date = ?', (date_str,))
+    conn.execute('INSERT INTO snapshots (date, source, mtime, size, sha1, repo_count) VALUES (?, ?, ?, ?, ?, ?)',
+                 (date_str, fingerprint['path'], fingerprint['mtime'], fingerprint['size'],
+                  fingerprint['sha1'], len(repos)))
+    conn.executemany('INSERT OR IGNORE INTO repos (name, link) VALUES (?, ?)',
+                     ((repo['name'], repo.get('link', '')) for repo in repos))
+    conn.executemany(
+        'INSERT INTO entries (date, repo_id, rank, description, language, stars, forks, stars_count, forks_count) '
+        'SELECT ?, id, ?, ?, ?, ?, ?, ?, ? FROM repos WHERE name = ?',
+        ((date_str, repo['rank'], repo.get('description', ''), repo.get('language', ''),
+          repo.get('stars', '0'), repo.get('forks', '0'), get_count(repo, 'stars'), get_count(repo, 'forks'), repo['name'])
+         for repo in repos)
+    )
+
+def _refresh_first_seen(conn):
+    """Recompute each repository's first-seen description and language; drop repositories no day refers to"""
+    conn.execute('DELETE FROM repos WHERE id NOT IN (SELECT DISTINCT repo_id FROM entries)')
+    conn.execute("""
+        UPDATE repos SET (description, language, first_date, first_rank) = (
+            SELECT e.description, e.language, e.date, e.rank FROM entries e
+            WHERE e.repo_id = repos.id ORDER BY e.date, e.rank LIMIT 1
+        )
+    """)
+
+def store_day(date_str, repos, source, path=DATABASE_FILE):
+    """
+    Write one day into the index in a single transaction.
+
+    Args:
+        date_str (str): Date in YYYY-MM-DD format
+        repos (list): The day's repositories, as saved to source
+        source (str): Day file the repositories were saved to
+        path (str): Index file
+    """
+    fingerprint = fingerprint_source(source)
+    conn = connect(path)
+    try:
+        with conn:
+            _import_day(conn, date_str, repos, fingerprint)
+            _refresh_first_seen(conn)
+    finally:
+        conn.close()
+
+def sync_database(data_files=None, path=DATABASE_FILE):
+    """
+    Bring the index up to date with the JSON tree.
+
+    New days and days whose content changed are imported. A day at its
+    recorded source and mtime is unchanged; otherwise its size and SHA-1
+    are compared (from the segment index for packed days, so checkouts and
+    compaction do not re-import the archive); days no longer in the tree are removed. All
+    changes are applied in one transaction.
+
+    Args:
+        data_files (list): (date_str, source) tuples; defaults to every
+            day under data/trending_data
+        path (str): Index file
+
+    Returns:
+        tuple: (imported days, removed days)
+    """
+    data_files = discover_day_files(DATA_DIR) if data_files is None else data_files
+    conn = connect(path)
+    try:
+        known = {row[0]: row[1:] for row in conn.execute('SELECT date, source, mtime, size, sha1 FROM snapshots')}
+        imported = 0
+        with conn:
+            for date_str, source in data_files:
+                stored = known.pop(date_str, None)
+                mtime = source_mtime(source)
+                if stored is not None and stored[0] == source and stored[1] == mtime:
+                    continue
+                if stored is not None and stored[2:] == source_digest(source):
+                    conn.execute('UPDATE snapshots SET source = ?, mtime = ? WHERE date = ?', (source, mtime, date_str))
+                    continue
+                raw = read_source(source)
+                _import_day(conn, date_str, read_day(source), _fingerprint(source, mtime, raw))
+                imported += 1
+            conn.executemany('DELETE FROM snapshots WHERE date = ?', ((date_str,) for date_str in known))
+            if imported or known:
+                _refresh_first_seen(conn)
+        if imported or known:
+            print(f"Trending index: {imported} day(s) imported, {len(known)} removed ({path})")
+        return imported, len(known)
+    finally:
+        conn.close()
+
+# Runs of consecutive days per repository (gaps and islands): an
+# appearance starts a new run unless it is the day after the previous one,
+# and the running count of run starts numbers the runs
+_RUNS = """
+    WITH starts AS (
+        SELECT repo_id, date, rank,
+               COALESCE(julianday(date) - julianday(LAG(date) OVER appearances) != 1, 1) AS starts_run
+        FROM entries
+        WINDOW appearances AS (PARTITION BY repo_id ORDER BY date, rank)
+    ),
+    numbered AS (
+        SELECT repo_id, SUM(starts_run) OVER (PARTITION BY repo_id ORDER BY date, rank
+                                              ROWS UNBOUNDED PRECEDING) AS run
+        FROM starts
+    ),
+    runs AS (
+        SELECT repo_id, run, COUNT(*) AS length FROM numbered GROUP BY repo_id, run
+    )
+"""
+
+def repo_aggregates(conn):
+    """
+    Per-repository statistics computed in SQL.
+
+    Returns:
+        list: Dicts with 'name', 'description', 'language', 'link',
+            'total_days', 'streak' (ending at the latest appearance),
+            'longest_streak', 'latest_rank' and 'history' ((date, rank)
+            tuples in date order), in first-seen order
+    """
+    histories = {}
+    for repo_id, date_str, rank in conn.execute('SELECT repo_id, date, rank FROM entries ORDER BY repo_id, date, rank'):
+        histories.setdefault(repo_id, []).append((date_str, rank))
+
+    rows = conn.execute(_RUNS + """
+        SELECT r.id, r.name, r.description, r.language, r.link,
+               (SELECT COUNT(*) FROM entries e WHERE e.repo_id = r.id),
+               (SELECT length FROM runs WHERE runs.repo_id = r.id ORDER BY run DESC LIMIT 1),
+               (SELECT MAX(length) FROM runs WHERE runs.repo_id = r.id)
+        FROM repos r ORDER BY r.first_date, r.first_rank
+    """)
+    stats = []
+    for repo_id, name, description, language, link, total_days, streak, longest in rows:
+        history = histories.get(repo_id, [])
+        stats.append({
+            'name': name,
+            'description': description,
+            'language': language,
+            'link': link,
+            'total_days': total_days,
+            'streak': streak,
+            'longest_streak': longest,
+            'latest_rank': history[-1][1] if history else None,
+            'history': history
+        })
+    return stats
+
+def repo_appearances(conn, name):
+    """
+    Every day a repository was trending.
+
+    Returns:
+        list: (date, rank, stars, forks) tuples in date order
+    """
+    return conn.execute("""
+        SELECT e.date, e.rank, e.stars, e.forks FROM entries e JOIN repos r ON r.id = e.repo_id
+        WHERE r.name = ? ORDER BY e.date, e.rank
+    """, (name,)).fetchall()
+
+def top_ranked(conn, start, end, max_rank=1):
+    """
+    Repositories that reached the top ranks in a date range.
+
+    Args:
+        start (str): First date (YYYY-MM-DD), inclusive
+        end (str): Last date (YYYY-MM-DD), inclusive
+        max_rank (int): Lowest rank counted
+
+    Returns:
+        list: (name, days at rank <= max_rank, best rank, first date)
+            tuples, most days first
+    """
+    return conn.execute("""
+        SELECT r.name, COUNT(*), MIN(e.rank), MIN(e.date) FROM entries e JOIN repos r ON r.id = e.repo_id
+        WHERE e.date BETWEEN ? AND ? AND e.rank <= ?
+        GROUP BY r.id ORDER BY COUNT(*) DESC, MIN(e.rank), MIN(e.date)
+    """, (start, end, max_rank)).fetchall()
+
+def month_range(month):
+    """First and last date of a YYYY-MM month"""
+    first = datetime.strptime(month, '%Y-%m')
+    following = datetime(first.year + first.month // 12, first.month % 12 + 1, 1)
+    return first.strftime('%Y-%m-%d'), datetime.fromordinal(following.toordinal() - 1).strftime('%Y-%m-%d')
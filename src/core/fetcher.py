@@ -1,99 +1,296 @@
 """
 Data fetching functionality for Github Trending History.
+
+Besides the default daily page, trending variants (per programming
+language, per period and per spoken language) can be fetched
+concurrently. All requests share one pooled requests.Session, run with a
+timeout, are retried with jittered exponential backoff and go through
+the conditional-request cache in http_cache.py. Each variant is stored
+in its own namespace under data/trending_variants, laid out like
+data/trending_data.
 """
 
 import requests
 import json
 import os
+import time
+import random
+import itertools
 from datetime import datetime
-from bs4 import BeautifulSoup
+from functools import partial
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+from .database import USE_DATABASE, store_day
+from .captures import CAPTURE_MODE, CAPTURES_DIR, append_capture, capture_path, read_capture
+from .http_cache import HTTP_CACHE_DIR, HttpCache
+from .parser import parse_trending_html
+from .repo import to_records
+from .snapshots import RAW_HTML_DIR, save_snapshot
 
 DATA_DIR = 'data/trending_data'
+VARIANTS_DIR = 'data/trending_variants'
+
+TRENDING_URL = 'https://github.com/trending'
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Fetch configuration (overridable via environment variables)
+FETCH_WORKERS = int(os.getenv('TRENDING_FETCH_WORKERS', '4'))
+FETCH_TIMEOUT = float(os.getenv('TRENDING_FETCH_TIMEOUT', '20'))
+FETCH_RETRIES = int(os.getenv('TRENDING_FETCH_RETRIES', '3'))
+FETCH_BACKOFF = float(os.getenv('TRENDING_FETCH_BACKOFF', '1.0'))
+
+# Variants fetched by fetch_trending_variants() (comma-separated; an empty
+# language or spoken language means all)
+VARIANT_LANGUAGES = os.getenv('TRENDING_VARIANT_LANGUAGES', ',python,javascript,typescript,go,rust')
+VARIANT_PERIODS = os.getenv('TRENDING_VARIANT_PERIODS', 'daily,weekly,monthly')
+VARIANT_SPOKEN_LANGUAGES = os.getenv('TRENDING_VARIANT_SPOKEN_LANGUAGES', '')
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def create_session(pool_size=FETCH_WORKERS):
+    """
+    Create an HTTP session whose connection pool fits pool_size
+    concurrent requests.
+
+    Returns:
+        requests.Session: Session with the fetcher's headers
+    """
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def request_page(session, url, params=None, headers=None, timeout=None, retries=None, backoff=None):
+    """
+    GET a page, retrying timeouts, connection errors and retryable
+    statuses with jittered exponential backoff.
+
+    Args:
+        session (requests.Session): Session to send the request with
+        url (str): Page URL
+        params (dict): Query parameters
+        headers (dict): Extra request headers
+        timeout (float): Seconds per attempt; defaults to TRENDING_FETCH_TIMEOUT
+        retries (int): Retries after the first attempt; defaults to TRENDING_FETCH_RETRIES
+        backoff (float): Base delay in seconds; defaults to TRENDING_FETCH_BACKOFF
+
+    Returns:
+        requests.Response: Successful (2xx) or 304 response
+
+    Raises:
+        requests.RequestException: When the last attempt fails
+    """
+    timeout = FETCH_TIMEOUT if timeout is None else timeout
+    retries = FETCH_RETRIES if retries is None else retries
+    backoff = FETCH_BACKOFF if backoff is None else backoff
+
+    for attempt in range(retries + 1):
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=timeout)
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                response.raise_for_status()
+                return response
+            print(f"{response.url} returned {response.status_code}, retrying")
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == retries:
+                raise
+            print(f"Fetching {url} failed ({e.__class__.__name__}), retrying")
+        # Full jitter keeps concurrent retries from arriving together
+        time.sleep(random.uniform(0, backoff * 2 ** attempt))
+
+def _store_page(html, changed, data_dir, day, raw_dir=None, captures_dir=None):
+    """
+    Parse and save a fetched page. A page unchanged since the last fetch
+    reuses the day file it was saved to, without parsing or writing.
+
+    With captures_dir, the page is also appended to the day's captures
+    and the day file is written from the day's last capture.
+
+    Returns:
+        list: The day's repositories
+    """
+    path = os.path.join(data_dir, str(day.year), f"{day.month:02d}", f"{day.day:02d}.json")
+    if not changed and os.path.exists(path):
+        print(f"Page unchanged since the last fetch, keeping {path}")
+        with open(path, encoding='utf-8') as f:
+            repos = json.load(f)
+        if captures_dir:
+            append_capture(repos, day, captures_dir)
+        return repos
+
+    if raw_dir:
+        save_snapshot(html, day, raw_dir)
+    # Only the repository articles are parsed (see parser.py)
+    repos = parse_trending_html(html)
+    if captures_dir:
+        count = append_capture(repos, day, captures_dir)
+        _, repos = read_capture(capture_path(day, captures_dir))
+        print(f"Capture {count} of {day.strftime('%Y-%m-%d')} saved")
+    save_trending_data(repos, data_dir, day)
+    return repos
 
-def fetch_trending_repos():
+def fetch_trending_repos(base_url=TRENDING_URL, data_dir=DATA_DIR, session=None, raw_dir=RAW_HTML_DIR,
+                         cache_dir=HTTP_CACHE_DIR, offline=None, capture=None, captures_dir=CAPTURES_DIR):
     """
     Fetch trending repositories from GitHub and save to data directory.
-    
+
+    The raw page is kept as a compressed snapshot (see snapshots.py), so
+    the day can be parsed again if the parser misses fields. Requests go
+    through the HTTP cache (see http_cache.py): when the page has not
+    changed since the last fetch, today's saved day is returned as is.
+    In capture mode every fetch is also kept as a capture of the day (see
+    captures.py).
+
+    Args:
+        base_url (str): Trending page URL
+        data_dir (str): Data directory to save the day file in
+        session (requests.Session): Shared session; a new one by default
+        raw_dir (str): Snapshot archive root; None skips the snapshot
+        cache_dir (str): HTTP cache directory; None disables the cache
+        offline (bool): Replay the cached page instead of requesting it;
+            defaults to TRENDING_OFFLINE
+        capture (bool): Append the page to the day's captures; defaults
+            to TRENDING_CAPTURES
+        captures_dir (str): Captures root
+
     Returns:
-        list: List of trending repositories
+        list: Repo records of the trending repositories
     """
-    url = 'https://github.com/trending'
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        repos = []
-        
-        # Find all repository articles
-        repo_articles = soup.find_all('article', class_='Box-row')
-        
-        for i, article in enumerate(repo_articles, 1):
-            try:
-                # Extract repository name and owner
-                repo_link = article.find('h2', class_='h3 lh-condensed').find('a')
-                repo_name = repo_link.get('href').strip('/')
-                
-                # Extract description
-                description_elem = article.find('p', class_='col-9 color-fg-muted my-1 pr-4')
-                description = description_elem.get_text(strip=True) if description_elem else ''
-                
-                # Extract language
-                language_elem = article.find('span', {'itemprop': 'programmingLanguage'})
-                language = language_elem.get_text(strip=True) if language_elem else ''
-                
-                # Extract stars
-                stars_elem = article.find('a', href=lambda x: x and 'stargazers' in x)
-                stars = stars_elem.get_text(strip=True) if stars_elem else '0'
-                
-                # Extract forks
-                forks_elem = article.find('a', href=lambda x: x and 'forks' in x)
-                forks = forks_elem.get_text(strip=True) if forks_elem else '0'
-                
-                repo_data = {
-                    'rank': i,
-                    'name': repo_name,
-                    'description': description,
-                    'language': language,
-                    'stars': stars,
-                    'forks': forks,
-                    'link': f'https://github.com/{repo_name}'
-                }
-                
-                repos.append(repo_data)
-                
-            except Exception as e:
-                print(f"Error parsing repository {i}: {e}")
-                continue
-        
-        # Save to file
-        save_trending_data(repos)
-        
+        session = session or create_session(1)
+        html, changed = HttpCache(cache_dir, offline).fetch(partial(request_page, session), base_url)
+        capture = CAPTURE_MODE if capture is None else capture
+        repos = _store_page(html, changed, data_dir, datetime.now(), raw_dir, captures_dir if capture else None)
+
         print(f"Successfully fetched {len(repos)} trending repositories")
-        return repos
-        
+        return to_records(repos)
+
     except Exception as e:
         print(f"Error fetching trending repositories: {e}")
         return []
 
-def save_trending_data(repos):
+def _split_setting(value):
+    """Comma-separated setting as a list, keeping empty entries"""
+    return [item.strip().lower() for item in value.split(',')]
+
+def trending_variants(languages=None, periods=None, spoken_languages=None):
+    """
+    Every combination of the configured variant dimensions.
+
+    Args:
+        languages (list): Programming languages ('' for all); defaults to
+            TRENDING_VARIANT_LANGUAGES
+        periods (list): 'daily', 'weekly' and/or 'monthly'; defaults to
+            TRENDING_VARIANT_PERIODS
+        spoken_languages (list): Spoken language codes ('' for all);
+            defaults to TRENDING_VARIANT_SPOKEN_LANGUAGES
+
+    Returns:
+        list: (language, period, spoken_language) tuples
+    """
+    languages = _split_setting(VARIANT_LANGUAGES) if languages is None else languages
+    periods = _split_setting(VARIANT_PERIODS) if periods is None else periods
+    spoken_languages = _split_setting(VARIANT_SPOKEN_LANGUAGES) if spoken_languages is None else spoken_languages
+    return list(itertools.product(dict.fromkeys(languages), dict.fromkeys(periods),
+                                  dict.fromkeys(spoken_languages or [''])))
+
+def variant_name(variant):
+    """
+    Namespace of a variant, e.g. 'all-daily' or 'python-weekly-zh'.
+
+    Args:
+        variant (tuple): (language, period, spoken_language)
+
+    Returns:
+        str: Directory name under VARIANTS_DIR
+    """
+    language, period, spoken_language = variant
+    parts = [quote(language, safe='+') if language else 'all', period]
+    if spoken_language:
+        parts.append(spoken_language)
+    return '-'.join(parts)
+
+def variant_request(base_url, variant):
+    """
+    URL and query parameters of a variant's trending page.
+
+    Returns:
+        tuple: (url, params)
+    """
+    language, period, spoken_language = variant
+    url = f"{base_url}/{quote(language, safe='')}" if language else base_url
+    params = {'since': period}
+    if spoken_language:
+        params['spoken_language_code'] = spoken_language
+    return url, params
+
+def fetch_trending_variants(variants=None, base_url=TRENDING_URL, data_dir=VARIANTS_DIR, workers=None,
+                            cache_dir=HTTP_CACHE_DIR, offline=None):
+    """
+    Fetch trending variants concurrently and save each to its namespace.
+
+    Args:
+        variants (list): (language, period, spoken_language) tuples;
+            defaults to trending_variants()
+        base_url (str): Trending page URL
+        data_dir (str): Directory holding one namespace per variant
+        workers (int): Concurrent requests; defaults to TRENDING_FETCH_WORKERS
+        cache_dir (str): HTTP cache directory; None disables the cache
+        offline (bool): Replay cached pages instead of requesting them
+
+    Returns:
+        dict: Variant name -> Repo records, for every variant fetched
+    """
+    variants = trending_variants() if variants is None else variants
+    workers = workers or FETCH_WORKERS
+    session = create_session(workers)
+    cache = HttpCache(cache_dir, offline)
+    today = datetime.now()
+
+    def fetch(variant):
+        url, params = variant_request(base_url, variant)
+        html, changed = cache.fetch(partial(request_page, session), url, params)
+        return to_records(_store_page(html, changed, os.path.join(data_dir, variant_name(variant)), today))
+
+    results = {}
+    start = time.perf_counter()
+    with session, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [(variant_name(variant), pool.submit(fetch, variant)) for variant in variants]
+        for name, future in futures:
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                print(f"Error fetching trending variant {name}: {e}")
+
+    print(f"Fetched {len(results)}/{len(variants)} trending variant(s), "
+          f"{sum(len(repos) for repos in results.values())} repositories "
+          f"in {time.perf_counter() - start:.1f}s")
+    return results
+
+def save_trending_data(repos, data_dir=DATA_DIR, day=None):
     """
     Save trending data to organized directory structure.
     
     Args:
         repos (list): List of repository data to save
+        data_dir (str): Data directory (YYYY/MM/DD.json layout)
+        day (datetime): Date of the data; defaults to today
     """
-    today = datetime.now()
+    today = day or datetime.now()
     year = str(today.year)
     month = f"{today.month:02d}"
     day = f"{today.day:02d}"
     
     # Create directory structure
-    year_dir = os.path.join(DATA_DIR, year)
+    year_dir = os.path.join(data_dir, year)
     month_dir = os.path.join(year_dir, month)
     
     os.makedirs(month_dir, exist_ok=True)
@@ -107,5 +304,9 @@ def save_trending_data(repos):
     
     print(f"Data saved to {filepath}")
 
+    # Keep the trending index current; it only indexes the main archive
+    if USE_DATABASE and data_dir == DATA_DIR:
+        store_day(today.strftime('%Y-%m-%d'), repos, filepath)
+
 if __name__ == "__main__":
-    fetch_trending_repos() 
\ No newline at end of file
+    fetch_trending_repos()
@@ -0,0 +1,461 @@
+"""
+Shared repository history index for Github Trending History.
+
+The index is built once from the daily data files and answers every
+per-date question (which repos trended that day, how long each one had
+been trending by then) without re-reading the archive.
+
+Days are folded in through a chain of generator stages, one day at a
+time: scan_days() picks the day files to ingest, decode_days() reads
+them (a bounded window ahead), project_days() reduces each day to its
+(name, rank, stars) entries and the info of repositories seen for the first
+time, and RepoHistory.ingest() aggregates them.
+Decoded days are not retained, so building the index over any archive
+length holds one day plus the pool's read-ahead in memory.
+"""
+
+import os
+import json
+
+from .categorizer import categorize_repos
+from .parser import get_count
+from .repo import Repo
+from .loader import fingerprint_source, load_days, read_day, source_digest, source_mtime
+from .segments import split_source
+from .store import HistoryStore
+
+STATE_FILE = 'data/cache/analyzer_state.json'
+STORE_FILE = 'data/cache/history.bin'
+STATE_VERSION = 3
+
+# First-seen fields the index keeps per repository
+INFO_FIELDS = ('name', 'link', 'description', 'language')
+
+def _unchanged_mtime(fingerprint, source):
+    """
+    Check a day source against its recorded fingerprint.
+
+    A day at its recorded path and mtime is unchanged. Otherwise (a
+    checkout reset the mtime, or compaction moved the day into a
+    segment) only its content counts: packed days compare the SHA-1 in
+    their segment index, loose files, normally just the current month,
+    are hashed.
+
+    Returns:
+        int: The holding file's current mtime if the day's content is
+            unchanged, else None
+    """
+    try:
+        mtime = source_mtime(source)
+        if fingerprint.get('path') == source and mtime == fingerprint['mtime']:
+            if split_source(source)[1] is None and os.path.getsize(source) != fingerprint['size']:
+                return None
+        elif source_digest(source) != (fingerprint['size'], fingerprint['sha1']):
+            return None
+    except (OSError, KeyError, ValueError):
+        return None
+    return mtime
+
+def scan_days(data_files, after=None):
+    """
+    Scan stage: the day files to ingest.
+
+    Args:
+        data_files (list): (date_str, source) tuples sorted by date
+        after (str): Last date already ingested, if any
+
+    Yields:
+        tuple: (date_str, source) for every day after the given date
+    """
+    for date_str, source in data_files:
+        if not after or date_str > after:
+            yield date_str, source
+
+def decode_days(scanned, workers=None, preloaded=None):
+    """
+    Decode stage: read scanned days, in parallel with a bounded read-ahead.
+
+    Args:
+        scanned (iterable): (date_str, source) tuples in date order
+        workers (int): Decoding pool size, see loader.load_days()
+        preloaded (dict): Date -> repositories of days already in memory;
+            their sources are fingerprinted but not decoded
+
+    Yields:
+        tuple: (date_str, repos, fingerprint) in date order
+    """
+    preloaded = preloaded or {}
+    scanned = list(scanned)
+    loaded = load_days([(d, p) for d, p in scanned if d not in preloaded], workers, with_fingerprints=True)
+    try:
+        for date_str, source in scanned:
+            if date_str in preloaded:
+                yield date_str, preloaded[date_str], fingerprint_source(source)
+            else:
+                yield next(loaded)
+    finally:
+        loaded.close()
+
+def project_info(repo):
+    """First-seen info the index keeps of a repository, as a record with INFO_FIELDS set"""
+    return Repo(repo['name'], description=repo.get('description', ''), language=repo.get('language', ''),
+                link=repo.get('link', ''))
+
+def project_days(decoded, known=()):
+    """
+    Project stage: reduce each day to what the index aggregates.
+
+    Args:
+        decoded (iterable): (date_str, repos, fingerprint) tuples
+        known: Names whose info is already kept, such as RepoHistory.info;
+            checked as days go by, so repositories folded in meanwhile
+            count as known
+
+    Yields:
+        tuple: (date_str, [(name, rank, stars)], [info], fingerprint)
+            with the projected info of repositories seen for the first time
+    """
+    for date_str, repos, fingerprint in decoded:
+        entries = [(repo['name'], repo['rank'], get_count(repo, 'stars')) for repo in repos]
+        new_infos = {}
+        for repo in repos:
+            if repo['name'] not in known and repo['name'] not in new_infos:
+                new_infos[repo['name']] = project_info(repo)
+        yield date_str, entries, list(new_infos.values()), fingerprint
+
+class RepoHistory:
+    """
+    Per-repository trending history built from the daily data files.
+
+    Appearances live in a columnar HistoryStore; the index itself only
+    keeps each repository's first-seen info and where every day came from.
+    Days must be added in ascending date order.
+    """
+
+    def __init__(self, store=None):
+        self.store = store if store is not None else HistoryStore()
+        self.info = {}
+        # Stored category and labels per repository name (see
+        # category_store); when unset, repositories are categorized from
+        # each day's own text
+        self.categories = None
+        self.labels = None
+        self._day_files = {}
+        self._fingerprints = {}
+        self._days = {}
+        self.state_dirty = False
+
+    @classmethod
+    def build(cls, data_files, workers=None, preloaded=None):
+        """
+        Build the index from (date_str, file_path) pairs.
+
+        Args:
+            data_files (list): Data files sorted by date, as returned by
+                get_all_data_files()
+            workers (int): Decoding pool size, see loader.load_days()
+            preloaded (dict): Date -> repositories of days already in memory
+
+        Returns:
+            RepoHistory: The populated index
+        """
+        history = cls()
+        history.ingest(data_files, workers, preloaded)
+        return history
+
+    def ingest(self, data_files, workers=None, preloaded=None):
+        """
+        Fold every data file newer than the last ingested date into the index.
+
+        Args:
+            data_files (list): Data files sorted by date
+            workers (int): Decoding pool size, see loader.load_days()
+            preloaded (dict): Date -> repositories of days already in
+                memory (such as a day just fetched); their files are
+                fingerprinted but not decoded
+
+        Returns:
+            int: Number of days added
+        """
+        preloaded = preloaded or {}
+        days = project_days(decode_days(scan_days(data_files, self.last_date), workers, preloaded), self.info)
+        added = 0
+        for date_str, entries, new_infos, fingerprint in days:
+            self._fold_day(date_str, entries, new_infos, fingerprint['path'], fingerprint)
+            if date_str in preloaded:
+                self._days[date_str] = preloaded[date_str]
+            added += 1
+        self.store.freeze()
+        return added
+
+    def add_day(self, date_str, day_repos, file_path=None, fingerprint=None):
+        """
+        Fold one day of trending data into the index.
+
+        Args:
+            date_str (str): Date in YYYY-MM-DD format
+            day_repos (list): Repositories trending on that day
+            file_path (str): Data file the day was read from, if any
+            fingerprint (dict): Fingerprint of that file, if known
+        """
+        for _, entries, new_infos, _ in project_days([(date_str, day_repos, fingerprint)], self.info):
+            self._fold_day(date_str, entries, new_infos, file_path, fingerprint)
+        if not file_path:
+            # Without a file the day can only be answered from memory
+            self._days[date_str] = day_repos
+
+    def _fold_day(self, date_str, entries, new_infos, file_path, fingerprint):
+        """Aggregate stage: append a day's appearances and its new repositories' info"""
+        self.store.add_day(date_str, entries)
+        for info in new_infos:
+            self.info[info['name']] = info
+
+        if file_path:
+            self._day_files[date_str] = file_path
+        if fingerprint:
+            self._fingerprints[date_str] = fingerprint
+        self.state_dirty = True
+
+    @property
+    def dates(self):
+        """Every ingested date in ascending order"""
+        return self.store.dates
+
+    @property
+    def last_date(self):
+        """Last ingested date, or None for an empty index"""
+        return self.store.dates[-1] if self.store.dates else None
+
+    def names(self):
+        """Every repository name in first-seen order"""
+        return self.store.names
+
+    def history_of(self, name):
+        """Get a repository's (date_str, rank) appearances in date order"""
+        return self.store.history(name)
+
+    def day_fingerprint(self, date_str):
+        """Fingerprint of an ingested day's data file, or None if it was added without one"""
+        return self._fingerprints.get(date_str)
+
+    def is_current(self, data_files):
+        """
+        Check that every ingested day still matches the data files on disk.
+
+        Args:
+            data_files (list): Data files sorted by date
+
+        Returns:
+            bool: False if a past day file was added, removed or changed
+        """
+        past_files = [(d, p) for d, p in data_files if self.last_date and d <= self.last_date]
+        if [d for d, _ in past_files] != self.dates:
+            return False
+        for date_str, file_path in past_files:
+            fingerprint = self._fingerprints.get(date_str)
+            mtime = _unchanged_mtime(fingerprint, file_path) if fingerprint else None
+            if mtime is None:
+                return False
+            if mtime != fingerprint['mtime'] or file_path != fingerprint['path']:
+                fingerprint['mtime'] = mtime
+                fingerprint['path'] = self._day_files[date_str] = file_path
+                self.state_dirty = True
+        return True
+
+    def to_state(self):
+        """Serialize everything but the appearances into the analyzer state"""
+        return {
+            'version': STATE_VERSION,
+            'last_date': self.last_date,
+            'entries': self.store.entry_count,
+            'files': self._fingerprints,
+            'info': {name: info.to_dict() for name, info in self.info.items()}
+        }
+
+    @classmethod
+    def from_state(cls, state, store):
+        """
+        Restore an index from persisted analyzer state and its history store.
+
+        Day contents are not part of the state; they are read back from the
+        recorded data files on first use.
+
+        Returns:
+            RepoHistory: The index, or None if the state and store disagree
+        """
+        if store.entry_count != state['entries'] or (store.dates[-1] if store.dates else None) != state['last_date']:
+            return None
+        history = cls(store)
+        history.info = {name: Repo.from_dict(info) for name, info in state['info'].items()}
+        history._fingerprints = state['files']
+        history._day_files = {d: fp['path'] for d, fp in state['files'].items()}
+        return history
+
+    def get_day(self, date_str):
+        """
+        Get the raw repositories recorded for a date.
+
+        Days are read back from their data files on every call; only days
+        handed over in memory (such as the day just fetched) are kept.
+        """
+        day_repos = self._days.get(date_str)
+        if day_repos is None and date_str in self._day_files:
+            day_repos = read_day(self._day_files[date_str])
+        return day_repos or []
+
+    def iter_days(self, dates, workers=None):
+        """
+        Stream the raw repositories of several dates, decoding ahead in a pool.
+
+        Args:
+            dates (list): Dates in ascending order
+            workers (int): Decoding pool size, see loader.load_days()
+
+        Yields:
+            tuple: (date_str, repos) in the given order
+        """
+        on_disk = [(d, self._day_files[d]) for d in dates if d not in self._days and d in self._day_files]
+        loaded = load_days(on_disk, workers)
+        try:
+            for date_str in dates:
+                if date_str in self._days:
+                    yield date_str, self._days[date_str]
+                elif date_str in self._day_files:
+                    yield next(loaded)
+                else:
+                    yield date_str, []
+        finally:
+            loaded.close()
+
+    def streak_as_of(self, name, date_str):
+        """
+        Get the consecutive trending days of a repository up to a date.
+
+        Args:
+            name (str): Repository name (owner/repo)
+            date_str (str): Date in YYYY-MM-DD format
+
+        Returns:
+            int: Streak ending at the repository's last appearance on or
+                before the date, or 0 if it had not trended yet
+        """
+        return self.store.streak_as_of(name, date_str)
+
+    def current_streak(self, name):
+        """Get the streak ending at a repository's latest appearance"""
+        return self.store.current_streak(name)
+
+    def longest_streak(self, name, date_str=None):
+        """Get a repository's longest streak, optionally only up to a date"""
+        return self.store.longest_streak(name, date_str)
+
+    def star_velocity(self, name):
+        """Get a repository's (date_str, stars gained that day) series while trending"""
+        return self.store.star_velocity(name)
+
+    def velocity_on(self, name, date_str):
+        """Get the stars a repository gained on a trending date, or None"""
+        return self.store.velocity_on(name, date_str)
+
+    def categorize(self, repos):
+        """
+        Get the category of each repository, preferring stored assignments.
+
+        Args:
+            repos (list): Repository dicts
+
+        Returns:
+            list: Category name of each repository, in order
+        """
+        if self.categories is None:
+            return categorize_repos(repos)
+        categories = [self.categories.get(repo['name']) for repo in repos]
+        if None in categories:
+            missing = [repo for repo, category in zip(repos, categories) if category is None]
+            computed = iter(categorize_repos(missing))
+            categories = [category or next(computed) for category in categories]
+        return categories
+
+    def get_repos_by_date(self, date_str):
+        """
+        Get trending data for a specific date, enriched with streak and category.
+
+        Args:
+            date_str (str): Date in YYYY-MM-DD format
+
+        Returns:
+            list: Repo records of the day's repositories with 'streak',
+                'longest_streak', 'category', 'labels' and, when known,
+                'star_velocity' set
+        """
+        day = self.get_day(date_str)
+        return [
+            Repo.from_dict(repo,
+                           streak=self.streak_as_of(repo['name'], date_str) or 1,
+                           longest_streak=self.longest_streak(repo['name'], date_str) or 1,
+                           category=category,
+                           labels=self.label_names(repo['name'], category),
+                           star_velocity=self.velocity_on(repo['name'], date_str))
+            for repo, category in zip(day, self.categorize(day))
+        ]
+
+    def label_names(self, name, category):
+        """Category labels of a repository, primary first"""
+        labels = self.labels.get(name) if self.labels else None
+        return [label for label, _ in labels] if labels else [category]
+
+def load_state(state_file=STATE_FILE):
+    """Load persisted analyzer state, or None if missing or from another version"""
+    try:
+        with open(state_file, encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if state.get('version') != STATE_VERSION:
+        return None
+    return state
+
+def save_state(history, state_file=STATE_FILE, store_file=STORE_FILE):
+    """Persist the history store and the analyzer state atomically"""
+    history.store.save(store_file)
+    os.makedirs(os.path.dirname(state_file), exist_ok=True)
+    tmp_file = state_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(history.to_state(), f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_file, state_file)
+
+def load_history(data_files, state_file=STATE_FILE, store_file=STORE_FILE, rebuild=False, workers=None,
+                 preloaded=None):
+    """
+    Load the history index incrementally from persisted state.
+
+    Only day files newer than the state's checkpoint are read. The index is
+    rebuilt from scratch when the state is missing, from another version,
+    or when a past day file was added, removed or changed.
+
+    Args:
+        data_files (list): Data files sorted by date
+        state_file (str): Path of the persisted analyzer state
+        store_file (str): Path of the persisted history store
+        rebuild (bool): Ignore any persisted state
+        workers (int): Decoding pool size, see loader.load_days()
+        preloaded (dict): Date -> repositories of days already in memory,
+            see RepoHistory.ingest()
+
+    Returns:
+        RepoHistory: The up-to-date index
+    """
+    state = None if rebuild else load_state(state_file)
+    store = HistoryStore.load(store_file) if state else None
+    history = RepoHistory.from_state(state, store) if store else None
+
+    if history is not None and history.is_current(data_files):
+        added = history.ingest(data_files, workers, preloaded)
+        print(f'Loaded analyzer state up to {state["last_date"]}, ingested {added} new day(s)')
+    else:
+        history = RepoHistory.build(data_files, workers, preloaded)
+        print(f'Rebuilt analyzer state from {len(history.dates)} day(s)')
+
+    if history.state_dirty:
+        save_state(history, state_file, store_file)
+    return history
@@ -0,0 +1,143 @@
+"""
+HTTP response cache for the trending fetcher.
+
+Each fetched URL keeps its last body (gzip-compressed) and validators
+(ETag, Last-Modified) under data/cache/http. Later requests are sent
+conditionally; a 304, or a page whose repository list hashes the same as
+last time, is reported as unchanged so the fetcher can skip parsing and
+writing. In offline mode nothing is requested and cached bodies are
+replayed.
+"""
+
+import os
+import gzip
+import json
+import hashlib
+from datetime import datetime
+from urllib.parse import urlencode
+
+HTTP_CACHE_DIR = 'data/cache/http'
+HTTP_CACHE_VERSION = 1
+
+# Replay cached responses instead of requesting (overridable via environment variable)
+OFFLINE = os.getenv('TRENDING_OFFLINE', '0') == '1'
+
+def cache_key(url, params=None):
+    """Cache key of a URL and its query parameters"""
+    query = urlencode(sorted((params or {}).items()))
+    return hashlib.sha1(f"{url}?{query}".encode('utf-8')).hexdigest()[:20]
+
+def content_digest(html):
+    """
+    Hash of the part of a trending page the parser reads.
+
+    Pages carry per-request tokens outside the repository list, so only
+    the span from the first to the last article is hashed.
+    """
+    start = html.find('<article')
+    end = html.rfind('</article>')
+    if start != -1 and end > start:
+        html = html[start:end]
+    return hashlib.sha1(html.encode('utf-8')).hexdigest()
+
+class HttpCache:
+    """
+    Conditional-request cache of fetched pages.
+
+    A cache without a directory is a pass-through that reports every
+    response as changed.
+    """
+
+    def __init__(self, directory=HTTP_CACHE_DIR, offline=None):
+        self.directory = directory
+        self.offline = OFFLINE if offline is None else offline
+
+    def _paths(self, key):
+        """Entry metadata and body paths"""
+        base = os.path.join(self.directory, key)
+        return base + '.json', base + '.html.gz'
+
+    def _load(self, key):
+        """Cached entry with its body present, or None"""
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if entry.get('version') != HTTP_CACHE_VERSION or not os.path.exists(body_path):
+            return None
+        return entry
+
+    def _read_body(self, key):
+        with gzip.open(self._paths(key)[1], 'rb') as f:
+            return f.read().decode('utf-8')
+
+    def _store(self, key, url, response, html, digest, entry):
+        """Write an entry's validators, and its body if the content changed"""
+        os.makedirs(self.directory, exist_ok=True)
+        meta_path, body_path = self._paths(key)
+        if entry is None or entry['digest'] != digest:
+            tmp_path = body_path + '.tmp'
+            with gzip.GzipFile(tmp_path, 'wb', mtime=0) as f:
+                f.write(html.encode('utf-8'))
+            os.replace(tmp_path, body_path)
+        tmp_path = meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': HTTP_CACHE_VERSION,
+                'url': url,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'digest': digest,
+                'fetched': datetime.now().isoformat(timespec='seconds')
+            }, f, indent=2)
+        os.replace(tmp_path, meta_path)
+
+    def fetch(self, request, url, params=None):
+        """
+        Fetch a page through the cache.
+
+        Args:
+            request (callable): request(url, params, headers) returning a
+                requests.Response, e.g. fetcher.request_page bound to a session
+            url (str): Page URL
+            params (dict): Query parameters
+
+        Returns:
+            tuple: (html, changed) where changed is False when the page
+                is the same as the cached one (304, same repository list,
+                or an offline replay)
+
+        Raises:
+            LookupError: In offline mode, when the page is not cached
+        """
+        if not self.directory:
+            if self.offline:
+                raise LookupError(f"No response cache to replay {url} from")
+            return request(url, params, {}).text, True
+
+        key = cache_key(url, params)
+        entry = self._load(key)
+        if self.offline:
+            if entry is None:
+                raise LookupError(f"{url} is not cached, cannot fetch it offline")
+            print(f"Offline: replaying {url} fetched {entry['fetched']}")
+            return self._read_body(key), False
+
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = request(url, params, headers)
+        if response.status_code == 304 and entry is not None:
+            print(f"{url} not modified since {entry['fetched']}")
+            return self._read_body(key), False
+
+        html = response.text
+        digest = content_digest(html)
+        self._store(key, url, response, html, digest, entry)
+        return html, entry is None or entry['digest'] != digest
@@ -0,0 +1,228 @@
+"""
+Day file discovery and loading for Github Trending History.
+
+Every pass over the archive goes through this module: days are
+discovered with os.scandir, decoded in a thread or process pool, and
+yielded back in date order, with only a few chunks decoded ahead of the
+consumer. A day's source is either a loose daily file
+or a day inside a monthly segment (see segments.py); both read the same.
+Decoding uses orjson when it is installed and falls back to the standard
+json module.
+"""
+
+import os
+import json
+import hashlib
+from collections import deque
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from .segments import SEGMENT_SUFFIX, read_index, read_segment_day, split_source
+
+DATA_DIR = 'data/trending_data'
+
+# Loader configuration (overridable via environment variables)
+JSON_BACKEND = os.getenv('TRENDING_JSON_BACKEND', 'auto')
+LOAD_WORKERS = int(os.getenv('TRENDING_LOAD_WORKERS', '0'))
+LOAD_EXECUTOR = os.getenv('TRENDING_LOAD_EXECUTOR', 'process')
+
+# Below this many files a pool costs more to start than it saves
+MIN_PARALLEL_FILES = 32
+
+# Days per pool task, and pool tasks decoded ahead of the consumer per worker
+LOAD_CHUNK_SIZE = 16
+LOAD_PREFETCH = 2
+
+def get_json_decoder(backend=None):
+    """
+    Get a JSON decoding function.
+
+    Args:
+        backend (str): 'orjson', 'json' or 'auto' (orjson if installed);
+            defaults to the TRENDING_JSON_BACKEND setting
+
+    Returns:
+        callable: Function decoding bytes into Python objects
+    """
+    backend = backend or JSON_BACKEND
+    if backend in ('auto', 'orjson'):
+        try:
+            import orjson
+            return orjson.loads
+        except ImportError:
+            if backend == 'orjson':
+                print('orjson is not installed, falling back to json')
+    return json.loads
+
+def discover_day_files(data_dir=DATA_DIR):
+    """
+    Find every day under data_dir, in loose YYYY/MM/DD.json files or in
+    YYYY/MM.ndjson segments. A loose file wins over a packed copy of the
+    same day.
+
+    Returns:
+        list: (date_str, source) tuples sorted by date
+    """
+    days = {}
+    segments = []
+
+    try:
+        with os.scandir(data_dir) as years:
+            years = [e for e in years if e.is_dir()]
+    except FileNotFoundError:
+        return []
+
+    for year in years:
+        with os.scandir(year.path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    with os.scandir(entry.path) as day_entries:
+                        for day in day_entries:
+                            if day.name.endswith('.json') and day.is_file():
+                                days[f"{year.name}-{entry.name}-{day.name[:-5]}"] = day.path
+                elif entry.name.endswith(SEGMENT_SUFFIX):
+                    segments.append((year.name, entry.name[:-len(SEGMENT_SUFFIX)], entry.path))
+
+    for year, month, segment_path in segments:
+        for day in read_index(segment_path):
+            days.setdefault(f"{year}-{month}-{day}", f"{segment_path}#{day}")
+
+    return sorted(days.items())
+
+def read_source(source):
+    """Read the raw JSON bytes of a day source"""
+    segment_path, day = split_source(source)
+    if day is not None:
+        return read_segment_day(segment_path, day)
+    with open(source, 'rb') as f:
+        return f.read()
+
+def source_mtime(source):
+    """Modification time (ns) of the file holding a day source"""
+    return os.stat(split_source(source)[0]).st_mtime_ns
+
+def read_day(source, backend=None):
+    """Read and decode one day"""
+    return get_json_decoder(backend)(read_source(source))
+
+def _packed_digest(source):
+    """(size, sha1) a packed day was stored as, from its segment index; None for loose files"""
+    segment_path, day = split_source(source)
+    if day is not None:
+        entry = read_index(segment_path)[day]
+        return entry[2], entry[3]
+    return None
+
+def _fingerprint(source, mtime, raw):
+    """Fingerprint of a day's raw bytes, see read_day_file()"""
+    size, sha1 = _packed_digest(source) or (len(raw), hashlib.sha1(raw).hexdigest())
+    return {
+        'path': source,
+        'mtime': mtime,
+        'size': size,
+        'sha1': sha1
+    }
+
+def fingerprint_source(source):
+    """
+    Fingerprint a day source without decoding it, for days whose
+    repositories are already in memory.
+
+    Returns:
+        dict: Fingerprint as returned by read_day_file()
+    """
+    mtime = source_mtime(source)
+    return _fingerprint(source, mtime, read_source(source))
+
+def source_digest(source):
+    """
+    Size and SHA-1 identifying a day's content, as in its fingerprint.
+
+    Packed days are looked up in their segment's index instead of being
+    read and hashed, so a day moved into a segment keeps the digest of
+    its loose file.
+
+    Returns:
+        tuple: (size, sha1)
+    """
+    digest = _packed_digest(source)
+    if digest is not None:
+        return digest
+    raw = read_source(source)
+    return len(raw), hashlib.sha1(raw).hexdigest()
+
+def read_day_file(source, backend=None):
+    """
+    Read a day and fingerprint it.
+
+    Args:
+        source (str): Loose day file path or segment day source
+        backend (str): JSON backend, see get_json_decoder()
+
+    Returns:
+        tuple: (repos, fingerprint) where fingerprint holds the source,
+            the holding file's mtime, and the day's size and SHA-1 digest
+            (see source_digest())
+    """
+    mtime = source_mtime(source)
+    raw = read_source(source)
+    return get_json_decoder(backend)(raw), _fingerprint(source, mtime, raw)
+
+def _read_chunk(read, paths):
+    """Decode a chunk of day sources (one pool task)"""
+    return [read(path) for path in paths]
+
+def _bounded_map(pool, func, items, chunksize, window):
+    """
+    Map func over chunks of items in a pool, yielding the results in order.
+
+    Unlike Executor.map(), which submits every task up front and keeps
+    every finished result until it is consumed, at most window chunks are
+    in flight, so a slow consumer bounds how much is decoded ahead of it.
+    """
+    pending = deque()
+    for start in range(0, len(items), chunksize):
+        pending.append(pool.submit(func, items[start:start + chunksize]))
+        if len(pending) >= window:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+def load_days(data_files, workers=None, executor=None, backend=None, with_fingerprints=False):
+    """
+    Decode day files, in parallel when worthwhile, yielding them in date order.
+
+    Args:
+        data_files (list): (date_str, source) tuples sorted by date
+        workers (int): Pool size; 0 or None uses TRENDING_LOAD_WORKERS, then
+            the CPU count. 1 decodes sequentially in this process
+        executor (str): 'process' or 'thread'
+        backend (str): JSON backend, see get_json_decoder()
+        with_fingerprints (bool): Also yield each file's fingerprint
+
+    Yields:
+        tuple: (date_str, repos), or (date_str, repos, fingerprint)
+    """
+    workers = workers or LOAD_WORKERS or os.cpu_count() or 1
+    executor = executor or LOAD_EXECUTOR
+    read = partial(read_day_file if with_fingerprints else read_day, backend=backend)
+    paths = [source for _, source in data_files]
+
+    if workers == 1 or len(paths) < MIN_PARALLEL_FILES:
+        results = map(read, paths)
+        pool = None
+    else:
+        pool_class = ProcessPoolExecutor if executor == 'process' else ThreadPoolExecutor
+        pool = pool_class(max_workers=workers)
+        chunksize = min(LOAD_CHUNK_SIZE, max(1, len(paths) // (workers * 4))) if executor == 'process' else 1
+        results = _bounded_map(pool, partial(_read_chunk, read), paths, chunksize, workers * LOAD_PREFETCH)
+
+    try:
+        for (date_str, _), result in zip(data_files, results):
+            if with_fingerprints:
+                yield (date_str,) + result
+            else:
+                yield date_str, result
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
@@ -0,0 +1,55 @@
+"""
+One-off migrations of the trending archive.
+
+Day files written before the parser kept integer counts only hold the
+displayed stars and forks ('29,987'). `python main.py migrate` backfills
+stars_count and forks_count into every such day in one pass: the archive
+is decoded in parallel like any history build, and only days that gained
+a count are rewritten. The analyzer parses display strings of days that
+were never migrated, so running it is optional.
+"""
+
+import os
+from datetime import datetime
+
+from .loader import DATA_DIR, discover_day_files, load_days
+from .parser import add_counts
+from .segments import SEGMENT_SUFFIX, compact_month, split_source
+
+def backfill_counts(data_dir=DATA_DIR, workers=None):
+    """
+    Add integer star and fork counts to every day file that lacks them.
+
+    A changed day of a packed month is written as a loose file and the
+    month is repacked, as reparse does.
+
+    Args:
+        data_dir (str): Trending archive root
+        workers (int): Pool size; defaults to TRENDING_LOAD_WORKERS, then
+            the CPU count. 1 decodes in this process
+
+    Returns:
+        list: Dates whose day file was rewritten
+    """
+    from .fetcher import save_trending_data
+
+    data_files = discover_day_files(data_dir)
+    sources = dict(data_files)
+    changed = []
+    repack = set()
+    for date_str, repos in load_days(data_files, workers):
+        fields = sum(len(repo) for repo in repos)
+        repos = [add_counts(repo) for repo in repos]
+        if sum(len(repo) for repo in repos) == fields:
+            continue
+        save_trending_data(repos, data_dir, datetime.strptime(date_str, '%Y-%m-%d'))
+        changed.append(date_str)
+        segment_path = split_source(sources[date_str])[0]
+        if segment_path.endswith(SEGMENT_SUFFIX):
+            repack.add((os.path.dirname(segment_path), os.path.basename(segment_path)[:-len(SEGMENT_SUFFIX)]))
+
+    for year_dir, month in sorted(repack):
+        compact_month(year_dir, month)
+
+    print(f"Backfilled counts in {len(changed)} of {len(data_files)} day file(s)")
+    return changed
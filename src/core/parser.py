@@ -0,0 +1,305 @@
+"""
+Trending page parsing for Github Trending History.
+
+Only the repository articles (article.Box-row) of a trending page are
+parsed, and every field of an article is picked up in a single walk over
+its elements. Three backends produce identical results:
+
+- selectolax (fastest), when installed
+- lxml, when installed
+- BeautifulSoup with a SoupStrainer, so the rest of the page (scripts,
+  navigation, footer) is never built into a tree
+
+The backend is chosen by TRENDING_HTML_PARSER ('auto' picks the fastest
+one installed). Star and fork counts are kept both as displayed
+('29,987') and as integers (stars_count, forks_count).
+"""
+
+import os
+
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+
+# Parser backend (overridable via environment variable)
+HTML_PARSER = os.getenv('TRENDING_HTML_PARSER', 'auto')
+
+# Exact class attributes of the fields, as GitHub renders them
+TITLE_CLASS = 'h3 lh-condensed'
+DESCRIPTION_CLASS = 'col-9 color-fg-muted my-1 pr-4'
+
+def available_backends():
+    """Installed parser backends, fastest first"""
+    backends = []
+    try:
+        import selectolax.lexbor  # noqa: F401
+        backends.append('selectolax')
+    except ImportError:
+        pass
+    try:
+        import lxml.html  # noqa: F401
+        backends.append('lxml')
+    except ImportError:
+        pass
+    backends.append('bs4')
+    return backends
+
+def get_backend(backend=None):
+    """
+    Resolve a parser backend name.
+
+    Args:
+        backend (str): 'auto', 'selectolax', 'lxml' or 'bs4'; defaults to
+            the TRENDING_HTML_PARSER setting
+
+    Returns:
+        str: Installed backend to use; an unavailable choice falls back
+            to the fastest installed one
+    """
+    backend = backend or HTML_PARSER
+    available = available_backends()
+    if backend == 'auto':
+        return available[0]
+    if backend not in available:
+        print(f"HTML parser backend '{backend}' is not available, using {available[0]}")
+        return available[0]
+    return backend
+
+def _class_value(value):
+    """Normalize a class attribute (string or list) to single-spaced text"""
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return ' '.join(value.split())
+    return ' '.join(value)
+
+def parse_count(value):
+    """
+    Integer value of a displayed count.
+
+    Args:
+        value: Count as shown on the page ('29,987', '1.2k'), or an int
+
+    Returns:
+        int: The count, or None if the value is missing or not a count
+    """
+    if isinstance(value, int):
+        return value
+    if not isinstance(value, str):
+        return None
+    text = value.strip().replace(',', '').lower()
+    scale = 1
+    if text[-1:] in ('k', 'm'):
+        scale = 1000 if text[-1] == 'k' else 1000000
+        text = text[:-1]
+    try:
+        return int(round(float(text) * scale)) if scale > 1 else int(text)
+    except ValueError:
+        return None
+
+def add_counts(repo):
+    """
+    Set a repository's integer stars_count and forks_count from its
+    displayed stars and forks; counts that cannot be parsed are left out.
+
+    Returns:
+        dict: The same repository
+    """
+    for field in ('stars', 'forks'):
+        count = parse_count(repo.get(field))
+        if count is not None:
+            repo[f'{field}_count'] = count
+    return repo
+
+def get_count(repo, field):
+    """
+    Integer stars or forks of a repository.
+
+    Args:
+        repo (dict): Repository as stored in a day file
+        field (str): 'stars' or 'forks'
+
+    Returns:
+        int: The stored count, else the displayed value parsed (None if
+            it is missing or not a count), for days stored without counts
+    """
+    count = repo.get(f'{field}_count')
+    return count if count is not None else parse_count(repo.get(field))
+
+def _repo_data(rank, href, description, language, stars, forks):
+    """Repository record in the shape of the daily data files"""
+    repo_name = href.strip('/')
+    return add_counts({
+        'rank': rank,
+        'name': repo_name,
+        'description': description,
+        'language': language,
+        'stars': stars,
+        'forks': forks,
+        'link': f'https://github.com/{repo_name}'
+    })
+
+def _parse_articles(articles, parse_article):
+    """Parse articles in page order; a broken article keeps its rank but is skipped"""
+    repos = []
+    for i, article in enumerate(articles, 1):
+        try:
+            repos.append(parse_article(i, article))
+        except Exception as e:
+            print(f"Error parsing repository {i}: {e}")
+    return repos
+
+def _bs4_text(tag):
+    """Stripped text pieces joined without a separator, as get_text(strip=True)"""
+    return tag.get_text(strip=True)
+
+def _parse_bs4_article(rank, article):
+    """Extract one article's fields in a single walk (BeautifulSoup)"""
+    title = description = language = stars = forks = None
+    for tag in article.descendants:
+        if not isinstance(tag, Tag):
+            continue
+        name = tag.name
+        if name == 'a':
+            href = tag.get('href')
+            if href:
+                if stars is None and 'stargazers' in href:
+                    stars = tag
+                if forks is None and 'forks' in href:
+                    forks = tag
+        elif name == 'h2':
+            if title is None and _class_value(tag.get('class')) == TITLE_CLASS:
+                title = tag
+        elif name == 'p':
+            if description is None and _class_value(tag.get('class')) == DESCRIPTION_CLASS:
+                description = tag
+        elif name == 'span':
+            if language is None and tag.get('itemprop') == 'programmingLanguage':
+                language = tag
+
+    link = title.find('a')
+    return _repo_data(
+        rank,
+        link.get('href'),
+        _bs4_text(description) if description else '',
+        _bs4_text(language) if language else '',
+        _bs4_text(stars) if stars else '0',
+        _bs4_text(forks) if forks else '0'
+    )
+
+def _is_box_row(value):
+    """Whether a class attribute contains Box-row"""
+    if not value:
+        return False
+    return 'Box-row' in (value.split() if isinstance(value, str) else value)
+
+def _parse_bs4(html):
+    """Parse with BeautifulSoup, building trees for the articles only"""
+    # The strainer sees the raw class attribute, not the split class list
+    strainer = SoupStrainer('article', class_=_is_box_row)
+    soup = BeautifulSoup(html, 'html.parser', parse_only=strainer)
+    return _parse_articles(soup.find_all('article', class_='Box-row'), _parse_bs4_article)
+
+def _lxml_text(element):
+    """Stripped text pieces joined without a separator, as get_text(strip=True)"""
+    pieces = (text.strip() for text in element.xpath('.//text()'))
+    return ''.join(piece for piece in pieces if piece)
+
+def _parse_lxml_article(rank, article):
+    """Extract one article's fields in a single walk (lxml)"""
+    title = description = language = stars = forks = None
+    for element in article.iterdescendants():
+        name = element.tag
+        if name == 'a':
+            href = element.get('href')
+            if href:
+                if stars is None and 'stargazers' in href:
+                    stars = element
+                if forks is None and 'forks' in href:
+                    forks = element
+        elif name == 'h2':
+            if title is None and _class_value(element.get('class')) == TITLE_CLASS:
+                title = element
+        elif name == 'p':
+            if description is None and _class_value(element.get('class')) == DESCRIPTION_CLASS:
+                description = element
+        elif name == 'span':
+            if language is None and element.get('itemprop') == 'programmingLanguage':
+                language = element
+
+    link = title.find('.//a')
+    return _repo_data(
+        rank,
+        link.get('href'),
+        _lxml_text(description) if description is not None else '',
+        _lxml_text(language) if language is not None else '',
+        _lxml_text(stars) if stars is not None else '0',
+        _lxml_text(forks) if forks is not None else '0'
+    )
+
+def _parse_lxml(html):
+    """Parse with lxml"""
+    import lxml.html
+    document = lxml.html.fromstring(html)
+    articles = document.xpath('//article[contains(concat(" ", normalize-space(@class), " "), " Box-row ")]')
+    return _parse_articles(articles, _parse_lxml_article)
+
+def _selectolax_text(node):
+    """Stripped text pieces joined without a separator, as get_text(strip=True)"""
+    return node.text(deep=True, separator='', strip=True)
+
+def _parse_selectolax_article(rank, article):
+    """Extract one article's fields in a single walk (selectolax)"""
+    title = description = language = stars = forks = None
+    for node in article.traverse(include_text=False):
+        name = node.tag
+        if name == 'a':
+            href = node.attributes.get('href')
+            if href:
+                if stars is None and 'stargazers' in href:
+                    stars = node
+                if forks is None and 'forks' in href:
+                    forks = node
+        elif name == 'h2':
+            if title is None and _class_value(node.attributes.get('class')) == TITLE_CLASS:
+                title = node
+        elif name == 'p':
+            if description is None and _class_value(node.attributes.get('class')) == DESCRIPTION_CLASS:
+                description = node
+        elif name == 'span':
+            if language is None and node.attributes.get('itemprop') == 'programmingLanguage':
+                language = node
+
+    link = title.css_first('a')
+    return _repo_data(
+        rank,
+        link.attributes.get('href'),
+        _selectolax_text(description) if description is not None else '',
+        _selectolax_text(language) if language is not None else '',
+        _selectolax_text(stars) if stars is not None else '0',
+        _selectolax_text(forks) if forks is not None else '0'
+    )
+
+def _parse_selectolax(html):
+    """Parse with selectolax (lexbor engine)"""
+    from selectolax.lexbor import LexborHTMLParser
+    return _parse_articles(LexborHTMLParser(html).css('article.Box-row'), _parse_selectolax_article)
+
+_PARSERS = {
+    'selectolax': _parse_selectolax,
+    'lxml': _parse_lxml,
+    'bs4': _parse_bs4
+}
+
+def parse_trending_html(html, backend=None):
+    """
+    Parse the repositories listed on a GitHub trending page.
+
+    Args:
+        html (str): Page HTML
+        backend (str): Parser backend, see get_backend()
+
+    Returns:
+        list: Repository dicts with 'rank', 'name', 'description',
+            'language', 'stars', 'forks', 'link', 'stars_count' and
+            'forks_count', in page order
+    """
+    return _PARSERS[get_backend(backend)](html)
@@ -0,0 +1,43 @@
+"""
+In-process daily pipeline for Github Trending History.
+
+`python main.py full` fetches today's trending page and hands the parsed
+repositories straight to the analyzer, which ingests them without reading
+the day file back and renders the site with its output stages running
+concurrently. Every stage's wall time is reported at the end.
+"""
+
+from datetime import datetime
+
+from .analyzer import analyze_and_generate
+from .fetcher import fetch_trending_repos
+from .stages import StageTimer
+
+def run_full_pipeline(rebuild=False, workers=None, site_mode='sharded', offline=None, capture=None):
+    """
+    Fetch today's trending repositories, then analyze and generate the site.
+
+    Args:
+        rebuild (bool): Rebuild the analyzer state from every data file
+        workers (int): Number of parallel day file decoders
+        site_mode (str): 'sharded' or 'inline', see analyze_and_generate()
+        offline (bool): Replay the cached page, see fetch_trending_repos()
+        capture (bool): Keep the fetch as an intra-day capture
+
+    Returns:
+        list: Fetched repositories; empty if the fetch failed, in which
+            case nothing is analyzed
+    """
+    timer = StageTimer()
+    with timer.stage('fetch'):
+        today = datetime.now().strftime('%Y-%m-%d')
+        repos = fetch_trending_repos(offline=offline, capture=capture)
+
+    if repos:
+        print(f"Successfully fetched {len(repos)} repositories")
+        analyze_and_generate(rebuild=rebuild, workers=workers, site_mode=site_mode,
+                             preloaded={today: repos}, timer=timer)
+    else:
+        print("Failed to fetch repositories, skipping analysis")
+    timer.report()
+    return repos
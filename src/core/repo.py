@@ -0,0 +1,137 @@
+"""
+Compact repository record for Github Trending History.
+
+Day files hold repositories as JSON objects, and they used to flow
+through the fetcher, analyzer, categorizer and subscription emails as
+plain dicts, copied whenever a field was added. A Repo keeps the same
+fields in __slots__, with the name, language and category interned so
+thousands of repo-days share one string per value. Records are converted
+back to the on-disk dict format only where they are written out
+(to_dict()). They also read like the dicts they replace (repo['name'],
+repo.get('stars'), 'forks' in repo), so code written for either works
+with both.
+"""
+
+import sys
+
+# On-disk fields, in the order the parser writes them
+FIELDS = ('rank', 'name', 'description', 'language', 'stars', 'forks', 'link', 'stars_count', 'forks_count')
+# Fields the analyzer adds to a day's repositories
+ENRICHED_FIELDS = ('streak', 'longest_streak', 'category', 'labels', 'star_velocity')
+ALL_FIELDS = FIELDS + ENRICHED_FIELDS
+
+_FIELD_SET = frozenset(ALL_FIELDS)
+_INTERNED = frozenset(('name', 'language', 'category'))
+
+def _intern(value):
+    """Interned copy of a string field; other values as they are"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+class Repo:
+    """
+    One repository on one trending day.
+
+    Unset fields are None and are left out of to_dict(), so a record
+    round-trips days whose files predate a field (e.g. forks).
+    """
+
+    __slots__ = ALL_FIELDS
+
+    def __init__(self, name, rank=None, description=None, language=None, stars=None, forks=None, link=None,
+                 stars_count=None, forks_count=None, streak=None, longest_streak=None, category=None, labels=None,
+                 star_velocity=None):
+        self.rank = rank
+        self.name = sys.intern(name)
+        self.description = description
+        self.language = _intern(language)
+        self.stars = stars
+        self.forks = forks
+        self.link = link
+        self.stars_count = stars_count
+        self.forks_count = forks_count
+        self.streak = streak
+        self.longest_streak = longest_streak
+        self.category = _intern(category)
+        self.labels = tuple(map(_intern, labels)) if labels is not None else None
+        self.star_velocity = star_velocity
+
+    @classmethod
+    def from_dict(cls, data, streak=None, longest_streak=None, category=None, labels=None, star_velocity=None):
+        """
+        Record of an on-disk repository dict (or a copy of a record).
+
+        Args:
+            data (dict): Repository as stored in a day file; keys outside
+                ALL_FIELDS are dropped
+            streak, longest_streak, category, labels, star_velocity:
+                Enriched fields to set on top; None keeps the value from data
+
+        Returns:
+            Repo: The record
+        """
+        if isinstance(data, Repo):
+            fields = {'streak': streak, 'longest_streak': longest_streak, 'category': category, 'labels': labels,
+                      'star_velocity': star_velocity}
+            return data.replace(**{field: value for field, value in fields.items() if value is not None})
+        get = data.get
+        return cls(data['name'], get('rank'), get('description'), get('language'), get('stars'), get('forks'),
+                   get('link'), get('stars_count'), get('forks_count'),
+                   get('streak') if streak is None else streak,
+                   get('longest_streak') if longest_streak is None else longest_streak,
+                   get('category') if category is None else category,
+                   get('labels') if labels is None else labels,
+                   get('star_velocity') if star_velocity is None else star_velocity)
+
+    def replace(self, **fields):
+        """Copy of the record with some fields changed"""
+        repo = Repo.__new__(Repo)
+        for field in ALL_FIELDS:
+            setattr(repo, field, getattr(self, field))
+        for field, value in fields.items():
+            if field == 'labels' and value is not None:
+                value = tuple(map(_intern, value))
+            setattr(repo, field, _intern(value) if field in _INTERNED else value)
+        return repo
+
+    def to_dict(self):
+        """The record as an on-disk style dict, set fields only"""
+        data = {}
+        for field in ALL_FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                data[field] = list(value) if field == 'labels' else value
+        return data
+
+    # Read-only mapping protocol, for code written against repository dicts
+
+    def __getitem__(self, field):
+        # Like a dict holding every field: unset fields read as None
+        if field not in _FIELD_SET:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def get(self, field, default=None):
+        value = getattr(self, field) if field in _FIELD_SET else None
+        return default if value is None else value
+
+    def __contains__(self, field):
+        return field in _FIELD_SET and getattr(self, field) is not None
+
+    def keys(self):
+        return [field for field in ALL_FIELDS if getattr(self, field) is not None]
+
+    def __eq__(self, other):
+        if isinstance(other, Repo):
+            return all(getattr(self, field) == getattr(other, field) for field in ALL_FIELDS)
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Repo({self.to_dict()!r})"
+
+def to_records(repos):
+    """Records of a day's repository dicts"""
+    return [Repo.from_dict(repo) for repo in repos]
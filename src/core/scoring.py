@@ -0,0 +1,207 @@
+"""
+Weighted multi-label category scoring for Github Trending History.
+
+categorize_repo() assigns exactly one category: the first in
+TECH_CATEGORIES with a matching keyword. Scoring looks at every category
+instead. Each keyword hit adds its field's weight to every category
+listing that keyword; a repository without any hit scores its language's
+fallback category. Keywords are matched the same way as for the primary
+category (see TRENDING_CATEGORY_WORD_BOUNDARIES), so the primary is
+always among the scored categories. A batch of repositories is scored
+in one pass: keyword hits become a (repos x keywords) matrix that is
+multiplied by a (keywords x categories) weight matrix. NumPy is used
+when it is installed; the pure Python path gives the same results.
+
+Confidences are scores normalized per repository. Besides its primary
+category, a repository is labelled with every other category whose
+confidence reaches LABEL_THRESHOLD.
+"""
+
+import os
+import json
+import hashlib
+
+from . import categorizer
+from .categorizer import TECH_CATEGORIES, LANGUAGE_CATEGORIES, get_matcher
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+# Score added per matching keyword, by where it matched
+SCORE_WEIGHTS = {
+    'description': 1.0,
+    'language': 1.5,
+    'fallback': 1.0
+}
+
+# Bumped when keyword hits change for the same rules, so stored labels are recomputed
+SCORING_VERSION = 2
+
+# Minimum confidence for a secondary label (overridable via environment variable)
+LABEL_THRESHOLD = float(os.getenv('TRENDING_LABEL_THRESHOLD', '0.3'))
+
+def scoring_fingerprint(threshold=None, word_boundaries=None):
+    """Short hash of the scoring rules; stored labels are only reused if it matches"""
+    threshold = LABEL_THRESHOLD if threshold is None else threshold
+    word_boundaries = categorizer.WORD_BOUNDARIES if word_boundaries is None else word_boundaries
+    rules = [SCORING_VERSION, TECH_CATEGORIES, LANGUAGE_CATEGORIES, SCORE_WEIGHTS, threshold,
+             word_boundaries]
+    return hashlib.sha1(json.dumps(rules, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+class ScoreTable:
+    """
+    Category scores of a batch of repositories.
+
+    Attributes:
+        categories: Category names, the score columns ('Other' last)
+        scores: One row of category scores per repository
+    """
+
+    def __init__(self, categories, scores):
+        self.categories = categories
+        self.scores = scores
+
+    def __len__(self):
+        return len(self.scores)
+
+    def confidences(self, index):
+        """
+        Normalized scores of one repository.
+
+        Returns:
+            dict: Category -> confidence in [0, 1], for scored categories only
+        """
+        row = [float(score) for score in self.scores[index]]
+        total = sum(row)
+        if not total:
+            return {}
+        return {category: score / total for category, score in zip(self.categories, row) if score}
+
+    def labels(self, index, primary, threshold=None):
+        """
+        Labels of one repository.
+
+        Args:
+            index (int): Repository position in the batch
+            primary (str): Primary category, always the first label
+            threshold (float): Minimum confidence of a secondary label;
+                defaults to LABEL_THRESHOLD
+
+        Returns:
+            list: [category, confidence] pairs, primary first, then
+                secondary labels by decreasing confidence; none when the
+                primary itself did not score
+        """
+        threshold = LABEL_THRESHOLD if threshold is None else threshold
+        confidences = self.confidences(index)
+        if not confidences.get(primary):
+            return [[primary, 0.0]]
+        secondary = sorted(
+            ((category, confidence) for category, confidence in confidences.items()
+             if category != primary and confidence >= threshold),
+            key=lambda item: -item[1]
+        )
+        return [[category, round(confidence, 3)]
+                for category, confidence in [(primary, confidences.get(primary, 0.0))] + secondary]
+
+def _weight_matrix(matcher, categories):
+    """(keywords x categories) matrix: 1 where a category lists a keyword"""
+    columns = {category: column for column, category in enumerate(categories)}
+    weights = [[0.0] * len(categories) for _ in matcher.keywords]
+    for category, keywords in TECH_CATEGORIES.items():
+        for keyword in keywords:
+            weights[matcher.keyword_ids[keyword.lower()]][columns[category]] = 1.0
+    return weights
+
+def score_repos(repos, use_numpy=None, word_boundaries=None):
+    """
+    Score a batch of repositories against every category.
+
+    Args:
+        repos (list): Repository dicts with 'description' and 'language'
+        use_numpy (bool): Force or disable the NumPy path; by default it is
+            used when NumPy is installed
+        word_boundaries (bool): Match keywords as whole words only; defaults
+            to the TRENDING_CATEGORY_WORD_BOUNDARIES setting
+
+    Returns:
+        ScoreTable: One row of category scores per repository
+    """
+    matcher = get_matcher(word_boundaries)
+    categories = list(TECH_CATEGORIES) + ['Other']
+    columns = {category: column for column, category in enumerate(categories)}
+
+    # One scan per field: keyword hits and the language fallback column
+    description_hits = []
+    language_hits = []
+    fallbacks = []
+    for repo in repos:
+        language = repo.get('language', '').lower()
+        description_hits.append(matcher.keyword_hits(repo.get('description', '').lower()))
+        language_hits.append(matcher.keyword_hits(language))
+        # As in categorize_repo(), the language only decides without keyword hits
+        fallback = None
+        if not description_hits[-1] and not language_hits[-1]:
+            fallback = columns.get(LANGUAGE_CATEGORIES.get(language))
+        fallbacks.append(fallback)
+
+    if use_numpy is None:
+        use_numpy = np is not None
+    weights = _weight_matrix(matcher, categories)
+    if use_numpy:
+        scores = _score_numpy(description_hits, language_hits, fallbacks, weights, len(matcher.keywords))
+    else:
+        scores = _score_python(description_hits, language_hits, fallbacks, weights)
+    return ScoreTable(categories, scores)
+
+def _score_python(description_hits, language_hits, fallbacks, weights):
+    """Pure Python scoring"""
+    scores = []
+    for description, language, fallback in zip(description_hits, language_hits, fallbacks):
+        row = [0.0] * (len(weights[0]) if weights else 0)
+        for hits, weight in ((description, SCORE_WEIGHTS['description']),
+                             (language, SCORE_WEIGHTS['language'])):
+            for keyword_id in hits:
+                for column, listed in enumerate(weights[keyword_id]):
+                    if listed:
+                        row[column] += weight
+        if fallback is not None:
+            row[fallback] += SCORE_WEIGHTS['fallback']
+        scores.append(row)
+    return scores
+
+def _score_numpy(description_hits, language_hits, fallbacks, weights, keyword_count):
+    """Vectorized scoring: hit matrix times keyword weight matrix"""
+    hits = np.zeros((len(description_hits), keyword_count))
+    for row, (description, language) in enumerate(zip(description_hits, language_hits)):
+        hits[row, list(description)] += SCORE_WEIGHTS['description']
+        hits[row, list(language)] += SCORE_WEIGHTS['language']
+    scores = hits @ np.asarray(weights).reshape(keyword_count, -1)
+    rows = [row for row, column in enumerate(fallbacks) if column is not None]
+    scores[rows, [fallbacks[row] for row in rows]] += SCORE_WEIGHTS['fallback']
+    return scores
+
+def label_repos(repos, primaries, threshold=None, word_boundaries=None):
+    """
+    Label a batch of repositories with their primary and secondary categories.
+
+    Args:
+        repos (list): Repository dicts
+        primaries (list): Primary category of each repository
+        threshold (float): Minimum confidence of a secondary label
+        word_boundaries (bool): Match keywords as the primaries were matched
+
+    Returns:
+        list: Labels of each repository, see ScoreTable.labels()
+    """
+    # Repositories trend for many days with the same text; score it once
+    unique = {}
+    for repo, primary in zip(repos, primaries):
+        unique.setdefault((repo.get('description', ''), repo.get('language', ''), primary), repo)
+    keys = list(unique)
+    table = score_repos([unique[key] for key in keys], word_boundaries=word_boundaries)
+    labels = {key: table.labels(i, key[2], threshold) for i, key in enumerate(keys)}
+    return [labels[(repo.get('description', ''), repo.get('language', ''), primary)]
+            for repo, primary in zip(repos, primaries)]
@@ -0,0 +1,201 @@
+"""
+Monthly segment files for the trending archive.
+
+A closed month's day files are packed into
+data/trending_data/YYYY/MM.ndjson, one compact JSON array per line,
+followed by a footer line holding each day's byte offset and length, plus
+the size and SHA-1 of the day file it was packed from. A day's content can
+thus be compared with a fingerprint of its loose file without reading or
+hashing it. Keeping the index inside the segment means a segment is
+replaced in one atomic rename, so an index can never point into another
+version of its segment. A day inside a segment is addressed as
+'<segment path>#<DD>', so segmented and loose daily files can be listed
+and read through the same (date_str, source) pairs.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+from datetime import datetime
+
+DATA_DIR = 'data/trending_data'
+SEGMENT_SUFFIX = '.ndjson'
+SEGMENT_VERSION = 1
+
+# Bytes read from the end of a segment to find its footer
+FOOTER_CHUNK = 4096
+
+_index_cache = {}
+
+def split_source(source):
+    """
+    Split a day source into its segment path and day.
+
+    Returns:
+        tuple: (segment_path, day) for a segmented day, or (source, None)
+            for a loose daily file
+    """
+    path, sep, day = source.rpartition('#')
+    if sep and path.endswith(SEGMENT_SUFFIX):
+        return path, day
+    return source, None
+
+def _read_footer(segment_path, size):
+    """
+    Read the footer line of a segment.
+
+    Returns:
+        tuple: (footer offset, decoded footer), or (None, None) if the
+            last line is not a footer
+    """
+    with open(segment_path, 'rb') as f:
+        chunk = b''
+        start = size
+        line_start = -1
+        while start > 0:
+            start = max(0, start - FOOTER_CHUNK)
+            f.seek(start)
+            chunk = f.read(size - start)
+            line_start = chunk.rfind(b'\n', 0, len(chunk) - 1)
+            if line_start >= 0 or start == 0:
+                break
+    offset = start + line_start + 1
+    try:
+        footer = json.loads(chunk[line_start + 1:])
+    except ValueError:
+        return None, None
+    if not isinstance(footer, dict):
+        return None, None
+    return offset, footer
+
+def read_index(segment_path):
+    """
+    Read a segment's day index, cached until the segment changes.
+
+    Every day's offset and length is checked against the segment, so a
+    damaged or mismatched index raises ValueError instead of returning
+    another day's bytes.
+
+    Returns:
+        dict: Day (DD) -> [offset, length, size, sha1]
+    """
+    stat = os.stat(segment_path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _index_cache.get(segment_path)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    end, index = _read_footer(segment_path, stat.st_size)
+    if index is None:
+        raise ValueError(f"No index footer in {segment_path}")
+    if index.get('version') != SEGMENT_VERSION:
+        raise ValueError(f"Unsupported segment version in {segment_path}")
+
+    # Days are consecutive lines ending before the footer
+    position = 0
+    for day, (offset, length, *_) in sorted(index['days'].items(), key=lambda item: item[1][0]):
+        if offset != position or offset + length >= end:
+            raise ValueError(f"Index of {segment_path} does not match the segment (day {day})")
+        position = offset + length + 1
+    if position != end:
+        raise ValueError(f"Index of {segment_path} does not match the segment")
+    _index_cache[segment_path] = (key, index['days'])
+    return index['days']
+
+def read_segment_day(segment_path, day):
+    """Read the raw JSON bytes of one day from a segment"""
+    offset, length = read_index(segment_path)[day][:2]
+    with open(segment_path, 'rb') as f:
+        f.seek(offset)
+        return f.read(length)
+
+def day_digest(raw):
+    """[size, sha1] identifying a day by the bytes it was stored as"""
+    return [len(raw), hashlib.sha1(raw).hexdigest()]
+
+def write_segment(segment_path, days, digests=None):
+    """
+    Write a segment with its index footer atomically.
+
+    Args:
+        segment_path (str): Destination YYYY/MM.ndjson path
+        days (dict): Day (DD) -> list of repositories
+        digests (dict): Day (DD) -> [size, sha1] of the file each day was
+            packed from; defaults to the digest of the packed line
+    """
+    digests = digests or {}
+    index = {}
+    tmp_path = segment_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        for day in sorted(days):
+            line = json.dumps(days[day], ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            index[day] = [f.tell(), len(line)] + (digests.get(day) or day_digest(line))
+            f.write(line + b'\n')
+        footer = json.dumps({'version': SEGMENT_VERSION, 'days': index}, separators=(',', ':'))
+        f.write(footer.encode('utf-8') + b'\n')
+    os.replace(tmp_path, segment_path)
+
+def compact_month(year_dir, month):
+    """
+    Pack one month's loose day files into its segment.
+
+    Days already in the segment are kept; a loose file for the same day
+    replaces the packed copy. Every day keeps the digest of the file it
+    was first packed from. The loose month directory is removed once the
+    segment is written.
+
+    Args:
+        year_dir (str): data/trending_data/YYYY directory
+        month (str): Month as MM
+
+    Returns:
+        int: Number of days in the segment
+    """
+    segment_path = os.path.join(year_dir, month + SEGMENT_SUFFIX)
+    month_dir = os.path.join(year_dir, month)
+
+    days = {}
+    digests = {}
+    if os.path.exists(segment_path):
+        for day, entry in read_index(segment_path).items():
+            days[day] = json.loads(read_segment_day(segment_path, day))
+            digests[day] = entry[2:4]
+    if os.path.isdir(month_dir):
+        for entry in os.scandir(month_dir):
+            if entry.name.endswith('.json') and entry.is_file():
+                with open(entry.path, 'rb') as f:
+                    raw = f.read()
+                days[entry.name[:-5]] = json.loads(raw)
+                digests[entry.name[:-5]] = day_digest(raw)
+
+    write_segment(segment_path, days, digests)
+    if os.path.isdir(month_dir):
+        shutil.rmtree(month_dir)
+    return len(days)
+
+def compact_archive(data_dir=DATA_DIR, before=None):
+    """
+    Pack every closed month that still has loose day files.
+
+    Args:
+        data_dir (str): Root of the trending archive
+        before (str): Only compact months before this YYYY-MM; defaults
+            to the current month, which is still being written
+
+    Returns:
+        list: (YYYY-MM, day count) for every compacted month
+    """
+    before = before or datetime.now().strftime('%Y-%m')
+    compacted = []
+    for year in sorted(os.listdir(data_dir)):
+        year_dir = os.path.join(data_dir, year)
+        if not os.path.isdir(year_dir):
+            continue
+        for month in sorted(os.listdir(year_dir)):
+            if not os.path.isdir(os.path.join(year_dir, month)) or f"{year}-{month}" >= before:
+                continue
+            count = compact_month(year_dir, month)
+            compacted.append((f"{year}-{month}", count))
+            print(f"Compacted {year}-{month} into {month}{SEGMENT_SUFFIX} ({count} days)")
+    return compacted
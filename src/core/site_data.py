@@ -0,0 +1,206 @@
+"""
+Normalized data payloads for the generated site.
+
+Repositories are written once to a table keyed by integer id (the id the
+history store already assigns). Each month of trending data is then a
+compact shard: per day, parallel arrays of repo ids, ranks and streaks,
+plus stars and forks only for entries whose value changed since the
+repo's previous appearance in that month, the stars gained that day
+where the history store knows them, and sparse overrides for the days a
+description, language or category differs from the table. The
+page rehydrates full repo objects from the table and a month shard.
+
+A shard only changes with its days, the days before them (streaks, star
+velocity and first-seen info carry over) and the table rows of its
+repositories. Each shard is keyed on those (see month_keys()), so a run
+re-encodes only new or changed months, normally just the current one.
+"""
+
+import json
+import hashlib
+
+from jinja2.utils import htmlsafe_json_dumps
+
+REPO_FIELDS = ['name', 'description', 'language', 'category']
+
+# Bumped when the shard encoding changes, so every month is encoded again
+SHARD_VERSION = 1
+
+def build_repo_table(history, categories):
+    """
+    Build the repository table shared by every shard.
+
+    Args:
+        history (RepoHistory): Shared history index
+        categories (list): Category names; rows store an index into it
+
+    Returns:
+        dict: {'fields': [...], 'categories': [...], 'repos': [[...], ...]}
+            where a repo's row position is its id
+    """
+    infos = [history.info[name] for name in history.names()]
+    return {
+        'fields': REPO_FIELDS,
+        'categories': categories,
+        'repos': [_repo_row(repo, category, categories)
+                  for repo, category in zip(infos, history.categorize(infos))]
+    }
+
+def _repo_row(repo, category, categories):
+    """Table row of a repository: name, description, language, category id"""
+    return [
+        repo['name'],
+        repo.get('description', ''),
+        repo.get('language', ''),
+        categories.index(category) if category in categories else categories.index('Other')
+    ]
+
+def encode_month(history, dates, table):
+    """
+    Encode one month of trending days against the repository table.
+
+    Args:
+        history (RepoHistory): Shared history index
+        dates (list): The month's dates in ascending order
+        table (dict): Repository table from build_repo_table()
+
+    Returns:
+        dict: {'days': {DD: {...}}} where each day holds parallel 'ids',
+            'ranks', 'streaks' and 'longest' arrays, 'stars'/'forks' as
+            [position, value] pairs for values that changed, 'velocity'
+            as [position, stars gained] pairs for entries that have one,
+            and 'overrides' as [position, field index, value] triples
+    """
+    store = history.store
+    rows = table['repos']
+    last_stars = {}
+    last_forks = {}
+    days = {}
+    for date_str, day_repos in history.iter_days(dates):
+        day = {'ids': [], 'ranks': [], 'streaks': [], 'longest': [], 'stars': [], 'forks': [], 'velocity': [],
+               'overrides': []}
+        for position, (repo, category) in enumerate(zip(day_repos, history.categorize(day_repos))):
+            name = repo['name']
+            repo_id = store.repo_id(name)
+            day['ids'].append(repo_id)
+            day['ranks'].append(repo['rank'])
+            day['streaks'].append(history.streak_as_of(name, date_str) or 1)
+            day['longest'].append(history.longest_streak(name, date_str) or 1)
+            if last_stars.get(repo_id) != repo.get('stars'):
+                day['stars'].append([position, repo.get('stars')])
+                last_stars[repo_id] = repo.get('stars')
+            if last_forks.get(repo_id) != repo.get('forks'):
+                day['forks'].append([position, repo.get('forks')])
+                last_forks[repo_id] = repo.get('forks')
+            velocity = history.velocity_on(name, date_str)
+            if velocity is not None:
+                day['velocity'].append([position, velocity])
+            row = _repo_row(repo, category, table['categories'])
+            for field in range(1, len(REPO_FIELDS)):
+                if row[field] != rows[repo_id][field]:
+                    day['overrides'].append([position, field, row[field]])
+        days[date_str[8:]] = day
+    return {'days': days}
+
+def group_by_month(dates):
+    """Group YYYY-MM-DD dates into {YYYY-MM: [dates]} in date order"""
+    months = {}
+    for date_str in dates:
+        months.setdefault(date_str[:7], []).append(date_str)
+    return months
+
+def month_keys(history, months, table):
+    """
+    Key of the inputs of every month shard.
+
+    The key chains the fingerprints of every day up to the month's end
+    with the table rows of the month's repositories, the category names
+    and SHARD_VERSION. Closed months keep their key until a past day file
+    or a category of one of their repositories changes.
+
+    Args:
+        history (RepoHistory): Shared history index
+        months (dict): {YYYY-MM: [dates]} in date order
+        table (dict): Repository table from build_repo_table()
+
+    Returns:
+        dict: YYYY-MM -> key, or None for a month after a day without a
+            recorded fingerprint (it is always encoded)
+    """
+    store = history.store
+    month_repos = {}
+    for repo_id in range(len(store.names)):
+        for i in range(store.offsets[repo_id], store.offsets[repo_id + 1]):
+            month_repos.setdefault(store.date_string(store.ordinals[i])[:7], set()).add(repo_id)
+
+    chain = hashlib.sha1(json.dumps([SHARD_VERSION, table['fields'], table['categories']]).encode('utf-8'))
+    known = True
+    keys = {}
+    for month, month_dates in months.items():
+        for date_str in month_dates:
+            fingerprint = history.day_fingerprint(date_str)
+            known = known and fingerprint is not None
+            chain.update((fingerprint['sha1'] if fingerprint else '').encode('ascii'))
+        rows = [table['repos'][repo_id] for repo_id in sorted(month_repos.get(month, ()))]
+        key = chain.copy()
+        key.update(json.dumps(rows, ensure_ascii=False).encode('utf-8'))
+        keys[month] = key.hexdigest() if known else None
+    return keys
+
+def write_site_data(history, dates, categories, writer, data_dir='data'):
+    """
+    Write the repository table, one shard per month and a manifest.
+
+    Months whose key is unchanged since their shard was written are not
+    encoded again.
+
+    Args:
+        history (RepoHistory): Shared history index
+        dates (list): Every date with trending data
+        categories (list): Category names
+        writer (SiteWriter): Site output writer; unchanged files are skipped
+        data_dir (str): Site data directory relative to the site root
+    """
+    # Per-date shards were replaced by month shards
+    writer.remove_tree(f'{data_dir}/dates')
+
+    table = build_repo_table(history, categories)
+    writer.write_json(f'{data_dir}/repos.json', table)
+
+    months = group_by_month(dates)
+    keys = month_keys(history, months, table)
+    encoded = 0
+    for month, month_dates in months.items():
+        relpath = f'{data_dir}/months/{month}.json'
+        if writer.is_current(relpath, keys[month]):
+            continue
+        writer.write_json(relpath, encode_month(history, month_dates, table), keys[month])
+        encoded += 1
+
+    # Drop shards of months that are no longer in the archive
+    writer.prune(f'{data_dir}/months', keep={f'{data_dir}/months/{month}.json' for month in months},
+                 suffix='.json')
+
+    manifest = {'dates': dates, 'repos': f'{data_dir}/repos.json', 'months': f'{data_dir}/months/'}
+    writer.write_json(f'{data_dir}/manifest.json', manifest)
+    print(f'Generated repo table and {len(months)} month shards ({encoded} encoded) in {writer.path(data_dir)}')
+
+def iter_inline_data(history, dates, categories):
+    """
+    Serialize the write_site_data() payload for embedding in the page.
+
+    The payload is produced one month at a time so the page can be
+    rendered as a stream without the whole archive held as one string.
+    The chunks join into the same HTML-safe JSON as Jinja's tojson filter.
+
+    Yields:
+        Markup: Consecutive chunks of the {'months': ..., 'table': ...} object
+    """
+    table = build_repo_table(history, categories)
+    yield '{"months": {'
+    for i, (month, month_dates) in enumerate(group_by_month(dates).items()):
+        yield (', ' if i else '') + htmlsafe_json_dumps(month) + ': '
+        yield htmlsafe_json_dumps(encode_month(history, month_dates, table), sort_keys=True)
+    yield '}, "table": '
+    yield htmlsafe_json_dumps(table, sort_keys=True)
+    yield '}'
@@ -0,0 +1,262 @@
+"""
+Incremental output writing for the generated site.
+
+Every file the site generator produces goes through a SiteWriter. New
+content is staged in a temporary file and hashed; it only replaces the
+published file when the hash differs, so unchanged pages, data shards and
+static assets keep their bytes and mtimes (no git churn, no Pages
+redeploy). The hashes are kept in a manifest next to the analyzer state so
+the next run can skip unchanged outputs without re-reading them. An
+output can also be recorded with the key of the inputs it was generated
+from; while the key holds, the caller can skip generating it at all
+(see is_current()).
+"""
+
+import os
+import json
+import shutil
+import hashlib
+
+SITE_MANIFEST_FILE = 'data/cache/site_manifest.json'
+SITE_MANIFEST_VERSION = 1
+
+# Template output events buffered per write while streaming a page
+RENDER_BUFFER_SIZE = 64
+
+_CHUNK_SIZE = 1 << 16
+
+def hash_file(path):
+    """SHA-1 hex digest of a file's content"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class SiteWriter:
+    """
+    Write site outputs under a root directory, skipping unchanged files.
+
+    Paths passed to the write methods are relative to the root and use
+    forward slashes. Call save() once the site is generated to persist the
+    manifest and print which outputs were rebuilt and which were skipped.
+    """
+
+    def __init__(self, root, manifest_file=SITE_MANIFEST_FILE):
+        self.root = root
+        self.manifest_file = manifest_file
+        self.manifest = self._load_manifest()
+        self.rebuilt = []
+        self.skipped = []
+        self.removed = []
+
+    def _load_manifest(self):
+        """Read the hash manifest, or start an empty one"""
+        try:
+            with open(self.manifest_file, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get('version') != SITE_MANIFEST_VERSION or manifest.get('root') != self.root:
+            return {}
+        return manifest.get('files', {})
+
+    def path(self, relpath):
+        """Absolute output path of a relative site path"""
+        return os.path.join(self.root, *relpath.split('/'))
+
+    def _unchanged(self, relpath, sha1):
+        """Check whether the published file already has the given content"""
+        path = self.path(relpath)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        entry = self.manifest.get(relpath)
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns:
+            return entry['sha1'] == sha1
+        # Not recorded, or touched outside the generator: compare content
+        return hash_file(path) == sha1
+
+    def is_current(self, relpath, key):
+        """
+        Check whether an output was generated from inputs with the given key.
+
+        A current output is counted as skipped and need not be generated
+        again. The published file must still have the recorded content.
+
+        Args:
+            relpath (str): Output path relative to the site root
+            key (str): Key of the inputs, as passed to write_json()
+
+        Returns:
+            bool: True if the output is current
+        """
+        entry = self.manifest.get(relpath)
+        if not key or not entry or entry.get('key') != key:
+            return False
+        try:
+            stat = os.stat(self.path(relpath))
+        except OSError:
+            return False
+        if entry['size'] != stat.st_size:
+            return False
+        if entry['mtime'] != stat.st_mtime_ns:
+            # Checkouts reset mtimes; hashing is still cheaper than regenerating
+            if hash_file(self.path(relpath)) != entry['sha1']:
+                return False
+            entry['mtime'] = stat.st_mtime_ns
+        self.skipped.append(relpath)
+        return True
+
+    def _record(self, relpath, sha1):
+        """Remember the hash and stat of a published file"""
+        stat = os.stat(self.path(relpath))
+        self.manifest[relpath] = {'sha1': sha1, 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+    def _publish(self, tmp_path, relpath):
+        """
+        Replace a published file with staged content if it changed.
+
+        Returns:
+            bool: True if the file was rewritten
+        """
+        sha1 = hash_file(tmp_path)
+        if self._unchanged(relpath, sha1):
+            os.remove(tmp_path)
+            self.skipped.append(relpath)
+            changed = False
+        else:
+            os.replace(tmp_path, self.path(relpath))
+            self.rebuilt.append(relpath)
+            changed = True
+        self._record(relpath, sha1)
+        return changed
+
+    def _staged(self, relpath, write):
+        """Stage an output through write(tmp_path), then publish it"""
+        path = self.path(relpath)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        try:
+            write(tmp_path)
+            return self._publish(tmp_path, relpath)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def render(self, tmpl, relpath, **context):
+        """
+        Stream a rendered template into an output file.
+
+        Args:
+            tmpl (Template): Jinja template
+            relpath (str): Output path relative to the site root
+            **context: Template variables
+
+        Returns:
+            bool: True if the file was rewritten
+        """
+        def write(tmp_path):
+            stream = tmpl.stream(**context)
+            stream.enable_buffering(RENDER_BUFFER_SIZE)
+            stream.dump(tmp_path, encoding='utf-8')
+        return self._staged(relpath, write)
+
+    def write_json(self, relpath, data, key=None):
+        """
+        Write compact JSON to an output file.
+
+        Args:
+            relpath (str): Output path relative to the site root
+            data: JSON-serializable content
+            key (str): Key of the inputs data was generated from, recorded
+                for is_current()
+
+        Returns:
+            bool: True if the file was rewritten
+        """
+        def write(tmp_path):
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        changed = self._staged(relpath, write)
+        if key:
+            self.manifest[relpath]['key'] = key
+        return changed
+
+    def copy_file(self, source, relpath):
+        """Copy a file into the site if its content changed; returns True if copied"""
+        sha1 = hash_file(source)
+        if self._unchanged(relpath, sha1):
+            self.skipped.append(relpath)
+            self._record(relpath, sha1)
+            return False
+        return self._staged(relpath, lambda tmp_path: shutil.copyfile(source, tmp_path))
+
+    def sync_tree(self, source_dir, reldir):
+        """
+        Mirror a directory into the site by content hash.
+
+        Changed and new files are copied, unchanged ones are left alone and
+        files that no longer exist in source_dir are removed.
+
+        Args:
+            source_dir (str): Directory to mirror
+            reldir (str): Destination directory relative to the site root
+        """
+        wanted = set()
+        for directory, _, files in os.walk(source_dir):
+            for name in sorted(files):
+                source = os.path.join(directory, name)
+                relpath = '/'.join([reldir] + os.path.relpath(source, source_dir).split(os.sep))
+                wanted.add(relpath)
+                self.copy_file(source, relpath)
+        self.prune(reldir, keep=wanted)
+
+    def prune(self, reldir, keep=(), suffix=''):
+        """Remove files under a site directory that are not in keep, and empty subdirectories"""
+        target = self.path(reldir)
+        for directory, _, files in os.walk(target, topdown=False):
+            for name in files:
+                if not name.endswith(suffix):
+                    continue
+                path = os.path.join(directory, name)
+                relpath = '/'.join([reldir] + os.path.relpath(path, target).split(os.sep))
+                if relpath not in keep:
+                    self.remove(relpath)
+            if directory != target and not os.listdir(directory):
+                os.rmdir(directory)
+
+    def remove(self, relpath):
+        """Remove an output file"""
+        path = self.path(relpath)
+        if os.path.exists(path):
+            os.remove(path)
+            self.removed.append(relpath)
+        self.manifest.pop(relpath, None)
+
+    def remove_tree(self, reldir):
+        """Remove an output directory and everything under it"""
+        if os.path.isdir(self.path(reldir)):
+            self.prune(reldir)
+            shutil.rmtree(self.path(reldir))
+
+    def save(self):
+        """Persist the hash manifest and report what was written"""
+        directory = os.path.dirname(self.manifest_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.manifest_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': SITE_MANIFEST_VERSION, 'root': self.root, 'files': self.manifest},
+                      f, separators=(',', ':'), sort_keys=True)
+        os.replace(tmp_path, self.manifest_file)
+
+        for relpath in self.rebuilt:
+            print(f'Rebuilt {self.path(relpath)}')
+        for relpath in self.removed:
+            print(f'Removed {self.path(relpath)}')
+        if self.skipped:
+            print(f'Skipped {len(self.skipped)} unchanged output(s): {", ".join(self.skipped)}')
+        print(f'Site output: {len(self.rebuilt)} rebuilt, {len(self.skipped)} skipped, '
+              f'{len(self.removed)} removed')
@@ -0,0 +1,149 @@
+"""
+Raw HTML snapshots of the trending page.
+
+The fetcher keeps every page it parses as data/raw_html/YYYY/MM/DD.html.gz
+next to the parsed day file. When GitHub changes its markup and fields
+come out empty, `python main.py reparse` re-extracts a date range from
+the snapshots with the current parser, in a process pool, and rewrites
+only the day files whose parsed output changed.
+"""
+
+import os
+import gzip
+from datetime import datetime
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+from .loader import DATA_DIR, LOAD_WORKERS, MIN_PARALLEL_FILES, discover_day_files, read_day
+from .parser import parse_trending_html
+from .segments import SEGMENT_SUFFIX, compact_month, split_source
+
+RAW_HTML_DIR = 'data/raw_html'
+SNAPSHOT_SUFFIX = '.html.gz'
+
+def snapshot_path(day, raw_dir=RAW_HTML_DIR):
+    """Path of the snapshot of a day (datetime or YYYY-MM-DD)"""
+    if isinstance(day, str):
+        day = datetime.strptime(day, '%Y-%m-%d')
+    return os.path.join(raw_dir, str(day.year), f"{day.month:02d}", f"{day.day:02d}{SNAPSHOT_SUFFIX}")
+
+def save_snapshot(html, day=None, raw_dir=RAW_HTML_DIR):
+    """
+    Store a page's raw HTML, gzip-compressed and replaced atomically.
+
+    Args:
+        html (str): Page HTML
+        day (datetime): Date of the page; defaults to today
+        raw_dir (str): Snapshot archive root
+
+    Returns:
+        str: Snapshot path
+    """
+    path = snapshot_path(day or datetime.now(), raw_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    # A fixed mtime keeps identical pages byte-identical
+    with gzip.GzipFile(tmp_path, 'wb', compresslevel=9, mtime=0) as f:
+        f.write(html.encode('utf-8'))
+    os.replace(tmp_path, path)
+    return path
+
+def read_snapshot(path):
+    """Read a snapshot's HTML"""
+    with gzip.open(path, 'rb') as f:
+        return f.read().decode('utf-8')
+
+def discover_snapshots(raw_dir=RAW_HTML_DIR, start=None, end=None):
+    """
+    Find stored snapshots, optionally within a date range.
+
+    Args:
+        raw_dir (str): Snapshot archive root
+        start (str): First date (YYYY-MM-DD), inclusive
+        end (str): Last date (YYYY-MM-DD), inclusive
+
+    Returns:
+        list: (date_str, path) tuples sorted by date
+    """
+    snapshots = []
+    for root, _, files in os.walk(raw_dir):
+        parts = os.path.relpath(root, raw_dir).split(os.sep)
+        if len(parts) != 2:
+            continue
+        for name in files:
+            if not name.endswith(SNAPSHOT_SUFFIX):
+                continue
+            date_str = f"{parts[0]}-{parts[1]}-{name[:-len(SNAPSHOT_SUFFIX)]}"
+            if (start and date_str < start) or (end and date_str > end):
+                continue
+            snapshots.append((date_str, os.path.join(root, name)))
+    return sorted(snapshots)
+
+def _reparse_day(item, backend=None):
+    """
+    Parse one snapshot and compare it with the stored day (pool worker).
+
+    Returns:
+        tuple: (date_str, repos) where repos is None if unchanged
+    """
+    date_str, path, source = item
+    repos = parse_trending_html(read_snapshot(path), backend)
+    if source is not None and read_day(source) == repos:
+        return date_str, None
+    return date_str, repos
+
+def reparse(start=None, end=None, workers=None, raw_dir=RAW_HTML_DIR, data_dir=DATA_DIR, backend=None):
+    """
+    Re-extract day files from stored snapshots with the current parser.
+
+    Only days whose parsed output changed are written. A changed day of a
+    packed month is written as a loose file and the month is repacked.
+
+    Args:
+        start (str): First date (YYYY-MM-DD), inclusive
+        end (str): Last date (YYYY-MM-DD), inclusive
+        workers (int): Pool size; defaults to TRENDING_LOAD_WORKERS, then
+            the CPU count. 1 parses in this process
+        raw_dir (str): Snapshot archive root
+        data_dir (str): Trending archive root
+        backend (str): Parser backend, see parser.get_backend()
+
+    Returns:
+        list: Dates whose day file was rewritten
+    """
+    from .fetcher import save_trending_data
+
+    snapshots = discover_snapshots(raw_dir, start, end)
+    sources = dict(discover_day_files(data_dir))
+    items = [(date_str, path, sources.get(date_str)) for date_str, path in snapshots]
+    workers = workers or LOAD_WORKERS or os.cpu_count() or 1
+    parse = partial(_reparse_day, backend=backend)
+
+    if workers == 1 or len(items) < MIN_PARALLEL_FILES:
+        results = map(parse, items)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(parse, items, chunksize=max(1, len(items) // (workers * 4)))
+
+    changed = []
+    repack = set()
+    try:
+        for date_str, repos in results:
+            if repos is None:
+                continue
+            save_trending_data(repos, data_dir, datetime.strptime(date_str, '%Y-%m-%d'))
+            changed.append(date_str)
+            segment_path = split_source(sources.get(date_str, ''))[0]
+            if segment_path.endswith(SEGMENT_SUFFIX):
+                repack.add((os.path.dirname(segment_path), os.path.basename(segment_path)[:-len(SEGMENT_SUFFIX)]))
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    for year_dir, month in sorted(repack):
+        compact_month(year_dir, month)
+
+    print(f"Reparsed {len(items)} snapshot(s): {len(changed)} day file(s) rewritten, "
+          f"{len(items) - len(changed)} unchanged")
+    return changed
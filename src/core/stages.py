@@ -0,0 +1,83 @@
+"""
+Stage timing for the analysis pipeline.
+
+Pipeline steps run inside StageTimer.stage() blocks, possibly from
+several threads at once; report() prints the wall time of every stage
+and of the whole run. With memory tracing on (TRENDING_TRACE_MEMORY=1),
+tracemalloc also records the peak of traced memory while each stage ran.
+"""
+
+import os
+import threading
+import tracemalloc
+from time import perf_counter
+from contextlib import contextmanager
+
+# Record per-stage peak memory with tracemalloc (overridable via environment variable)
+TRACE_MEMORY = os.getenv('TRENDING_TRACE_MEMORY', '0') == '1'
+
+class StageTimer:
+    """
+    Wall time, and optionally peak traced memory, per named pipeline stage.
+
+    Stages may overlap; their times then add up to more than the total,
+    and each overlapping stage's peak includes the others' allocations.
+    """
+
+    def __init__(self, trace_memory=None):
+        self.timings = {}
+        self.peaks = {}
+        self.started = perf_counter()
+        self.trace_memory = TRACE_MEMORY if trace_memory is None else trace_memory
+        self._lock = threading.Lock()
+        self._active = {}
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _sample_peak(self):
+        """
+        Fold the peak since the last sample into every running stage.
+
+        tracemalloc keeps a single peak, so it is reset at every stage
+        boundary and each running stage keeps the highest value seen.
+        Must be called with the lock held.
+        """
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        for key, (name, stage_peak) in self._active.items():
+            self._active[key] = (name, max(stage_peak, peak))
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as the stage name"""
+        key = object()
+        if self.trace_memory:
+            with self._lock:
+                self._sample_peak()
+                self._active[key] = (name, tracemalloc.get_traced_memory()[0])
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - start
+            with self._lock:
+                self.timings[name] = self.timings.get(name, 0.0) + elapsed
+                if self.trace_memory:
+                    self._sample_peak()
+                    _, peak = self._active.pop(key)
+                    self.peaks[name] = max(self.peaks.get(name, 0), peak)
+
+    def run(self, name, func, *args, **kwargs):
+        """Call func as the stage name and return its result"""
+        with self.stage(name):
+            return func(*args, **kwargs)
+
+    def report(self):
+        """Print every stage's wall time (and peak memory) in the order the stages finished"""
+        total = perf_counter() - self.started
+        print(f'Stage timings (total {total:.2f}s):')
+        for name, seconds in self.timings.items():
+            if name in self.peaks:
+                print(f'  {name:<20} {seconds:8.2f}s  peak {self.peaks[name] / 2**20:8.1f} MiB')
+            else:
+                print(f'  {name:<20} {seconds:8.2f}s')
@@ -0,0 +1,339 @@
+"""
+Compact columnar history store for Github Trending History.
+
+Repository names and dates are interned to integer ids. Every trending
+appearance is one row across typed arrays (date ordinal, rank, star
+count), grouped per repository through an offsets array, so a
+repository's history is the slice ``offsets[id]:offsets[id + 1]``. The
+on-disk form is the same arrays laid out back to back, which lets load()
+memory-map the file and use the columns without copying them.
+"""
+
+import os
+import sys
+import math
+import mmap
+import struct
+from array import array
+from bisect import bisect_right
+from datetime import date
+
+from .streaks import compute_streaks
+from .velocity import UNKNOWN_STARS, compute_velocity
+
+STORE_MAGIC = b'GTHS'
+STORE_VERSION = 3
+
+# magic, version, byte order, repo count, date count, entry count, names size
+_HEADER = struct.Struct('<4sHH4I')
+_ALIGN = 8
+
+def _padding(size):
+    """Bytes needed to pad a section to the store alignment"""
+    return -size % _ALIGN
+
+class HistoryStore:
+    """
+    Array-backed store of every repository's trending appearances.
+
+    Days are appended in date order with add_day(). Appended rows are kept
+    in a pending list and merged into the per-repository layout on the
+    next query, so a batch of new days costs a single merge. Streaks and
+    star velocities are computed for all repositories at once by the
+    streak and velocity engines.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.name_ids = {}
+        self.dates = []
+        self.date_ordinals = array('i')
+        self.offsets = array('I', [0])
+        self.ordinals = array('i')
+        self.ranks = array('H')
+        self.stars = array('i')
+        self._pending = []
+        self._streak_table = None
+        self._velocity = None
+        self._date_strings = {}
+        self._mmap = None
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def entry_count(self):
+        """Number of trending appearances in the store"""
+        return len(self.ordinals) + len(self._pending)
+
+    def repo_id(self, name):
+        """Get the integer id of a repository name, or None if unknown"""
+        return self.name_ids.get(name)
+
+    def intern_repo(self, name):
+        """Get the integer id of a repository name, assigning one if needed"""
+        repo_id = self.name_ids.get(name)
+        if repo_id is None:
+            repo_id = self.name_ids[name] = len(self.names)
+            self.names.append(name)
+        return repo_id
+
+    def add_day(self, date_str, entries):
+        """
+        Append one day of appearances.
+
+        Args:
+            date_str (str): Date in YYYY-MM-DD format, after every stored date
+            entries (list): (repo name, rank, star count) tuples for that
+                day; the star count is None when unknown
+        """
+        if self.dates and date_str <= self.dates[-1]:
+            raise ValueError(f"Days must be added in date order: {date_str} after {self.dates[-1]}")
+
+        ordinal = date.fromisoformat(date_str).toordinal()
+        self.dates.append(date_str)
+        self.date_ordinals.append(ordinal)
+        self._date_strings[ordinal] = date_str
+
+        for name, rank, stars in entries:
+            self._pending.append((self.intern_repo(name), ordinal, rank, UNKNOWN_STARS if stars is None else stars))
+
+    def freeze(self):
+        """Merge pending appearances into the per-repository column layout"""
+        if not self._pending:
+            return
+
+        pending = {}
+        for row in self._pending:
+            pending.setdefault(row[0], []).append(row)
+
+        offsets = array('I', [0])
+        ordinals = array('i')
+        ranks = array('H')
+        stars = array('i')
+        merged_repos = len(self.offsets) - 1
+        for repo_id in range(len(self.names)):
+            if repo_id < merged_repos:
+                start, end = self.offsets[repo_id], self.offsets[repo_id + 1]
+                ordinals.frombytes(memoryview(self.ordinals[start:end]).cast('B'))
+                ranks.frombytes(memoryview(self.ranks[start:end]).cast('B'))
+                stars.frombytes(memoryview(self.stars[start:end]).cast('B'))
+            for _, ordinal, rank, count in pending.get(repo_id, ()):
+                ordinals.append(ordinal)
+                ranks.append(rank)
+                stars.append(count)
+            offsets.append(len(ordinals))
+
+        self.offsets, self.ordinals, self.ranks, self.stars = offsets, ordinals, ranks, stars
+        # The columns no longer point into a loaded file's mapping
+        self._mmap = None
+        self._pending = []
+        self._streak_table = None
+        self._velocity = None
+
+    @property
+    def streak_table(self):
+        """Streaks and runs of every repository, computed in one batch"""
+        self.freeze()
+        if self._streak_table is None:
+            self._streak_table = compute_streaks(self.ordinals, self.offsets)
+        return self._streak_table
+
+    @property
+    def velocity(self):
+        """Star velocity of every appearance, computed in one batch"""
+        self.freeze()
+        if self._velocity is None:
+            self._velocity = compute_velocity(self.ordinals, self.stars, self.offsets)
+        return self._velocity
+
+    def _span(self, name):
+        """Get the (start, end) rows of a repository, or None if unknown"""
+        repo_id = self.name_ids.get(name)
+        if repo_id is None:
+            return None
+        self.freeze()
+        return self.offsets[repo_id], self.offsets[repo_id + 1]
+
+    def date_string(self, ordinal):
+        """Get the YYYY-MM-DD string of a stored date ordinal"""
+        date_str = self._date_strings.get(ordinal)
+        if date_str is None:
+            date_str = self._date_strings[ordinal] = date.fromordinal(ordinal).isoformat()
+        return date_str
+
+    def history(self, name):
+        """
+        Get a repository's appearances.
+
+        Returns:
+            list: (date_str, rank) tuples in date order
+        """
+        span = self._span(name)
+        if span is None:
+            return []
+        start, end = span
+        return [(self.date_string(self.ordinals[i]), self.ranks[i]) for i in range(start, end)]
+
+    def appearance_count(self, name):
+        """Number of days a repository was trending"""
+        span = self._span(name)
+        return span[1] - span[0] if span else 0
+
+    def latest_rank(self, name):
+        """Rank of a repository at its latest appearance, or None"""
+        span = self._span(name)
+        return self.ranks[span[1] - 1] if span and span[1] > span[0] else None
+
+    def current_streak(self, name):
+        """Streak ending at a repository's latest appearance"""
+        repo_id = self.name_ids.get(name)
+        return int(self.streak_table.current[repo_id]) if repo_id is not None else 0
+
+    def longest_streak(self, name, date_str=None):
+        """
+        Longest streak of a repository.
+
+        Args:
+            name (str): Repository name (owner/repo)
+            date_str (str): Only count days up to this date, if given
+        """
+        repo_id = self.name_ids.get(name)
+        if repo_id is None:
+            return 0
+        if date_str is None:
+            return int(self.streak_table.longest[repo_id])
+        return self.streak_table.longest_as_of(repo_id, date.fromisoformat(date_str).toordinal())
+
+    def runs(self, name):
+        """
+        Every run of consecutive trending days of a repository.
+
+        Returns:
+            list: (start date_str, length in days) tuples in date order
+        """
+        repo_id = self.name_ids.get(name)
+        if repo_id is None:
+            return []
+        return [(self.date_string(start), length) for start, length in self.streak_table.runs(repo_id)]
+
+    def streak_as_of(self, name, date_str):
+        """
+        Streak ending at a repository's last appearance on or before a date.
+
+        Returns:
+            int: Consecutive trending days, or 0 if it had not trended yet
+        """
+        span = self._span(name)
+        if span is None:
+            return 0
+        start, end = span
+        ordinal = date.fromisoformat(date_str).toordinal()
+        position = bisect_right(self.ordinals, ordinal, start, end)
+        return int(self.streak_table.entry_streaks[position - 1]) if position > start else 0
+
+    def star_velocity(self, name):
+        """
+        Stars a repository gained per day while trending.
+
+        Returns:
+            list: (date_str, stars gained since the day before) tuples in
+                date order, for appearances that have a velocity
+        """
+        span = self._span(name)
+        if span is None:
+            return []
+        velocity = self.velocity
+        return [(self.date_string(self.ordinals[i]), int(velocity[i]))
+                for i in range(*span) if not math.isnan(velocity[i])]
+
+    def velocity_on(self, name, date_str):
+        """Stars a repository gained on a date it was trending, or None"""
+        span = self._span(name)
+        if span is None:
+            return None
+        start, end = span
+        ordinal = date.fromisoformat(date_str).toordinal()
+        position = bisect_right(self.ordinals, ordinal, start, end) - 1
+        if position < start or self.ordinals[position] != ordinal or math.isnan(self.velocity[position]):
+            return None
+        return int(self.velocity[position])
+
+    def save(self, path):
+        """
+        Write the store to its binary form.
+
+        Args:
+            path (str): Destination file, replaced atomically
+        """
+        self.freeze()
+        names_blob = '\n'.join(self.names).encode('utf-8')
+        header = _HEADER.pack(
+            STORE_MAGIC, STORE_VERSION, 0 if sys.byteorder == 'little' else 1,
+            len(self.names), len(self.dates), len(self.ordinals), len(names_blob)
+        )
+        sections = [header, self.date_ordinals, self.offsets, self.ordinals,
+                    self.ranks, self.stars, names_blob]
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            for section in sections:
+                data = memoryview(section).cast('B')
+                f.write(data)
+                f.write(b'\0' * _padding(len(data)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory-map a store written by save().
+
+        The numeric columns are memoryviews into the mapping; only the
+        repository names are decoded.
+
+        Returns:
+            HistoryStore: The store, or None if the file is missing or
+                was written by another version or byte order
+        """
+        try:
+            with open(path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size < _HEADER.size:
+                    return None
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return None
+
+        magic, version, byteorder, n_repos, n_dates, n_entries, names_size = \
+            _HEADER.unpack_from(mapping)
+        native = 0 if sys.byteorder == 'little' else 1
+        if magic != STORE_MAGIC or version != STORE_VERSION or byteorder != native:
+            mapping.close()
+            return None
+
+        view = memoryview(mapping)
+        position = _HEADER.size + _padding(_HEADER.size)
+
+        def column(typecode, count):
+            nonlocal position
+            size = array(typecode).itemsize * count
+            data = view[position:position + size].cast(typecode)
+            position += size + _padding(size)
+            return data
+
+        store = cls()
+        store._mmap = mapping
+        # Dates stay appendable; they are one row per day, not per appearance
+        store.date_ordinals = array('i', column('i', n_dates))
+        store.offsets = column('I', n_repos + 1)
+        store.ordinals = column('i', n_entries)
+        store.ranks = column('H', n_entries)
+        store.stars = column('i', n_entries)
+        names_blob = bytes(view[position:position + names_size])
+        store.names = names_blob.decode('utf-8').split('\n') if n_repos else []
+        store.name_ids = {name: repo_id for repo_id, name in enumerate(store.names)}
+        store.dates = [date.fromordinal(o).isoformat() for o in store.date_ordinals]
+        store._date_strings = dict(zip(store.date_ordinals, store.dates))
+        return store
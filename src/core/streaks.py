@@ -0,0 +1,146 @@
+"""
+Batch streak computation for Github Trending History.
+
+Works on the columnar layout of the history store: one array of date
+ordinals holding every appearance, grouped per repository by an offsets
+array. A single pass yields, for every repository, the streak ending at
+each appearance, the current and longest streak, and every run of
+consecutive trending days. NumPy is used when it is installed; the pure
+Python path gives the same results.
+"""
+
+from array import array
+from bisect import bisect_right
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+class StreakTable:
+    """
+    Streak results for every repository in a store.
+
+    Attributes:
+        entry_streaks: Streak ending at each appearance, aligned with the
+            store's ordinals column
+        current: Streak ending at each repository's latest appearance
+        longest: Longest streak of each repository
+        run_offsets: Per-repository slice bounds into the run columns
+        run_starts: Date ordinal on which each run started
+        run_lengths: Length in days of each run
+    """
+
+    def __init__(self, entry_streaks, current, longest, run_offsets, run_starts, run_lengths):
+        self.entry_streaks = entry_streaks
+        self.current = current
+        self.longest = longest
+        self.run_offsets = run_offsets
+        self.run_starts = run_starts
+        self.run_lengths = run_lengths
+
+    def runs(self, repo_id):
+        """
+        Get every run of a repository.
+
+        Returns:
+            list: (start date ordinal, length in days) tuples in date order
+        """
+        start, end = self.run_offsets[repo_id], self.run_offsets[repo_id + 1]
+        return [(int(self.run_starts[i]), int(self.run_lengths[i])) for i in range(start, end)]
+
+    def longest_as_of(self, repo_id, ordinal):
+        """Longest streak of a repository counting only days up to an ordinal"""
+        start, end = self.run_offsets[repo_id], self.run_offsets[repo_id + 1]
+        end = bisect_right(self.run_starts, ordinal, start, end)
+        longest = 0
+        for i in range(start, end):
+            longest = max(longest, min(self.run_lengths[i], ordinal - self.run_starts[i] + 1))
+        return int(longest)
+
+def compute_streaks(ordinals, offsets, use_numpy=None):
+    """
+    Compute streaks and runs for every repository in one pass.
+
+    A run is a stretch of appearances on consecutive days; two appearances
+    on the same day end a run, matching calc_streak().
+
+    Args:
+        ordinals: Date ordinal of every appearance, in date order per repository
+        offsets: Per-repository bounds into ordinals (length repo count + 1)
+        use_numpy (bool): Force or disable the NumPy path; by default it is
+            used when NumPy is installed
+
+    Returns:
+        StreakTable: Streak results for every repository
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy:
+        return _compute_streaks_numpy(ordinals, offsets)
+    return _compute_streaks_python(ordinals, offsets)
+
+def _compute_streaks_python(ordinals, offsets):
+    """Pure Python streak computation"""
+    entry_streaks = array('H')
+    current = array('H')
+    longest = array('H')
+    run_offsets = array('I', [0])
+    run_starts = array('i')
+    run_lengths = array('H')
+
+    for repo_id in range(len(offsets) - 1):
+        start, end = offsets[repo_id], offsets[repo_id + 1]
+        streak = best = 0
+        previous = None
+        for i in range(start, end):
+            ordinal = ordinals[i]
+            if previous is not None and ordinal - previous == 1:
+                streak += 1
+                run_lengths[-1] = streak
+            else:
+                streak = 1
+                run_starts.append(ordinal)
+                run_lengths.append(1)
+            previous = ordinal
+            entry_streaks.append(streak)
+            if streak > best:
+                best = streak
+        current.append(streak)
+        longest.append(best)
+        run_offsets.append(len(run_starts))
+
+    return StreakTable(entry_streaks, current, longest, run_offsets, run_starts, run_lengths)
+
+def _compute_streaks_numpy(ordinals, offsets):
+    """Vectorized streak computation"""
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    repo_count = len(offsets) - 1
+    entry_count = len(ordinals)
+
+    # A run starts at every repository's first appearance and at every gap
+    run_start = np.ones(entry_count, dtype=bool)
+    if entry_count > 1:
+        run_start[1:] = np.diff(ordinals) != 1
+    first_rows = offsets[:-1][offsets[:-1] < offsets[1:]]
+    run_start[first_rows] = True
+
+    run_rows = np.flatnonzero(run_start)
+    run_ids = np.cumsum(run_start) - 1
+    entry_streaks = np.arange(entry_count) - run_rows[run_ids] + 1 if entry_count else np.zeros(0, np.int64)
+    run_lengths = np.diff(np.append(run_rows, entry_count))
+    run_offsets = np.searchsorted(run_rows, offsets)
+
+    lengths = offsets[1:] - offsets[:-1]
+    current = np.zeros(repo_count, dtype=np.int64)
+    longest = np.zeros(repo_count, dtype=np.int64)
+    active = lengths > 0
+    if active.any():
+        current[active] = entry_streaks[offsets[1:][active] - 1]
+        longest[active] = np.maximum.reduceat(run_lengths, run_offsets[:-1][active])
+
+    return StreakTable(
+        entry_streaks.astype(np.uint16), current.astype(np.uint16), longest.astype(np.uint16),
+        run_offsets.astype(np.uint32), ordinals[run_rows].astype(np.int32), run_lengths.astype(np.uint16)
+    )
@@ -0,0 +1,72 @@
+"""
+Batch star-velocity computation for Github Trending History.
+
+Works on the columnar layout of the history store, like streaks.py: one
+array of date ordinals and one of star counts holding every appearance,
+grouped per repository by an offsets array. A single pass yields the
+stars each repository gained per day while trending: at every appearance
+that follows an appearance on the day before, the difference of the two
+star counts. The first day of a run, and days whose star count is
+unknown, have no velocity (NaN). NumPy is used when it is installed; the
+pure Python path gives the same results.
+"""
+
+import math
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+# Star count of an appearance whose count is not known
+UNKNOWN_STARS = -1
+
+def compute_velocity(ordinals, stars, offsets, use_numpy=None):
+    """
+    Compute the star velocity of every appearance in one pass.
+
+    Args:
+        ordinals: Date ordinal of every appearance, in date order per repository
+        stars: Star count of every appearance, UNKNOWN_STARS if unknown
+        offsets: Per-repository bounds into ordinals (length repo count + 1)
+        use_numpy (bool): Force or disable the NumPy path; by default it is
+            used when NumPy is installed
+
+    Returns:
+        array: Stars gained since the day before, per appearance (float,
+            NaN where there is no velocity), aligned with ordinals
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy:
+        return _compute_velocity_numpy(ordinals, stars, offsets)
+    return _compute_velocity_python(ordinals, stars, offsets)
+
+def _compute_velocity_python(ordinals, stars, offsets):
+    """Pure Python velocity computation"""
+    velocity = array('d', [math.nan]) * len(ordinals)
+    for repo_id in range(len(offsets) - 1):
+        for i in range(offsets[repo_id] + 1, offsets[repo_id + 1]):
+            if ordinals[i] - ordinals[i - 1] == 1 and stars[i] != UNKNOWN_STARS and stars[i - 1] != UNKNOWN_STARS:
+                velocity[i] = stars[i] - stars[i - 1]
+    return velocity
+
+def _compute_velocity_numpy(ordinals, stars, offsets):
+    """Vectorized velocity computation"""
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    stars = np.asarray(stars, dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    velocity = np.full(len(ordinals), np.nan)
+    if len(ordinals) < 2:
+        return velocity
+
+    # Consecutive rows on consecutive days with both counts known...
+    known = stars != UNKNOWN_STARS
+    follows = (np.diff(ordinals) == 1) & known[1:] & known[:-1]
+    # ...that belong to the same repository
+    first_rows = offsets[:-1][offsets[:-1] < offsets[1:]]
+    follows[first_rows[first_rows > 0] - 1] = False
+    rows = np.flatnonzero(follows) + 1
+    velocity[rows] = stars[rows] - stars[rows - 1]
+    return velocity
@@ -80,7 +80,7 @@ def get_subscriptions():
         
         return jsonify({
             'success': True,
-            'subscriptions': subscription_manager.subscriptions
+            'subscriptions': subscription_manager.to_dict()
         })
     
     except Exception as e:
@@ -17,44 +17,74 @@ SMTP_PASSWORD = os.getenv('SMTP_PASSWORD', '')
 SENDER_EMAIL = os.getenv('SENDER_EMAIL', '')
 
 class SubscriptionManager:
+    """
+    Email subscriptions to categories and repositories.
+
+    Subscribers are kept in insertion-ordered sets (dicts with None
+    values): all emails, and the subscribers of every category and every
+    repository. A reverse index maps each email to the categories and
+    repositories it subscribes to, so unsubscribing touches only that
+    subscriber's entries. data/subscriptions.json, with its
+    {'emails': [...], 'categories': {...}, 'repositories': {...}} lists,
+    is only the file format (see to_dict()).
+    """
+
     def __init__(self):
-        self.subscriptions = self.load_subscriptions()
+        self.emails = {}
+        self.categories = {}
+        self.repositories = {}
+        self._email_categories = defaultdict(set)
+        self._email_repositories = defaultdict(set)
+        self.load_subscriptions()
     
     def load_subscriptions(self):
         """Load existing subscriptions from file"""
+        data = {'emails': [], 'categories': {}, 'repositories': {}}
         if os.path.exists(SUBSCRIPTION_FILE):
             try:
                 with open(SUBSCRIPTION_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                    data = json.load(f)
             except (json.JSONDecodeError, FileNotFoundError):
-                return {'emails': [], 'categories': {}, 'repositories': {}}
-        return {'emails': [], 'categories': {}, 'repositories': {}}
+                pass
+
+        self.emails = dict.fromkeys(data.get('emails', []))
+        self.categories = {category: dict.fromkeys(emails) for category, emails in data.get('categories', {}).items()}
+        self.repositories = {repo: dict.fromkeys(emails) for repo, emails in data.get('repositories', {}).items()}
+        self._email_categories = defaultdict(set)
+        self._email_repositories = defaultdict(set)
+        for category, emails in self.categories.items():
+            for email in emails:
+                self._email_categories[email].add(category)
+        for repo, emails in self.repositories.items():
+            for email in emails:
+                self._email_repositories[email].add(repo)
+
+    def to_dict(self):
+        """Subscriptions in the data/subscriptions.json format"""
+        return {
+            'emails': list(self.emails),
+            'categories': {category: list(emails) for category, emails in self.categories.items()},
+            'repositories': {repo: list(emails) for repo, emails in self.repositories.items()}
+        }
     
     def save_subscriptions(self):
         """Save subscriptions to file"""
         with open(SUBSCRIPTION_FILE, 'w', encoding='utf-8') as f:
-            json.dump(self.subscriptions, f, ensure_ascii=False, indent=2)
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
     
     def add_email_subscription(self, email, categories=None, repositories=None):
         """Add a new email subscription"""
-        if email not in self.subscriptions['emails']:
-            self.subscriptions['emails'].append(email)
+        self.emails[email] = None
         
         # Add category subscriptions
-        if categories:
-            for category in categories:
-                if category not in self.subscriptions['categories']:
-                    self.subscriptions['categories'][category] = []
-                if email not in self.subscriptions['categories'][category]:
-                    self.subscriptions['categories'][category].append(email)
+        for category in categories or ():
+            self.categories.setdefault(category, {})[email] = None
+            self._email_categories[email].add(category)
         
         # Add repository subscriptions
-        if repositories:
-            for repo in repositories:
-                if repo not in self.subscriptions['repositories']:
-                    self.subscriptions['repositories'][repo] = []
-                if email not in self.subscriptions['repositories'][repo]:
-                    self.subscriptions['repositories'][repo].append(email)
+        for repo in repositories or ():
+            self.repositories.setdefault(repo, {})[email] = None
+            self._email_repositories[email].add(repo)
         
         self.save_subscriptions()
         print(f"  💾 Subscription saved for {email}")
@@ -71,33 +101,28 @@ class SubscriptionManager:
     
     def remove_email_subscription(self, email):
         """Remove an email subscription"""
-        if email in self.subscriptions['emails']:
-            self.subscriptions['emails'].remove(email)
-        
-        # Remove from category subscriptions
-        for category in self.subscriptions['categories']:
-            if email in self.subscriptions['categories'][category]:
-                self.subscriptions['categories'][category].remove(email)
+        self.emails.pop(email, None)
         
-        # Remove from repository subscriptions
-        for repo in self.subscriptions['repositories']:
-            if email in self.subscriptions['repositories'][repo]:
-                self.subscriptions['repositories'][repo].remove(email)
+        # Remove from the categories and repositories it subscribes to
+        for category in self._email_categories.pop(email, ()):
+            self.categories[category].pop(email, None)
+        for repo in self._email_repositories.pop(email, ()):
+            self.repositories[repo].pop(email, None)
         
         self.save_subscriptions()
         return True
     
     def get_subscribers_for_category(self, category):
         """Get all subscribers for a specific category"""
-        return self.subscriptions['categories'].get(category, [])
+        return list(self.categories.get(category, ()))
     
     def get_subscribers_for_repository(self, repository):
         """Get all subscribers for a specific repository"""
-        return self.subscriptions['repositories'].get(repository, [])
+        return list(self.repositories.get(repository, ()))
     
     def get_all_subscribers(self):
         """Get all email subscribers"""
-        return self.subscriptions['emails']
+        return list(self.emails)
 
 class EmailSender:
     def __init__(self):
@@ -206,10 +231,23 @@ class EmailSender:
         """
         self.send_email(to_email, "🎉 Welcome to GitHub Trending Updates!", html_content)
 
-def generate_category_email_content(category, repos, date):
-    """Generate HTML email content for category subscription"""
+def format_velocity(repo, markup):
+    """Fill a repository's stars gained today ("+1,234") into markup, or nothing when unknown"""
+    velocity = repo.get('star_velocity')
+    return markup.format(f"{velocity:+,}") if velocity is not None else ''
+
+def generate_category_email_content(category, repos, date, subscriber_email=None):
+    """
+    Generate HTML email content for category subscription.
+
+    The repositories are shared by every subscriber; the recipient is
+    passed as subscriber_email (e.g. "{{email}}" to fill in per
+    subscriber) instead of being copied into each repository.
+    """
     project_url = "https://rand0m42195.github.io/github-trending-repositories-history"
-    unsubscribe_url = f"{project_url}/unsubscribe?email={repos[0].get('subscriber_email', '')}" if repos else ""
+    if subscriber_email is None:
+        subscriber_email = repos[0].get('subscriber_email', '') if repos else ''
+    unsubscribe_url = f"{project_url}/unsubscribe?email={subscriber_email}" if repos else ""
     
     # Get category emoji
     category_emoji = {
@@ -286,7 +324,7 @@ def generate_category_email_content(category, repos, date):
                     <div class="repo-meta">
                         <span class="language">💻 {repo.get('language', 'N/A')}</span>
                         <span class="rank">🏆 Rank #{repo['rank']}</span>
-                        <span class="streak">🔥 {repo['streak']} days trending</span>
+                        <span class="streak">🔥 {repo['streak']} days trending</span>{format_velocity(repo, '<span class="rank">⭐ {} stars today</span>')}
                     </div>
                 </div>
         """
@@ -301,19 +339,21 @@ def generate_category_email_content(category, repos, date):
                 </div>
                 <div class="footer-text">
                     <p>💡 Want to see more categories? Visit our website to explore all trending repositories!</p>
-                    <p>This email was sent to {repos[0].get('subscriber_email', '') if repos else 'subscriber'}</p>
+                    <p>This email was sent to {subscriber_email if repos else 'subscriber'}</p>
                 </div>
             </div>
         </div>
     </body>
     </html>
     """
-    return html.replace("{{email}}", repos[0].get('subscriber_email', '')) if repos else html
+    return html
 
-def generate_repository_email_content(repo, date):
-    """Generate HTML email content for repository subscription"""
+def generate_repository_email_content(repo, date, subscriber_email=None):
+    """Generate HTML email content for repository subscription, see generate_category_email_content()"""
     project_url = "https://rand0m42195.github.io/github-trending-repositories-history"
-    unsubscribe_url = f"{project_url}/unsubscribe?email={repo.get('subscriber_email', '')}"
+    if subscriber_email is None:
+        subscriber_email = repo.get('subscriber_email', '')
+    unsubscribe_url = f"{project_url}/unsubscribe?email={subscriber_email}"
     
     html = f"""
     <html>
@@ -379,7 +419,15 @@ def generate_repository_email_content(repo, date):
                             <span class="stat-label">Streak</span>
                             <span class="streak">🔥 {repo['streak']} days</span>
                         </div>
-                    </div>
+                        <div class="stat">
+                            <span class="stat-label">Best Streak</span>
+                            <span class="stat-value">{repo.get('longest_streak', repo['streak'])} days</span>
+                        </div>
+{format_velocity(repo, '''                        <div class="stat">
+                            <span class="stat-label">Stars Today</span>
+                            <span class="stat-value">⭐ {}</span>
+                        </div>
+''')}                    </div>
                 </div>
             </div>
             
@@ -391,7 +439,7 @@ def generate_repository_email_content(repo, date):
                 </div>
                 <div class="footer-text">
                     <p>💡 This repository is currently trending on GitHub! Check it out and stay updated.</p>
-                    <p>This email was sent to {repo.get('subscriber_email', 'subscriber')}</p>
+                    <p>This email was sent to {subscriber_email or 'subscriber'}</p>
                 </div>
             </div>
         </div>
@@ -407,29 +455,29 @@ def send_daily_subscriptions(today_repos, category_stats):
     today = datetime.now().strftime('%Y-%m-%d')
     
     # Send category-based subscriptions
-    for category, subscribers in subscription_manager.subscriptions['categories'].items():
+    for category, subscribers in subscription_manager.categories.items():
         if subscribers:
-            # Filter repos for this category
-            category_repos = [dict(repo, subscriber_email=email) for repo in today_repos if repo.get('category') == category for email in subscribers]
+            # Filter repos labelled with this category (primary or secondary)
+            category_repos = [repo for repo in today_repos if category in repo.get('labels', [repo.get('category')])]
             if category_repos:
-                html_content = generate_category_email_content(category, category_repos, today)
+                # Rendered once; each subscriber's address is filled in
+                html_content = generate_category_email_content(category, category_repos, today, "{{email}}")
                 subject = f"GitHub Trending - {category} ({today})"
                 
                 for email in subscribers:
                     email_sender.send_email(email, subject, html_content.replace("{{email}}", email))
     
     # Send repository-based subscriptions
-    for repo_name, subscribers in subscription_manager.subscriptions['repositories'].items():
+    repos_by_name = {repo['name']: repo for repo in reversed(today_repos)}
+    for repo_name, subscribers in subscription_manager.repositories.items():
         if subscribers:
             # Find the repository in today's trending
-            repo_data = next((repo for repo in today_repos if repo['name'] == repo_name), None)
+            repo_data = repos_by_name.get(repo_name)
             if repo_data:
+                html_content = generate_repository_email_content(repo_data, today, "{{email}}")
+                subject = f"Repository Trending - {repo_name} ({today})"
                 for email in subscribers:
-                    repo_with_email = dict(repo_data, subscriber_email=email)
-                    html_content = generate_repository_email_content(repo_with_email, today)
-                    subject = f"Repository Trending - {repo_name} ({today})"
-                    
-                    email_sender.send_email(email, subject, html_content)
+                    email_sender.send_email(email, subject, html_content.replace("{{email}}", email))
 
 if __name__ == "__main__":
     # Example usage